@@ -0,0 +1,18 @@
+from django.urls import path
+from apps.core.async_views import AsyncReadView
+from .views import ClientViewSet
+
+# Async twins of the client lookup routes, mounted under /async/clients/
+app_name = "clients_async"
+urlpatterns = [
+    path(
+        "clients/",
+        AsyncReadView.as_view(viewset=ClientViewSet, action="list"),
+        name="client-list",
+    ),
+    path(
+        "clients/<str:pk>/",
+        AsyncReadView.as_view(viewset=ClientViewSet, action="retrieve"),
+        name="client-detail",
+    ),
+]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='client',
+            name='client_id',
+            field=models.CharField(max_length=12, unique=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from apps.facilities.models import Facility
 from rest_framework.serializers import ValidationError
+from apps.core.ids import next_id
 import re
 from datetime import date
 
@@ -50,7 +51,7 @@ class Client(models.Model):
 
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
-    client_id = models.CharField(max_length=6, unique=True)
+    client_id = models.CharField(max_length=12, unique=True)
     gender = models.CharField(choices=GENDER_CHOICES)
     age = models.PositiveIntegerField()
     phone_number = models.CharField(max_length=10)
@@ -106,12 +107,7 @@ class Client(models.Model):
             
         # Client ID generation
         if not self.client_id:
-            last_client = Client.objects.order_by("-client_id").first()
-            if last_client:
-                new_id = int(last_client.client_id) + 1
-            else:
-                new_id = 100000
-            self.client_id = f"{new_id:06}"
+            self.client_id = next_id("client_id")
     
         return super().save(*args, **kwargs)
     
@@ -1,3 +1,55 @@
+import json
+from asgiref.sync import sync_to_async
 from django.test import TestCase
+from apps.core.testing import QueryBudgetMixin
+from apps.facilities.models import Facility
+from apps.users.models import User
+from .models import Client
 
-# Create your tests here.
+
+class AsyncClientLookupTests(QueryBudgetMixin, TestCase):
+    """The async client routes answer as ClientViewSet does"""
+
+    def setUp(self):
+        super().setUp()
+        facility = Facility.objects.create(
+            name="Adum", city="Kumasi", region="Ashanti", country="Ghana"
+        )
+        self.user = User.objects.create(
+            email="admin@example.com", name="Admin", is_admin=True, facility=facility
+        )
+        self.clients = [
+            Client.objects.create(
+                first_name=first_name, last_name="Mensah", gender="female", age=30,
+                phone_number=phone_number, member_type="member", insurance_id="",
+                corporate_id="", parent_facility=facility,
+            )
+            for first_name, phone_number in (("Ama", "0241234567"), ("Akosua", "0201234567"))
+        ]
+
+    async def get(self, path, user=None):
+        """GET ``path`` from both routes, returning the async response"""
+        client = self.client_for(user) if user else self.client
+        sync = await sync_to_async(client.get)(f"/clients/{path}")
+        headers = self.auth_headers(user) if user else {}
+        response = await self.async_client.get(f"/async/clients/{path}", headers=headers)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(sync.content))
+        self.assertIn("X-SQL-Queries", response)
+        return response
+
+    async def test_list(self):
+        response = await self.get("clients/", self.user)
+        self.assertEqual(len(json.loads(response.content)["results"]), 2)
+
+    async def test_retrieve(self):
+        response = await self.get(f"clients/{self.clients[1].pk}/", self.user)
+        self.assertEqual(json.loads(response.content)["client_id"], self.clients[1].client_id)
+
+    async def test_unknown_client(self):
+        response = await self.get("clients/0/", self.user)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_anonymous_requests_are_refused(self):
+        response = await self.get("clients/")
+        self.assertEqual(response.status_code, 401)
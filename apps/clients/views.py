@@ -3,6 +3,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import viewsets
 from .models import Client
 from .serializers import ClientSerializers
+from apps.core.idempotency import idempotent
 from apps.users.permissions import IsAdminUser, IsSuperUser
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
@@ -11,7 +12,8 @@ class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.select_related("parent_facility").all()
     serializer_class = ClientSerializers
     permission_classes = [IsSuperUser]
-    search_fields = ["client_id", "fullname", "phone_number"]
+    keyset_ordering = ("client_id",)
+    search_fields = ["client_id", "first_name", "last_name", "phone_number"]
 
     def get_permissions(self):
         if self.action in ["list", "retrieve", "partial_update"]:
@@ -19,13 +21,17 @@ class ClientViewSet(viewsets.ModelViewSet):
             return [permission() for permission in permission_classes]
         return super().get_permissions()
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     # modify perform_partial_update to allow only parent facility to update without needing OTP
     def perform_create(self, serializer):
         # client parent facility will be facility of creator
         user = self.request.user
         if not user.is_superuser:
             facility = user.facility
-            serializer.save(facility=facility)
+            serializer.save(parent_facility=facility)
         else:
             serializer.save()
 
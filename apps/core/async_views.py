@@ -0,0 +1,140 @@
+"""
+Async read path for the high fan-out GET endpoints.
+
+Under ASGI every DRF view is sync and runs in a worker thread, so a
+process serves as many concurrent requests as it has threads. An
+AsyncReadView answers list and retrieve for an existing viewset on the
+event loop instead: the viewset still supplies the queryset, filters,
+permissions, pagination, serializer and ETag keys, while the token is
+checked, the rows are read and the versions are compared through the
+async ORM and cache.
+
+Only what the endpoint needs of DRF is done here: there is no content
+negotiation, throttling or browsable API, and responses are always JSON.
+Serializers must not touch relations the queryset did not select, since
+lazy loads are refused on the event loop.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+
+class AsyncReadView(View):
+    """
+    Serve ``action`` ("list" or "retrieve") of ``viewset`` asynchronously.
+    Routed with ``AsyncReadView.as_view(viewset=..., action=...)`` next to
+    the viewset's own routes, with the same URL kwargs.
+    """
+    viewset = None
+    action = None
+    renderer = JSONRenderer()
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(request, authenticators=())
+        try:
+            view = await self.initial(request, kwargs)
+            etag = await view.aget_etag(request) if hasattr(view, "aget_etag") else None
+            if etag and view.not_modified(request, etag):
+                return HttpResponse(status=304, headers={"ETag": etag})
+            handler = self.list if self.action == "list" else self.retrieve
+            response = self.render(await handler(view, request), 200)
+            if etag is not None:
+                response["ETag"] = etag
+            return response
+        except Exception as exc:
+            return self.handle_exception(exc, request)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Reported by the SQL instrumentation as the viewset's action, and
+        # held to the viewset's query budget
+        view.cls = initkwargs["viewset"]
+        view.actions = {"get": initkwargs["action"], "head": initkwargs["action"]}
+        return view
+
+    async def initial(self, request, kwargs):
+        """Authenticate, build the viewset instance and check permissions"""
+        request.user, request.auth = await self.authenticate(request)
+        view = self.viewset(
+            request=request, args=(), kwargs=kwargs, action=self.action, format_kwarg=None
+        )
+        for permission in view.get_permissions():
+            if not permission.has_permission(request, view):
+                if request.successful_authenticator is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, "message", None))
+        return view
+
+    async def authenticate(self, request):
+        for authenticator in self.authenticators():
+            if hasattr(authenticator, "aauthenticate"):
+                result = await authenticator.aauthenticate(request)
+            else:
+                result = await sync_to_async(authenticator.authenticate)(request)
+            if result is not None:
+                request._authenticator = authenticator
+                return result
+        request._authenticator = None
+        return AnonymousUser(), None
+
+    def authenticators(self):
+        return [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+
+    async def list(self, view, request):
+        queryset = view.filter_queryset(view.get_queryset())
+        page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+        if page is None:
+            return view.get_serializer([i async for i in queryset], many=True).data
+        data = view.get_serializer(page, many=True).data
+        return view.paginator.get_paginated_response(data).data
+
+    async def retrieve(self, view, request):
+        return view.get_serializer(await self.aget_object(view, request)).data
+
+    async def aget_object(self, view, request):
+        """GenericAPIView.get_object() through the async ORM"""
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            instance = await queryset.filter(
+                **{view.lookup_field: view.kwargs[lookup_url_kwarg]}
+            ).afirst()
+        except (TypeError, ValueError, ValidationError):
+            instance = None
+        if instance is None:
+            # Worded as get_object_or_404() words it for the sync route
+            raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+        view.check_object_permissions(request, instance)
+        return instance
+
+    def render(self, data, status, headers=None):
+        return HttpResponse(
+            self.renderer.render(data), status=status,
+            content_type="application/json", headers=headers,
+        )
+
+    def handle_exception(self, exc, request):
+        # As APIView.handle_exception: 401 with a challenge when a scheme
+        # can issue one, 403 otherwise
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            authenticators = self.authenticators()
+            challenge = authenticators[0].authenticate_header(request) if authenticators else None
+            if challenge:
+                exc.auth_header = challenge
+            else:
+                exc.status_code = 403
+        response = exception_handler(exc, {"view": self, "request": request})
+        if response is None:
+            raise exc
+        headers = {
+            name: value for name, value in response.items() if name.lower() != "content-type"
+        }
+        return self.render(response.data, response.status_code, headers)
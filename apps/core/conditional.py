@@ -0,0 +1,72 @@
+import hashlib
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+from .versions import aget_versions, cache_is_shared, get_versions
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETags for list and retrieve, derived from the version counters
+    named by ``get_etag_keys()`` rather than from the rendered body. A
+    request whose If-None-Match still matches is answered with 304 before
+    the rows are queried or serialized.
+
+    Versions are read before the rows, so a write that lands in between
+    only makes the next poll fetch again; it never pins stale data.
+    Without a shared cache every worker would count its own versions and
+    answer 304 for writes made by the others, so no ETags are sent.
+    """
+
+    def get_etag_keys(self):
+        """
+        Version keys that cover every row this request can return, or None
+        to skip conditional handling.
+        """
+        return None
+
+    def etag_keys(self):
+        if not cache_is_shared():
+            return None
+        return self.get_etag_keys()
+
+    def get_etag(self, request):
+        keys = self.etag_keys()
+        if keys is None:
+            return None
+        return self.make_etag(request, keys, get_versions(keys))
+
+    async def aget_etag(self, request):
+        keys = self.etag_keys()
+        if keys is None:
+            return None
+        return self.make_etag(request, keys, await aget_versions(keys))
+
+    def make_etag(self, request, keys, versions):
+        payload = "|".join([
+            type(self).__name__,
+            self.action,
+            request.get_full_path(),
+            request.headers.get("Accept", ""),
+            *keys,
+            *(str(version) for version in versions),
+        ])
+        return f'"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+    def not_modified(self, request, etag):
+        if_none_match = request.headers.get("If-None-Match")
+        return bool(etag is not None and if_none_match and etag in parse_etags(if_none_match))
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if self.not_modified(request, etag):
+            return Response(status=304, headers={"ETag": etag})
+        response = handler(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response["ETag"] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,54 @@
+from django.db import connection
+
+# Rows per INSERT statement. Keeps bind parameters well under the
+# Postgres (65535) and SQLite (32766) limits.
+UPSERT_BATCH_SIZE = 1000
+
+
+def upsert_increment(model, conflict_fields, rows, increment_fields,
+                     match_fields=(), returning=()):
+    """
+    Insert ``rows`` (dicts keyed by column) in one INSERT ... ON CONFLICT
+    statement, adding ``increment_fields`` onto rows that already exist.
+    Existing rows whose ``match_fields`` differ from the incoming values are
+    left untouched and are not returned.
+    """
+    if not rows:
+        return []
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = list(rows[0])
+    fields = {column: model._meta.get_field(column) for column in columns}
+
+    updates = ", ".join(
+        f"{qn(column)} = {table}.{qn(column)} + EXCLUDED.{qn(column)}"
+        for column in increment_fields
+    )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+        f"VALUES %s ON CONFLICT ({', '.join(qn(column) for column in conflict_fields)}) "
+        f"DO UPDATE SET {updates}"
+    )
+    if match_fields:
+        sql += " WHERE " + " AND ".join(
+            f"{table}.{qn(column)} = EXCLUDED.{qn(column)}" for column in match_fields
+        )
+    if returning:
+        sql += " RETURNING " + ", ".join(qn(column) for column in returning)
+
+    # Touch rows in a canonical order so concurrent upserts cannot deadlock
+    rows = sorted(rows, key=lambda row: tuple(row[column] for column in conflict_fields))
+    placeholder = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    results = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+            batch = rows[start:start + UPSERT_BATCH_SIZE]
+            params = [
+                fields[column].get_db_prep_save(row[column], connection)
+                for row in batch
+                for column in columns
+            ]
+            cursor.execute(sql % ", ".join([placeholder] * len(batch)), params)
+            if returning:
+                results.extend(cursor.fetchall())
+    return results
@@ -0,0 +1,99 @@
+import functools
+import hashlib
+import json
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.response import Response
+from rest_framework.serializers import ValidationError
+from rest_framework.utils.encoders import JSONEncoder
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    """
+    Hash of what the request asks for: method, path with query string and
+    the parsed body with its keys sorted.
+    """
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = json.dumps(
+        [request.method, request.get_full_path(), data], sort_keys=True, cls=JSONEncoder
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _stored(owner, key):
+    try:
+        return IdempotencyKey.objects.get(owner=owner, key=key)
+    except IdempotencyKey.DoesNotExist:
+        return None
+
+
+def _replay(stored, fingerprint):
+    if stored.fingerprint != fingerprint:
+        return Response(
+            {"detail": f"This {HEADER} was already used for a different request."},
+            status=422,
+        )
+    return Response(
+        stored.response, status=stored.status_code, headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def idempotent(handler):
+    """
+    Make a view method safe to retry with an Idempotency-Key header.
+
+    The first request inserts the key in the same transaction as its work
+    and stores its response before committing. A retry is answered from
+    that row with one indexed lookup, and a duplicate that arrives while
+    the first is still running waits on the key's unique index, then
+    replays its response instead of running again. Requests that fail are
+    rolled back with their key, so they can be retried. Keys belong to the
+    user who sent them and need an authenticated request. Requests without
+    the header are handled as before.
+    """
+    @functools.wraps(handler)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return handler(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: [f"Must be 1 to {MAX_KEY_LENGTH} characters."]})
+
+        if not request.user.is_authenticated:
+            # Keys are scoped to their user, and anonymous clients would
+            # all share one scope
+            raise NotAuthenticated(f"{HEADER} requires an authenticated request.")
+
+        owner = str(request.user.pk)
+        fingerprint = request_fingerprint(request)
+        stored = _stored(owner, key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    owner=owner, key=key, fingerprint=fingerprint
+                )
+                response = handler(view, request, *args, **kwargs)
+                if not 200 <= response.status_code < 300:
+                    transaction.set_rollback(True)
+                    return response
+                record.status_code = response.status_code
+                record.response = json.loads(json.dumps(response.data, cls=JSONEncoder))
+                record.save(update_fields=["status_code", "response"])
+        except IntegrityError:
+            # A concurrent request with this key committed first
+            stored = _stored(owner, key)
+            if stored is None:
+                raise
+            return _replay(stored, fingerprint)
+        return response
+
+    return wrapper
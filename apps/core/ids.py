@@ -0,0 +1,93 @@
+import os
+import threading
+from collections import deque
+from django.conf import settings
+from django.db import connection
+
+# Width of every business ID column. IDs are zero padded to all of it, so
+# comparing them as text, as keyset pagination and exports do, keeps them in
+# numeric order.
+WIDTH = 12
+
+# name: first value
+SEQUENCES = {
+    "product_id": 1,
+    "transfer_id": 1,
+    "inbound_id": 1,
+    "client_id": 100000,
+}
+
+
+def sequence_name(name):
+    return f"id_seq_{name}"
+
+
+class IdAllocator:
+    """
+    Hands out business IDs from database sequences.
+
+    On PostgreSQL, sequences are non-transactional, so each worker reserves
+    a block of values in one round trip and serves later IDs from memory.
+    Other databases fall back to the ``id_counters`` table, reserving only
+    what is needed inside the caller's transaction so a rollback cannot
+    leave a block that another worker will reuse.
+    """
+
+    def __init__(self, block_size=None):
+        self.block_size = block_size or getattr(settings, "ID_BLOCK_SIZE", 50)
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+
+    def take(self, name, count=1):
+        """
+        Return ``count`` new IDs for ``name``, zero padded to WIDTH. Raises
+        OverflowError once the sequence needs more digits than that.
+        """
+        if name not in SEQUENCES:
+            raise KeyError(name)
+        if connection.vendor == "postgresql":
+            values = self._take_preallocated(name, count)
+        else:
+            values = self._take_counter(name, count)
+        if values and max(values) >= 10 ** WIDTH:
+            raise OverflowError(f"The {name} sequence has run out of {WIDTH}-digit IDs.")
+        return [f"{value:0{WIDTH}}" for value in values]
+
+    def _take_preallocated(self, name, count):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Blocks reserved before a fork belong to the parent
+                self._blocks, self._pid = {}, os.getpid()
+            block = self._blocks.setdefault(name, deque())
+            if len(block) < count:
+                block.extend(self._reserve(name, count - len(block) + self.block_size))
+            return [block.popleft() for _ in range(count)]
+
+    def _reserve(self, name, count):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [sequence_name(name), count],
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    def _take_counter(self, name, count):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE id_counters SET value = value + %s WHERE name = %s RETURNING value",
+                [count, name],
+            )
+            end = cursor.fetchone()[0]
+        return list(range(end - count, end))
+
+
+allocator = IdAllocator()
+
+
+def next_id(name):
+    return allocator.take(name)[0]
+
+
+def take_ids(name, count):
+    return allocator.take(name, count)
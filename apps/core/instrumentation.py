@@ -0,0 +1,164 @@
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("apps.core.sql")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts statements, their total time and
+    how often each statement text repeats
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """
+        Statements run more than once, most repeated first. Parameters are
+        left out, so the same lookup for different rows, the usual N+1,
+        counts as one statement.
+        """
+        return [(sql, count) for sql, count in self.statements.most_common() if count > 1]
+
+
+def endpoint_name(request):
+    """
+    "ViewClass.action" for viewset routes, the view class or function name
+    otherwise, None when the request did not resolve
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = match.func
+    cls = getattr(view, "cls", None)
+    if cls is None:
+        return getattr(view, "__name__", None)
+    actions = getattr(view, "actions", None) or {}
+    action = actions.get(request.method.lower())
+    return f"{cls.__name__}.{action}" if action else cls.__name__
+
+
+def query_budget(request, endpoint):
+    """
+    The most queries the endpoint may run: SQL_QUERY_BUDGETS overrides the
+    view's ``query_budgets`` ({action: count}).
+    """
+    budgets = getattr(settings, "SQL_QUERY_BUDGETS", {})
+    if endpoint in budgets:
+        return budgets[endpoint]
+    view = request.resolver_match.func
+    actions = getattr(view, "actions", None) or {}
+    action = actions.get(request.method.lower())
+    return getattr(getattr(view, "cls", None), "query_budgets", {}).get(action)
+
+
+class SQLInstrumentationMiddleware:
+    """
+    Record the queries each request runs and report them as X-SQL-Queries,
+    X-SQL-Time (ms), X-SQL-Duplicates and Server-Timing headers and as one
+    JSON log line on the "apps.core.sql" logger, attributed to the viewset
+    and action.
+
+    Requests with repeated statements or over their query budget are logged
+    as warnings. With SQL_BUDGET_ENFORCE on, as it is under the test
+    runner, going over budget raises QueryBudgetExceeded instead.
+
+    Queries run while a streaming response is consumed happen after the
+    headers are sent and are not counted. Under ASGI the middleware stays
+    on the event loop for async views; their queries run on the request's
+    sync thread, whose connections only that thread can see, so the
+    recorder is installed and removed there.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "SQL_INSTRUMENTATION", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.recording() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            await sync_to_async(self.install)(stack, recorder)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        return self.report(request, response, recorder)
+
+    @contextmanager
+    def recording(self):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            self.install(stack, recorder)
+            yield recorder
+
+    def install(self, stack, recorder):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+
+    def report(self, request, response, recorder):
+        endpoint = endpoint_name(request)
+        if endpoint is None:
+            return response
+        duration = recorder.duration * 1000
+        duplicates = recorder.duplicates()
+        response["X-SQL-Queries"] = str(recorder.count)
+        response["X-SQL-Time"] = f"{duration:.1f}"
+        response["X-SQL-Duplicates"] = str(sum(count - 1 for _, count in duplicates))
+        response["Server-Timing"] = f'sql;dur={duration:.1f};desc="{recorder.count} queries"'
+
+        record = {
+            "endpoint": endpoint,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "sql_ms": round(duration, 1),
+            "duplicates": [{"sql": sql[:300], "count": count} for sql, count in duplicates],
+        }
+        budget = query_budget(request, endpoint)
+        over_budget = budget is not None and recorder.count > budget
+        if budget is not None:
+            record["budget"] = budget
+        level = logging.WARNING if duplicates or over_budget else logging.INFO
+        logger.log(level, json.dumps(record), extra={"sql": record})
+
+        if over_budget and getattr(settings, "SQL_BUDGET_ENFORCE", False):
+            raise QueryBudgetExceeded(
+                f"{endpoint} ran {recorder.count} queries, over its budget of {budget}"
+            )
+        return response
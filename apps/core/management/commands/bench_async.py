@@ -0,0 +1,149 @@
+import json
+import random
+from django.core.management.base import CommandError
+from django.db import connection
+from django.utils import timezone
+from apps.clients.models import Client
+from apps.inventory.models import Transfer
+from apps.users.models import User
+from .loadtest import Command as LoadTestCommand, HTTPTransport
+from .seed_network import LAST_NAMES, SEED_DOMAIN, STEMS
+
+# Endpoints with an async twin under /async/, and who requests them
+ENDPOINTS = {
+    "facility_inventory": "admin",
+    "catalog": "super",
+    "catalog_search": "super",
+    "transfers": "super",
+    "transfer_detail": "super",
+    "client_search": "admin",
+}
+
+# Server, and whether its DRF routes or their async twins are loaded
+TARGETS = {
+    "wsgi": ("wsgi_url", ""),
+    "asgi_sync": ("asgi_url", ""),
+    "asgi_async": ("asgi_url", "/async"),
+}
+
+
+class Command(LoadTestCommand):
+    help = (
+        "Compare the read endpoints served by WSGI workers with their async "
+        "twins under /async/ served by ASGI workers, at each level of "
+        "concurrent connections. The DRF routes are also loaded through the "
+        "ASGI server, where they run in threads, to separate the server from "
+        "the views. Start both servers against the same PostgreSQL database "
+        "seeded with seed_network, with the same number of processes, e.g. "
+        "'gunicorn e_commerce.wsgi -w 4 --threads 8 -b 127.0.0.1:8000' and "
+        "'uvicorn e_commerce.asgi:application --workers 4 --port 8001', "
+        "then run bench_async --wsgi-url http://127.0.0.1:8000 "
+        "--asgi-url http://127.0.0.1:8001. Every connection is a client "
+        "thread issuing requests back to back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", required=True, help="Running WSGI server")
+        parser.add_argument("--asgi-url", required=True, help="Running ASGI server")
+        parser.add_argument(
+            "--connections", default="50,200",
+            help="Comma-separated levels of concurrent connections",
+        )
+        parser.add_argument(
+            "--endpoints", default=",".join(ENDPOINTS),
+            help=f"Comma-separated subset of {', '.join(ENDPOINTS)}",
+        )
+        parser.add_argument(
+            "--targets", default=",".join(TARGETS),
+            help=f"Comma-separated subset of {', '.join(TARGETS)}",
+        )
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per run")
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", help="Write the results to this file")
+
+    def handle(self, *args, **options):
+        endpoints = self.choices(options["endpoints"], ENDPOINTS, "endpoints")
+        targets = self.choices(options["targets"], TARGETS, "targets")
+        try:
+            levels = [int(level) for level in options["connections"].split(",")]
+        except ValueError:
+            raise CommandError("--connections must be comma-separated numbers.")
+        if not levels or min(levels) < 1:
+            raise CommandError("--connections must be at least 1.")
+
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.admins = list(
+            User.objects.filter(email__endswith=f"@{SEED_DOMAIN}", is_admin=True, is_superuser=False)
+            .order_by("email").values_list("email", flat=True)
+        )
+        self.transfer_ids = list(Transfer.objects.values_list("pk", flat=True)[:10000])
+        first_client = Client.objects.order_by("client_id").values_list("client_id", flat=True).first()
+        if not (self.admins and self.transfer_ids and first_client):
+            raise CommandError("No seeded network found, run seed_network first.")
+        self.client_terms = LAST_NAMES + [first_client.lstrip("0")[:4], "024", "055"]
+        self.catalog_terms = [stem[:4] for stem in STEMS]
+
+        results = {}
+        for name in endpoints:
+            for target in targets:
+                url_option, prefix = TARGETS[target]
+                base_url = options[url_option]
+                tokens = self.tokens(base_url, ENDPOINTS[name], max(levels))
+                for level in levels:
+                    key = f"{name}[{target}, {level}]"
+                    scenarios = [
+                        self.scenario(name, HTTPTransport(base_url), prefix, tokens[number % len(tokens)])
+                        for number in range(level)
+                    ]
+                    results[key] = self.run(scenarios, options["duration"])
+                    self.report(key, results[key])
+
+        if options["json"]:
+            output = {
+                "started_at": timezone.now().isoformat(timespec="seconds"),
+                "wsgi_url": options["wsgi_url"],
+                "asgi_url": options["asgi_url"],
+                "database": connection.vendor,
+                "connections": levels,
+                "duration": options["duration"],
+                "endpoints": results,
+            }
+            with open(options["json"], "w") as f:
+                json.dump(output, f, indent=2, sort_keys=True)
+                f.write("\n")
+
+    def choices(self, value, known, option):
+        chosen = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(chosen) - set(known)
+        if unknown:
+            raise CommandError(f"Unknown {option}: {', '.join(sorted(unknown))}")
+        return chosen
+
+    def tokens(self, base_url, role, count):
+        """
+        Access tokens from the server under test: the superuser's, or one
+        per facility admin for up to ``count`` admins
+        """
+        transport = HTTPTransport(base_url)
+        if role == "super":
+            return [self.login(transport, f"super@{SEED_DOMAIN}")]
+        return [self.login(transport, email) for email in self.admins[:count]]
+
+    def scenario(self, name, transport, prefix, token):
+        def request(rng, number):
+            if name == "facility_inventory":
+                path = "/inventory/facility-inventory/"
+            elif name == "catalog":
+                path = f"/inventory/inventory/?page={rng.randint(1, 10)}"
+            elif name == "catalog_search":
+                path = f"/inventory/inventory/?search={rng.choice(self.catalog_terms)}"
+            elif name == "transfers":
+                path = "/inventory/transfer/"
+            elif name == "transfer_detail":
+                path = f"/inventory/transfer/{rng.choice(self.transfer_ids)}/"
+            else:
+                path = f"/clients/clients/?search={rng.choice(self.client_terms)}"
+            return transport.request("GET", prefix + path, token=token)[:2]
+        return request
@@ -0,0 +1,65 @@
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connections, transaction
+from apps.inventory.models import Inbound
+
+
+def legacy_save(inbound):
+    # The read-max-plus-one scheme the models used before the allocator
+    last_inbound = Inbound.objects.order_by("-inbound_id").first()
+    new_id = int(last_inbound.inbound_id) + 1 if last_inbound else 1
+    inbound.inbound_id = f"{new_id:05}"
+    inbound.save()
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert Inbound rows from parallel threads and report throughput and "
+        "ID collisions. Writes to the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--inserts", type=int, default=500, help="Inserts per thread")
+        parser.add_argument(
+            "--legacy", action="store_true",
+            help="Generate IDs with the old read-max-plus-one query instead",
+        )
+
+    def handle(self, *args, **options):
+        counts = {"inserted": 0, "collisions": 0}
+        lock = threading.Lock()
+        save = legacy_save if options["legacy"] else Inbound.save
+
+        def worker():
+            try:
+                for number in range(options["inserts"]):
+                    inbound = Inbound(
+                        supplier="Benchmark", invoice_no=str(number), invoice_date="2024-01-01"
+                    )
+                    try:
+                        with transaction.atomic():
+                            save(inbound)
+                        outcome = "inserted"
+                    except IntegrityError:
+                        outcome = "collisions"
+                    with lock:
+                        counts[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        mode = "legacy" if options["legacy"] else "allocator"
+        self.stdout.write(
+            f"{mode}: {counts['inserted']} inserts in {elapsed:.2f}s "
+            f"({counts['inserted'] / elapsed:.0f} inserts/s) with "
+            f"{options['threads']} threads, {counts['collisions']} ID collisions"
+        )
@@ -0,0 +1,261 @@
+import json
+import re
+from importlib import import_module
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client as TestClient, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from apps.core.plans import StatementCapture, compare, explain, statement_key
+from apps.facilities.models import Facility
+from apps.inventory.catalog import catalog
+from apps.inventory.models import FacilityInventory, InventoryItem, Transfer, WarehouseInventory
+from apps.inventory.search import SEARCH_FIELDS, CatalogSearchFilter
+from apps.users.models import User
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+# URL modules whose routers are checked
+URLCONFS = ["apps.inventory.urls", "apps.clients.urls", "apps.users.urls"]
+
+ROLES = {
+    "superuser": {"is_superuser": True},
+    "warehouse": {"is_warehouse": True, "is_superuser": False},
+    "admin": {"is_admin": True, "is_superuser": False, "facility__isnull": False},
+}
+
+# Caches would answer repeated requests without running their queries
+NO_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def product_ids(queryset, count=5):
+    return list(queryset.values_list("inventory_item__product_id", flat=True).distinct()[:count])
+
+
+def inbound_sample(user):
+    items = InventoryItem.objects.order_by("id").values_list("product_id", flat=True)[:5]
+    return None, {
+        "supplier": "Plan check",
+        "invoice_no": "PLAN-CHECK",
+        "invoice_date": str(timezone.localdate()),
+        "items": [
+            {"product_id": product_id, "batch_no": "PLAN-CHECK", "expiry_date": "2031-12-31", "quantity": 1}
+            for product_id in items
+        ],
+    }
+
+
+def supply_sample(user):
+    destination = Facility.objects.exclude(pk=user.facility_id).order_by("id").first()
+    items = product_ids(WarehouseInventory.objects.filter(quantity__gt=0).order_by())
+    if destination is None or not items:
+        return None
+    return None, {
+        "facility": destination.pk,
+        "items": [{"product_id": product_id, "quantity": 1} for product_id in items],
+    }
+
+
+def transfer_sample(user):
+    destination = Facility.objects.exclude(pk=user.facility_id).order_by("id").first()
+    items = product_ids(FacilityInventory.objects.filter(facility_id=user.facility_id, quantity__gt=0).order_by())
+    if destination is None or not items:
+        return None
+    return None, {
+        "facility": destination.pk,
+        "items": [{"product_id": product_id, "quantity": 1} for product_id in items],
+    }
+
+
+def update_status_sample(user):
+    transfer_id = (
+        Transfer.objects.filter(destination_id=user.facility_id)
+        .values_list("pk", flat=True).first()
+    )
+    if transfer_id is None:
+        return None
+    return {"pk": transfer_id}, {"status": "STATUS_COMPLETED"}
+
+
+# Write actions need a request body built from the data at hand; each
+# builder returns (url kwargs, body) or None. Actions without one, such as
+# uploads, are skipped.
+SAMPLES = {
+    "WarehouseInventoryViewSet.inbound": inbound_sample,
+    "WarehouseInventoryViewSet.supply": supply_sample,
+    "FacilityInventoryViewSet.transfer": transfer_sample,
+    "TransferViewSet.update_status": update_status_sample,
+}
+
+
+def url_kwargs(url_path):
+    # The first alternative of each named group, e.g. csv for (?P<file_format>csv|ndjson)
+    return {
+        name: pattern.split("|")[0]
+        for name, pattern in re.findall(r"\(\?P<(\w+)>([^)]*)\)", url_path)
+    }
+
+
+def search_term(viewset):
+    backends = getattr(viewset, "filter_backends", [])
+    if any(issubclass(backend, CatalogSearchFilter) for backend in backends):
+        field = SEARCH_FIELDS[0]
+    elif getattr(viewset, "search_fields", None):
+        field = viewset.search_fields[0]
+    else:
+        return None
+    value = viewset.queryset.model.objects.order_by("pk").values_list(field, flat=True).first()
+    # Typed without the zero padding of business IDs
+    return str(value).lstrip("0")[:4] if value else None
+
+
+class Command(BaseCommand):
+    help = (
+        "Explain the queries run by every list, retrieve and custom action "
+        "of the inventory, clients and users viewsets, as each role, and "
+        "compare the plans with a stored baseline. Fails when a statement "
+        "newly scans a large table sequentially or its estimated cost grows "
+        "past --cost-growth. Run it against a database seeded with "
+        "seed_network; write requests are rolled back. --update stores the "
+        "current plans as the baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", default=settings.QUERY_PLAN_BASELINE)
+        parser.add_argument("--update", action="store_true", help="Write the baseline and exit")
+        parser.add_argument(
+            "--min-rows", type=int, default=10000,
+            help="Ignore sequential scans of tables with fewer rows",
+        )
+        parser.add_argument(
+            "--cost-growth", type=float, default=0.5,
+            help="Largest allowed growth of a statement's estimated cost, 0.5 for 50%%",
+        )
+        parser.add_argument("--endpoint", help="Only check endpoints whose name contains this")
+        parser.add_argument("--verbose", action="store_true", help="Print changed plans")
+
+    def handle(self, *args, **options):
+        tokens = {}
+        for role, lookup in ROLES.items():
+            user = User.objects.filter(is_active=True, **lookup).order_by("pk").first()
+            if user is not None:
+                token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+                tokens[role] = (user, str(token))
+        if not tokens:
+            raise CommandError("There are no users to make requests as, run seed_network first.")
+
+        with override_settings(CACHES=NO_CACHE):
+            current = self.collect(tokens, options["endpoint"])
+
+        if options["update"]:
+            with open(options["baseline"], "w") as f:
+                json.dump({"database": connection.vendor, "endpoints": current}, f, indent=2, sort_keys=True)
+                f.write("\n")
+            statements = sum(len(plans) for plans in current.values())
+            self.stdout.write(
+                f"Stored {statements} statement plans of {len(current)} endpoints in {options['baseline']}"
+            )
+            return
+
+        try:
+            with open(options["baseline"]) as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(f"No baseline at {options['baseline']}, checking for scans only.")
+            stored = {"database": connection.vendor, "endpoints": {}}
+        if stored["database"] != connection.vendor:
+            raise CommandError(f"The baseline was taken on {stored['database']}, not {connection.vendor}.")
+
+        failed = 0
+        for endpoint, plans in sorted(current.items()):
+            baseline = stored["endpoints"].get(endpoint, {})
+            failures, notes = compare(baseline, plans, options["min_rows"], options["cost_growth"])
+            for failure in failures:
+                self.stdout.write(self.style.ERROR(f"FAIL {endpoint} {failure}"))
+                self.print_plan(plans.get(failure.split(":")[0]))
+            if options["verbose"]:
+                for note in notes:
+                    self.stdout.write(f"     {endpoint} {note}")
+                    self.print_plan(plans.get(note.split(":")[0]))
+            failed += bool(failures)
+        for endpoint in sorted(stored["endpoints"].keys() - current.keys()):
+            self.stdout.write(f"     {endpoint} was not checked")
+
+        self.stdout.write(f"{len(current)} endpoints checked, {failed} with regressed plans")
+        if failed:
+            raise CommandError(f"{failed} endpoints have regressed query plans.")
+
+    def print_plan(self, plan):
+        if plan is None:
+            return
+        self.stdout.write(f"       {plan['sql'][:300]}")
+        for line in plan["shape"]:
+            self.stdout.write(f"         {line}")
+
+    def cases(self):
+        """(name, method, url name, url kwargs, sample builder, query string) of each checked action"""
+        for urlconf in URLCONFS:
+            module = import_module(urlconf)
+            for _, viewset, basename in module.router.registry:
+                prefix = f"{module.app_name}:{basename}"
+                name = viewset.__name__
+                first = viewset.queryset.model.objects.order_by("pk").values_list("pk", flat=True).first()
+                if hasattr(viewset, "list"):
+                    yield f"{name}.list", "get", f"{prefix}-list", {}, None, ""
+                    term = search_term(viewset)
+                    if term:
+                        yield f"{name}.list?search", "get", f"{prefix}-list", {}, None, f"search={term}"
+                if hasattr(viewset, "retrieve") and first is not None:
+                    yield f"{name}.retrieve", "get", f"{prefix}-detail", {"pk": first}, None, ""
+                for extra in viewset.get_extra_actions():
+                    kwargs = url_kwargs(extra.url_path)
+                    if extra.detail:
+                        kwargs["pk"] = first
+                    for method in extra.mapping:
+                        action = f"{name}.{extra.__name__}"
+                        sample = SAMPLES.get(action)
+                        if method != "get" and sample is None:
+                            self.stdout.write(f"     {action} skipped, no sample request")
+                            continue
+                        yield action, method, f"{prefix}-{extra.url_name}", kwargs, sample, ""
+
+    def collect(self, tokens, only):
+        """{endpoint: {statement key: plan}} for every action and role that succeeds"""
+        client = TestClient(raise_request_exception=False, HTTP_HOST="localhost")
+        plans = {}
+        for action, method, url_name, kwargs, sample, query in self.cases():
+            for role, (user, token) in tokens.items():
+                endpoint = f"{action}[{role}]"
+                if only and only not in endpoint:
+                    continue
+                body, request_kwargs = None, kwargs
+                if sample is not None:
+                    built = sample(user)
+                    if built is None:
+                        continue
+                    sample_kwargs, body = built
+                    request_kwargs = {**kwargs, **(sample_kwargs or {})}
+                if request_kwargs.get("pk", "") is None:
+                    continue
+                url = reverse(url_name, kwargs=request_kwargs) + (f"?{query}" if query else "")
+
+                # The catalog is cached in-process as well
+                catalog.clear()
+                capture = StatementCapture()
+                with transaction.atomic():
+                    with connection.execute_wrapper(capture):
+                        response = client.generic(
+                            method.upper(), url,
+                            json.dumps(body) if body is not None else "",
+                            content_type="application/json",
+                            headers={"Authorization": f"Bearer {token}"},
+                        )
+                        if response.streaming:
+                            b"".join(response.streaming_content)
+                    if 200 <= response.status_code < 300:
+                        plans[endpoint] = {
+                            key: {"sql": sql, **explain(sql, params)}
+                            for key, (sql, params) in capture.statements.items()
+                        }
+                    transaction.set_rollback(True)
+        return plans
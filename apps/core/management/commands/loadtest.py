@@ -0,0 +1,352 @@
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client as TestClient
+from django.utils import timezone
+from apps.clients.models import Client
+from apps.facilities.models import Facility
+from apps.inventory.models import FacilityInventory, InventoryItem, WarehouseInventory
+from apps.users.models import User
+from .seed_network import LAST_NAMES, SEED_DOMAIN
+
+ENDPOINTS = ["login", "facility_inventory", "client_search", "inbound", "supply", "transfer"]
+
+
+class InProcessTransport:
+    """
+    Requests through the Django test client, in this process, without a
+    web server in the way
+    """
+
+    def __init__(self, host):
+        self.client = TestClient(raise_request_exception=False, HTTP_HOST=host)
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        if method == "GET":
+            response = self.client.get(path, headers=headers)
+        else:
+            response = self.client.post(
+                path, json.dumps(data), content_type="application/json", headers=headers
+            )
+        return response.status_code, response.headers, response.content
+
+
+class HTTPTransport:
+    """Requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, path, data=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(data).encode() if data is not None else None
+        request = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+        except OSError:
+            return 0, {}, b""
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the hot endpoints with concurrent workers against a network "
+        "created by seed_network and report throughput and p50/p95/p99 "
+        "latency per endpoint. Requests go through the Django test client "
+        "unless --base-url points at a running server; sample data is read "
+        "from the configured database either way. --json writes the results "
+        "for diffing between releases, --baseline prints the change from an "
+        "earlier run. inbound, supply and transfer write to the database; "
+        "SQLite serialises writers, so load those against PostgreSQL when "
+        "running more than one worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoints", default=",".join(ENDPOINTS),
+            help=f"Comma-separated subset of {', '.join(ENDPOINTS)}",
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10, help="Seconds per endpoint")
+        parser.add_argument("--lines", type=int, default=5, help="Lines per stock movement")
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument("--base-url", help="Server to load instead of running in-process")
+        parser.add_argument("--host", default="localhost", help="Host header for in-process requests")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", help="Write the results to this file")
+        parser.add_argument("--baseline", help="Results file of an earlier run to compare with")
+
+    def handle(self, *args, **options):
+        endpoints = [name.strip() for name in options["endpoints"].split(",") if name.strip()]
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.admins = list(
+            User.objects.filter(email__endswith=f"@{SEED_DOMAIN}", is_admin=True, is_superuser=False)
+            .order_by("email").values_list("email", "facility_id")
+        )
+        if not self.admins:
+            raise CommandError("No seeded network found, run seed_network first.")
+
+        results = {}
+        for name in endpoints:
+            self.stdout.write(f"Loading {name}...")
+            scenarios = getattr(self, f"prepare_{name}")(options["workers"])
+            results[name] = self.run(scenarios, options["duration"])
+            self.report(name, results[name])
+
+        output = {
+            "started_at": timezone.now().isoformat(timespec="seconds"),
+            "target": options["base_url"] or "in-process",
+            "database": connection.vendor,
+            "workers": options["workers"],
+            "duration": options["duration"],
+            "dataset": {
+                "facilities": Facility.objects.count(),
+                "items": InventoryItem.objects.count(),
+                "batches": WarehouseInventory.objects.count(),
+                "clients": Client.objects.count(),
+            },
+            "endpoints": results,
+        }
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(output, f, indent=2, sort_keys=True)
+                f.write("\n")
+        if options["baseline"]:
+            self.compare(results, options["baseline"])
+
+    def transport(self):
+        if self.options["base_url"]:
+            return HTTPTransport(self.options["base_url"])
+        return InProcessTransport(self.options["host"])
+
+    def login(self, transport, email):
+        status, _, body = transport.request(
+            "POST", "/login/", {"email": email, "password": self.options["password"]}
+        )
+        if status != 200:
+            raise CommandError(f"Could not log in as {email} (HTTP {status}), check --password.")
+        return json.loads(body)["access"]
+
+    def admin_sessions(self, workers):
+        """A transport and access token per worker, each for a different facility admin"""
+        sessions = []
+        for email, facility_id in self.rng.sample(self.admins, min(workers, len(self.admins))):
+            transport = self.transport()
+            sessions.append((transport, self.login(transport, email), facility_id))
+        return [sessions[number % len(sessions)] for number in range(workers)]
+
+    def stock_lines(self, items, rng):
+        return [
+            {"product_id": product_id, "quantity": 1}
+            for product_id in rng.sample(items, min(self.options["lines"], len(items)))
+        ]
+
+    # Each prepare_<endpoint> returns one callable per worker. A callable is
+    # given the worker's random generator and request number and returns
+    # (status, headers) for one request.
+
+    def prepare_login(self, workers):
+        emails = [email for email, _ in self.admins]
+        scenarios = []
+        for _ in range(workers):
+            transport = self.transport()
+
+            def scenario(rng, number, transport=transport):
+                payload = {"email": rng.choice(emails), "password": self.options["password"]}
+                return transport.request("POST", "/login/", payload)[:2]
+            scenarios.append(scenario)
+        return scenarios
+
+    def prepare_facility_inventory(self, workers):
+        scenarios = []
+        for transport, token, _ in self.admin_sessions(workers):
+            def scenario(rng, number, transport=transport, token=token):
+                return transport.request("GET", "/inventory/facility-inventory/", token=token)[:2]
+            scenarios.append(scenario)
+        return scenarios
+
+    def prepare_client_search(self, workers):
+        # Surnames, client ID prefixes and phone prefixes, as typed at the counter
+        first_client = Client.objects.order_by("client_id").values_list("client_id", flat=True).first()
+        if first_client is None:
+            raise CommandError("There are no clients to search.")
+        terms = LAST_NAMES + [first_client.lstrip("0")[:4], "024", "055"]
+        scenarios = []
+        for transport, token, _ in self.admin_sessions(workers):
+            def scenario(rng, number, transport=transport, token=token):
+                path = f"/clients/clients/?search={rng.choice(terms)}"
+                return transport.request("GET", path, token=token)[:2]
+            scenarios.append(scenario)
+        return scenarios
+
+    def prepare_inbound(self, workers):
+        transport = self.transport()
+        token = self.login(transport, f"warehouse@{SEED_DOMAIN}")
+        items = list(InventoryItem.objects.order_by("?").values_list("product_id", flat=True)[:1000])
+        # Batch numbers new to this run, so every line opens a batch
+        run = f"L{int(time.time()) % 10 ** 6:06}"
+        scenarios = []
+        for worker in range(workers):
+            transport = self.transport()
+
+            def scenario(rng, number, transport=transport, worker=worker):
+                payload = {
+                    "supplier": "Load Test Supplies",
+                    "invoice_no": f"{run}-{worker}-{number}",
+                    "invoice_date": str(timezone.localdate()),
+                    "items": [
+                        {
+                            "product_id": product_id,
+                            "batch_no": f"{run}-{worker}-{number}",
+                            "expiry_date": "2031-12-31",
+                            "quantity": 100,
+                        }
+                        for product_id in rng.sample(items, min(self.options["lines"], len(items)))
+                    ],
+                }
+                return transport.request("POST", "/inventory/warehouse/inbound/", payload, token)[:2]
+            scenarios.append(scenario)
+        return scenarios
+
+    def prepare_supply(self, workers):
+        transport = self.transport()
+        token = self.login(transport, f"warehouse@{SEED_DOMAIN}")
+        items = list(
+            WarehouseInventory.objects.filter(quantity__gte=500)
+            .order_by().values_list("product_id", flat=True).distinct()[:1000]
+        )
+        if not items:
+            raise CommandError("The warehouse has no stock to supply.")
+        facility_ids = [facility_id for _, facility_id in self.admins]
+        scenarios = []
+        for _ in range(workers):
+            transport = self.transport()
+
+            def scenario(rng, number, transport=transport):
+                payload = {"facility": rng.choice(facility_ids), "items": self.stock_lines(items, rng)}
+                return transport.request("POST", "/inventory/warehouse/supply/", payload, token)[:2]
+            scenarios.append(scenario)
+        return scenarios
+
+    def prepare_transfer(self, workers):
+        # Facility transfers are open to superusers only, so every worker
+        # moves stock out of the superuser's facility
+        transport = self.transport()
+        token = self.login(transport, f"super@{SEED_DOMAIN}")
+        source_id = User.objects.values_list("facility_id", flat=True).get(email=f"super@{SEED_DOMAIN}")
+        items = list(
+            FacilityInventory.objects.filter(facility_id=source_id, quantity__gte=500)
+            .values_list("inventory_item__product_id", flat=True)
+        )
+        if not items:
+            raise CommandError(f"Facility {source_id} has no stock to transfer.")
+        facility_ids = [facility_id for _, facility_id in self.admins if facility_id != source_id]
+        scenarios = []
+        for _ in range(workers):
+            transport = self.transport()
+
+            def scenario(rng, number, transport=transport):
+                payload = {"facility": rng.choice(facility_ids), "items": self.stock_lines(items, rng)}
+                return transport.request(
+                    "POST", "/inventory/facility-inventory/transfer/", payload, token
+                )[:2]
+            scenarios.append(scenario)
+        return scenarios
+
+    def run(self, scenarios, duration):
+        timings, statuses, queries = [], Counter(), []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+
+        def worker(number, scenario):
+            rng = random.Random(self.options["seed"] * 1000 + number)
+            local_timings, local_statuses, local_queries = [], Counter(), []
+            try:
+                count = 0
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    status, headers = scenario(rng, count)
+                    local_timings.append((time.perf_counter() - started) * 1000)
+                    local_statuses[status] += 1
+                    if headers.get("X-SQL-Queries"):
+                        local_queries.append(int(headers["X-SQL-Queries"]))
+                    count += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    timings.extend(local_timings)
+                    statuses.update(local_statuses)
+                    queries.extend(local_queries)
+
+        threads = [
+            threading.Thread(target=worker, args=(number, scenario))
+            for number, scenario in enumerate(scenarios)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        result = {
+            "requests": len(timings),
+            "errors": sum(count for status, count in statuses.items() if not 200 <= status < 300),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+            "throughput": round(len(timings) / elapsed, 1),
+            "sql_queries": round(statistics.mean(queries), 1) if queries else None,
+        }
+        if len(timings) > 1:
+            quantiles = statistics.quantiles(timings, n=100)
+            result.update(
+                p50_ms=round(quantiles[49], 1),
+                p95_ms=round(quantiles[94], 1),
+                p99_ms=round(quantiles[98], 1),
+                max_ms=round(max(timings), 1),
+            )
+        return result
+
+    def report(self, name, result):
+        latency = (
+            f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms"
+            if "p50_ms" in result else "too few requests for percentiles"
+        )
+        self.stdout.write(
+            f"  {name}: {result['requests']} requests, {result['errors']} errors, "
+            f"{result['throughput']} req/s, {latency}"
+        )
+
+    def compare(self, results, path):
+        with open(path) as f:
+            baseline = json.load(f)["endpoints"]
+        self.stdout.write(f"Change from {path}:")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not before:
+                continue
+            changes = []
+            for field in ("throughput", "p95_ms", "p99_ms"):
+                if before.get(field) and result.get(field) is not None:
+                    changes.append(f"{field} {(result[field] / before[field] - 1) * 100:+.1f}%")
+            self.stdout.write(f"  {name}: {', '.join(changes)}")
@@ -0,0 +1,334 @@
+import io
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from apps.clients.models import Client
+from apps.core.ids import take_ids
+from apps.facilities.models import Facility
+from apps.inventory.catalog import invalidate_catalog
+from apps.inventory.models import (
+    FacilityInventory,
+    InventoryItem,
+    Transfer,
+    TransferDetails,
+    WarehouseInventory,
+    format_product_name,
+)
+from apps.inventory.versions import invalidate_facility_inventory
+from apps.users.models import User
+
+SEED_DOMAIN = "seed.local"
+
+# city: region
+CITIES = {
+    "Accra": "Greater Accra", "Tema": "Greater Accra", "Madina": "Greater Accra",
+    "Kasoa": "Central", "Cape Coast": "Central", "Winneba": "Central",
+    "Kumasi": "Ashanti", "Obuasi": "Ashanti", "Ejisu": "Ashanti",
+    "Takoradi": "Western", "Tarkwa": "Western", "Koforidua": "Eastern",
+    "Nkawkaw": "Eastern", "Ho": "Volta", "Hohoe": "Volta", "Sunyani": "Bono",
+    "Techiman": "Bono East", "Tamale": "Northern", "Bolgatanga": "Upper East",
+    "Wa": "Upper West",
+}
+STEMS = [
+    "amoxi", "ampi", "cipro", "levo", "azithro", "clarithro", "metro", "tini",
+    "flucon", "itracon", "ome", "panto", "esome", "lansop", "amlo", "nife",
+    "losa", "valsa", "telmi", "lisino", "enala", "atorva", "rosuva", "simva",
+    "ateno", "biso", "propra", "metfor", "glicla", "glime", "predni", "dexa",
+    "hydrocorti", "ibu", "diclo", "napro", "parace", "trama", "cetiri", "lorata",
+    "salbu", "artem", "lume", "quini", "doxy", "cefu", "ceftri", "genta",
+]
+SUFFIXES = [
+    "cillin", "floxacin", "mycin", "nidazole", "azole", "prazole", "dipine",
+    "sartan", "pril", "statin", "olol", "formin", "zide", "solone", "sone",
+    "profen", "fenac", "xen", "tamol", "dol", "zine", "tadine", "terol",
+    "ther", "fantrine", "nine", "cycline", "roxime", "axone", "micin",
+]
+BRAND_HEADS = [
+    "Ama", "Bel", "Cor", "Dyn", "Eli", "Fen", "Gal", "Hel", "Ivo", "Jen", "Kap",
+    "Lum", "Med", "Nov", "Ost", "Pax", "Qua", "Ren", "Sol", "Tri", "Uni", "Vel",
+    "Wel", "Xan", "Zen",
+]
+BRAND_TAILS = [
+    "ax", "ex", "in", "ol", "um", "ara", "ona", "ix", "ed", "ium", "ova",
+    "eron", "ilan", "osin", "ytec", "acor",
+]
+STRENGTHS = [
+    "5mg", "10mg", "20mg", "25mg", "40mg", "50mg", "100mg", "250mg", "500mg",
+    "1g", "5mg/5ml", "125mg/5ml", "250mg/5ml",
+]
+FORMS = ["tablet", "capsule", "syrup", "suspension", "injection", "cream", "ointment", "drops"]
+PACK_SIZES = [1, 10, 14, 20, 28, 30, 56, 100]
+FIRST_NAMES = [
+    "Kwame", "Ama", "Kofi", "Akosua", "Yaw", "Abena", "Kojo", "Efua", "Kwesi",
+    "Adwoa", "Kwaku", "Akua", "Kwabena", "Yaa", "Esi", "Fiifi", "Nana", "Afia",
+    "Ebo", "Araba", "Selorm", "Elikem", "Mawuli", "Dzifa", "Naa", "Nii",
+]
+LAST_NAMES = [
+    "Mensah", "Asante", "Owusu", "Boateng", "Osei", "Agyeman", "Appiah",
+    "Addo", "Ofori", "Amoah", "Darko", "Frimpong", "Badu", "Quaye", "Tetteh",
+    "Acheampong", "Danso", "Sarpong", "Opoku", "Adjei", "Ansah", "Amponsah",
+    "Agbeko", "Lamptey", "Quartey", "Nkansah", "Bonsu", "Antwi",
+]
+PHONE_PREFIXES = ["20", "23", "24", "26", "27", "50", "54", "55", "57", "59"]
+INSURERS = [code for code, _ in Client.INSURANCE_COMPANY]
+CORPORATES = [code for code, _ in Client.CORPORATE]
+
+
+def chunks(total, size):
+    """(start, count) pairs covering range(total) in steps of ``size``"""
+    for start in range(0, total, size):
+        yield start, min(size, total - start)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create a network at production scale for load testing: "
+        "facilities with their admins, a catalog, warehouse batches, facility "
+        "stock, historical transfers and clients. Every seeded user logs in "
+        "with --password. Historical transfers are not reconciled against "
+        "stock levels. Writes to the configured database, so point it at a "
+        "disposable instance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--facilities", type=int, default=300)
+        parser.add_argument("--items", type=int, default=100_000, help="Catalog items")
+        parser.add_argument("--batches", type=int, default=2_000_000, help="Warehouse batches")
+        parser.add_argument(
+            "--stocked-items", type=int, default=500, help="Items stocked by each facility"
+        )
+        parser.add_argument("--transfers", type=int, default=200_000)
+        parser.add_argument("--clients", type=int, default=1_000_000)
+        parser.add_argument("--password", default="loadtest-password")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email=f"warehouse@{SEED_DOMAIN}").exists():
+            raise CommandError("This database already holds a seeded network.")
+        if options["stocked_items"] > options["items"]:
+            raise CommandError("--stocked-items cannot exceed --items.")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.today = timezone.localdate()
+        started = time.perf_counter()
+
+        warehouse, facilities = self.seed_facilities(options["facilities"])
+        self.seed_users(warehouse, facilities, options["password"])
+        item_ids = self.seed_items(options["items"])
+        self.seed_batches(item_ids, options["batches"])
+        self.seed_facility_stock(facilities, item_ids, options["stocked_items"])
+        self.seed_transfers(warehouse, facilities, item_ids, options["transfers"])
+        self.seed_clients(facilities, options["clients"])
+
+        self.step("stock summary and rollups")
+        call_command("rebuild_stock_summary", stdout=io.StringIO())
+        call_command("backfill_rollups", stdout=io.StringIO())
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        with transaction.atomic():
+            invalidate_catalog()
+            invalidate_facility_inventory(warehouse.id, *(facility.id for facility in facilities))
+
+        self.stdout.write(f"Seeded in {time.perf_counter() - started:.0f}s")
+
+    def step(self, name, count=None):
+        suffix = f" ({count})" if count is not None else ""
+        self.stdout.write(f"Seeding {name}{suffix}...")
+
+    def bulk(self, model, rows):
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+
+    def seed_facilities(self, count):
+        self.step("facilities", count)
+        # Slugs are set here because bulk_create skips save() and pre_save
+        warehouse = Facility(
+            name="Seed Central Warehouse", city="Accra", region="Greater Accra",
+            country="Ghana", slug="seed-central-warehouse",
+        )
+        rows = [warehouse]
+        for number in range(1, count + 1):
+            city = self.rng.choice(list(CITIES))
+            name = f"Seed Pharmacy {number:04}"
+            rows.append(Facility(
+                name=name, city=city, region=CITIES[city], country="Ghana",
+                staff_number=self.rng.randint(3, 25), slug=slugify(f"{name}-{city}"),
+            ))
+        self.bulk(Facility, rows)
+        seeded = list(Facility.objects.filter(slug__in=[row.slug for row in rows]).order_by("id"))
+        return seeded[0], seeded[1:]
+
+    def seed_users(self, warehouse, facilities, password):
+        self.step("users", len(facilities) + 2)
+        # One hash for every user; hashing is deliberately slow
+        hashed = make_password(password)
+        rows = [
+            # The superuser sits at the first pharmacy, which facility
+            # transfers are made from
+            User(
+                email=f"super@{SEED_DOMAIN}", name="Seed Superuser", facility=facilities[0],
+                is_staff=True, is_admin=True, is_superuser=True, password=hashed,
+            ),
+            User(
+                email=f"warehouse@{SEED_DOMAIN}", name="Seed Warehouse", facility=warehouse,
+                is_warehouse=True, password=hashed,
+            ),
+        ]
+        rows += [
+            User(
+                email=f"admin{number:04}@{SEED_DOMAIN}", name=f"Seed Admin {number:04}",
+                facility=facility, is_admin=True, password=hashed,
+            )
+            for number, facility in enumerate(facilities, 1)
+        ]
+        self.bulk(User, rows)
+
+    def seed_items(self, count):
+        self.step("catalog items", count)
+        existing = set(
+            InventoryItem.objects.values_list("generic_name", "brand_name", "strength", "product_form")
+        )
+        keys = set()
+        while len(keys) < count:
+            key = (
+                (self.rng.choice(STEMS) + self.rng.choice(SUFFIXES)).title(),
+                self.rng.choice(BRAND_HEADS) + self.rng.choice(BRAND_TAILS),
+                self.rng.choice(STRENGTHS),
+                self.rng.choice(FORMS),
+            )
+            if key not in existing:
+                keys.add(key)
+
+        keys = sorted(keys)
+        product_ids = []
+        for start, size in chunks(count, self.batch_size):
+            rows = []
+            for (generic_name, brand_name, strength, product_form), product_id in zip(
+                keys[start:start + size], take_ids("product_id", size)
+            ):
+                pack_size = self.rng.choice(PACK_SIZES)
+                cost = Decimal(self.rng.randint(100, 50000)) / 100
+                selling = (cost * Decimal(self.rng.uniform(1.1, 1.6))).quantize(Decimal("0.01"))
+                rows.append(InventoryItem(
+                    product_id=product_id,
+                    generic_name=generic_name,
+                    brand_name=brand_name,
+                    strength=strength,
+                    product_form=product_form,
+                    pack_size=pack_size,
+                    cost_price_pack=cost,
+                    selling_price_pack=max(selling, cost),
+                    product_name=format_product_name(
+                        generic_name, brand_name, strength, product_form, pack_size
+                    ),
+                ))
+                product_ids.append(product_id)
+            self.bulk(InventoryItem, rows)
+
+        item_ids = {}
+        for start in range(0, len(product_ids), self.batch_size):
+            item_ids.update(InventoryItem.objects.filter(
+                product_id__in=product_ids[start:start + self.batch_size]
+            ).values_list("id", "product_id"))
+        return sorted(item_ids.items())
+
+    def seed_batches(self, item_ids, count):
+        self.step("warehouse batches", count)
+        # Batch numbers only need to be unique per item; the run prefix keeps
+        # them apart from real ones
+        prefix = f"S{self.rng.randrange(16 ** 3):03x}"
+        for start, size in chunks(count, self.batch_size):
+            rows = []
+            for number in range(start, start + size):
+                item_id, product_id = self.rng.choice(item_ids)
+                rows.append(WarehouseInventory(
+                    inventory_item_id=item_id,
+                    product_id=product_id,
+                    batch_no=f"{prefix}{number:09}",
+                    expiry_date=self.today + timedelta(days=self.rng.randint(-90, 1100)),
+                    quantity=self.rng.choice((0, self.rng.randint(1, 1000))),
+                ))
+            self.bulk(WarehouseInventory, rows)
+
+    def seed_facility_stock(self, facilities, item_ids, per_facility):
+        self.step("facility stock", len(facilities) * per_facility)
+        rows = []
+        for facility in facilities:
+            for item_id, _ in self.rng.sample(item_ids, per_facility):
+                rows.append(FacilityInventory(
+                    facility_id=facility.id,
+                    inventory_item_id=item_id,
+                    quantity=self.rng.randint(0, 5000),
+                ))
+            if len(rows) >= self.batch_size:
+                self.bulk(FacilityInventory, rows)
+                rows = []
+        self.bulk(FacilityInventory, rows)
+
+    def seed_transfers(self, warehouse, facilities, item_ids, count):
+        self.step("transfers", count)
+        now = timezone.now()
+        for start, size in chunks(count, self.batch_size):
+            transfers, details = [], []
+            for transfer_id in take_ids("transfer_id", size):
+                destination = self.rng.choice(facilities)
+                # Most stock moves out of the warehouse
+                source = warehouse if self.rng.random() < 0.7 else self.rng.choice(facilities)
+                if source == destination:
+                    source = warehouse
+                transfers.append(Transfer(
+                    transfer_id=transfer_id,
+                    source_id=source.id,
+                    destination_id=destination.id,
+                    transfer_date=now - timedelta(seconds=self.rng.randrange(365 * 24 * 3600)),
+                    status="STATUS_COMPLETED",
+                ))
+                for item_id, _ in self.rng.sample(item_ids, min(len(item_ids), self.rng.randint(1, 10))):
+                    details.append(TransferDetails(
+                        transfer_id_id=transfer_id,
+                        inventory_item_id=item_id,
+                        quantity=self.rng.randint(1, 50),
+                    ))
+            with transaction.atomic():
+                Transfer.objects.bulk_create(transfers, batch_size=self.batch_size)
+                TransferDetails.objects.bulk_create(details, batch_size=self.batch_size)
+
+    def seed_clients(self, facilities, count):
+        self.step("clients", count)
+        for start, size in chunks(count, self.batch_size):
+            rows = []
+            for client_id in take_ids("client_id", size):
+                member_type = self.rng.choices(
+                    ["member", "insurance", "corporate"], weights=[80, 15, 5]
+                )[0]
+                client = Client(
+                    client_id=client_id,
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    gender=self.rng.choice(["male", "female"]),
+                    age=self.rng.randint(18, 90),
+                    phone_number="0" + self.rng.choice(PHONE_PREFIXES) + f"{self.rng.randrange(10 ** 7):07}",
+                    member_type=member_type,
+                    insurance_id="",
+                    corporate_id="",
+                    parent_facility_id=self.rng.choice(facilities).id,
+                    date_joined=self.today - timedelta(days=self.rng.randrange(5 * 365)),
+                )
+                if member_type == "insurance":
+                    client.insurance_company = self.rng.choice(INSURERS)
+                    client.insurance_id = f"INS{self.rng.randrange(10 ** 8):08}"
+                elif member_type == "corporate":
+                    client.corporate_company = self.rng.choice(CORPORATES)
+                    client.corporate_id = f"COR{self.rng.randrange(10 ** 6):06}"
+                rows.append(client)
+            self.bulk(Client, rows)
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:07
+
+from django.db import migrations, models
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast
+
+# name: (model, field, first value)
+SEQUENCES = {
+    "product_id": ("inventory.InventoryItem", "product_id", 1),
+    "transfer_id": ("inventory.Transfer", "transfer_id", 1),
+    "inbound_id": ("inventory.Inbound", "inbound_id", 1),
+    "client_id": ("clients.Client", "client_id", 100000),
+}
+
+
+def seed_sequences(apps, schema_editor):
+    connection = schema_editor.connection
+    IdCounter = apps.get_model("core", "IdCounter")
+    for name, (model_name, field, start) in SEQUENCES.items():
+        model = apps.get_model(model_name)
+        current = model.objects.aggregate(
+            value=Max(Cast(field, BigIntegerField()))
+        )["value"]
+        next_value = max(start, (current or 0) + 1)
+        if connection.vendor == "postgresql":
+            schema_editor.execute(
+                f"CREATE SEQUENCE IF NOT EXISTS id_seq_{name} START WITH {next_value}"
+            )
+        else:
+            IdCounter.objects.update_or_create(name=name, defaults={"value": next_value})
+
+
+def drop_sequences(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for name in SEQUENCES:
+            schema_editor.execute(f"DROP SEQUENCE IF EXISTS id_seq_{name}")
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('clients', '0002_alter_client_client_id'),
+        ('inventory', '0004_alter_inbound_inbound_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'id_counters',
+            },
+        ),
+        migrations.RunPython(seed_sequences, drop_sequences),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:02
+
+from django.db import migrations
+from django.db.models import Value
+from django.db.models.functions import LPad
+
+WIDTH = 12
+
+# (model, field) holding a business ID, referencing columns included. On
+# PostgreSQL the foreign keys are only checked at commit, once all agree.
+COLUMNS = [
+    ("inventory.InventoryItem", "product_id"),
+    ("inventory.WarehouseInventory", "product_id"),
+    ("inventory.InboundDetails", "product_id"),
+    ("inventory.Transfer", "transfer_id"),
+    ("inventory.TransferDetails", "transfer_id"),
+    ("inventory.TransferBatch", "transfer_id"),
+    ("inventory.Inbound", "inbound_id"),
+    ("inventory.InboundDetails", "inbound_id"),
+    ("clients.Client", "client_id"),
+]
+
+
+def pad_ids(apps, schema_editor):
+    # IDs used to be padded to 5 digits, 6 for clients
+    for model_name, field in COLUMNS:
+        apps.get_model(model_name).objects.update(**{field: LPad(field, WIDTH, Value("0"))})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_alter_client_client_id'),
+        ('core', '0002_idempotencykey'),
+        ('inventory', '0009_access_path_indexes'),
+    ]
+
+    operations = [
+        # Padded IDs are valid under the old format too
+        migrations.RunPython(pad_ids, migrations.RunPython.noop),
+    ]
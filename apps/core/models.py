@@ -0,0 +1,40 @@
+from django.db import models
+from django.utils import timezone
+
+
+class IdCounter(models.Model):
+    """
+    Next free value of each business ID sequence on databases without
+    native sequences
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField()
+
+    class Meta:
+        db_table = "id_counters"
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response stored for a request sent with an Idempotency-Key header, so a
+    retry of the same request is answered without running it again
+    """
+    owner = models.CharField(max_length=254)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    # Filled in by the transaction that inserts the key, before it commits
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "idempotency_keys"
+        constraints = [
+            models.UniqueConstraint(fields=["owner", "key"], name="unique_idempotency_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.owner}: {self.key}"
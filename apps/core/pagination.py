@@ -0,0 +1,222 @@
+import base64
+import json
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the view's ``keyset_ordering``, a tuple of
+    fields that is unique and backed by an index. Pages are found with a
+    WHERE on the last row seen instead of OFFSET, and no COUNT(*) is run,
+    so deep pages cost the same as the first one.
+
+    Pages always follow ``keyset_ordering``, so a request whose filters
+    would order the results otherwise (the ``ordering_param`` of a filter
+    backend, e.g. OrderingFilter's ?ordering=) is refused.
+    """
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request, view)
+        return self.paginate_results(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request, view)
+        return self.paginate_results([instance async for instance in page])
+
+    def page_queryset(self, queryset, request, view):
+        """
+        The rows of the requested page plus one, which tells whether
+        another page follows
+        """
+        self.request = request
+        self.ordering = tuple(getattr(view, "keyset_ordering", ("pk",)))
+        self.base_url = remove_query_param(request.build_absolute_uri(), "page")
+        self.check_ordering(request, view)
+
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self.seek(ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def paginate_results(self, results):
+        position, reverse = self.position, self.reverse
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = results
+        return results
+
+    def seek(self, ordering, position):
+        """
+        Rows after ``position`` in ``ordering``. The leading field is also
+        bounded on its own so the index range scan starts at the cursor.
+        """
+        condition = Q()
+        for depth, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            step = Q(**{f"{name}__{lookup}": position[depth]})
+            for previous, value in zip(ordering[:depth], position):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        first = ordering[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": position[0]}) & condition
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def check_ordering(self, request, view):
+        for backend in getattr(view, "filter_backends", ()):
+            param = getattr(backend, "ordering_param", None)
+            if param and request.query_params.get(param):
+                raise ValidationError({param: [
+                    f"Cannot be combined with keyset pagination, which orders by "
+                    f"{', '.join(self.ordering)}."
+                ]})
+
+    def decode_cursor(self, request, model):
+        """
+        The cursor's position, each value converted to its ordering field's
+        type, and whether it pages backwards
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = cursor["p"], bool(cursor.get("r"))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            position = [
+                _field(model, field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        position = [_value(instance, field.lstrip("-")) for field in self.ordering]
+        payload = json.dumps({"p": position, "r": int(reverse)}, cls=DjangoJSONEncoder)
+        encoded = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+class HybridPagination(PageNumberPagination):
+    """
+    Page number pagination unless the client asks for keyset pagination with
+    ?pagination=keyset or follows a cursor link, so existing clients can
+    move over one at a time.
+    """
+    mode_query_param = "pagination"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (request.query_params.get(self.mode_query_param) == "keyset"
+                or KeysetPagination.cursor_query_param in request.query_params):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, with the count and the page
+        read through the async ORM
+        """
+        self.keyset = None
+        if (request.query_params.get(self.mode_query_param) == "keyset"
+                or KeysetPagination.cursor_query_param in request.query_params):
+            self.keyset = KeysetPagination()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count is a cached property; filled in here it is never
+        # computed synchronously
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            ))
+        self.page.object_list = [instance async for instance in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _field(model, name):
+    if name == "pk":
+        return model._meta.pk
+    # Accepts attnames such as "facility_id" as well
+    return model._meta.get_field(name)
+
+
+def _value(instance, field):
+    if field == "pk":
+        return instance.pk
+    return getattr(instance, field)
@@ -0,0 +1,151 @@
+"""
+Query plan capture and comparison for check_query_plans.
+
+Requests are sent through the test client while every statement they run
+is recorded with its parameters. Each distinct statement is then
+explained, and the plan is reduced to a shape: the plan nodes with the
+relations and indexes they read. Shapes are compared against a stored
+baseline by statement, keyed by a hash of the normalized SQL text, so
+statements that differ only in their values share a key.
+"""
+import hashlib
+import json
+import re
+from django.db import connection
+
+# Statements worth explaining; the rest are writes of single rows,
+# savepoints and locks
+EXPLAINED = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# Values Django writes into the SQL text instead of passing as parameters,
+# such as LIMIT and OFFSET
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+# A list of values, whose length follows the data, as in IN (%s, %s, %s)
+VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+class StatementCapture:
+    """
+    Database execute wrapper that keeps the first SQL and parameters each
+    statement ran with, by statement_key()
+    """
+
+    def __init__(self):
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith(EXPLAINED):
+            self.statements.setdefault(statement_key(sql), (sql, params))
+        return execute(sql, params, many, context)
+
+
+def normalize(sql):
+    """
+    ``sql`` with every literal and placeholder written as ?, every list of
+    them as (...) and runs of whitespace as one space
+    """
+    sql = PLACEHOLDER.sub("?", LITERAL.sub("?", sql))
+    return " ".join(VALUE_LIST.sub("(...)", sql).split())
+
+
+def statement_key(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def _postgresql_plan(cursor, sql, params):
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]["Plan"]
+
+    shape, seq_scans = [], []
+
+    def walk(node, depth):
+        label = node["Node Type"]
+        if "Index Name" in node:
+            label += f" using {node['Index Name']}"
+        if "Relation Name" in node:
+            label += f" on {node['Relation Name']}"
+            if node["Node Type"] == "Seq Scan":
+                seq_scans.append(node["Relation Name"])
+        shape.append("  " * depth + label)
+        for child in node.get("Plans", []):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return {"shape": shape, "seq_scans": sorted(set(seq_scans)), "cost": root["Total Cost"]}
+
+
+def _sqlite_plan(cursor, sql, params):
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    shape, seq_scans = [], []
+    for _, _, _, detail in cursor.fetchall():
+        shape.append(detail)
+        words = detail.split()
+        # "SCAN table" reads every row; "SCAN table USING INDEX" walks an index
+        if words[0] == "SCAN" and "USING" not in words and not words[1].startswith("("):
+            seq_scans.append(words[1])
+    # SQLite gives no cost estimate
+    return {"shape": shape, "seq_scans": sorted(set(seq_scans)), "cost": None}
+
+
+def explain(sql, params):
+    """
+    Plan of one statement: its shape, the relations it scans sequentially
+    and, on PostgreSQL, the estimated total cost
+    """
+    plan = _postgresql_plan if connection.vendor == "postgresql" else _sqlite_plan
+    with connection.cursor() as cursor:
+        return plan(cursor, sql, params)
+
+
+def relation_rows(table):
+    """Estimated rows in ``table``, used to ignore scans of small tables"""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = to_regclass(%s)", [table])
+            row = cursor.fetchone()
+            return max(int(row[0]), 0) if row else 0
+        cursor.execute(f"SELECT COUNT(*) FROM {connection.ops.quote_name(table)}")
+        return cursor.fetchone()[0]
+
+
+def compare(baseline, current, min_rows, cost_growth):
+    """
+    Compare the plans of one endpoint with its baseline. Returns
+    (failures, notes): a statement fails when it newly scans a relation of
+    at least ``min_rows`` rows sequentially or its cost grows by more than
+    ``cost_growth`` (0.5 is 50%). Statements without a baseline fail on
+    any such scan. Other plan changes are noted.
+    """
+    failures, notes = [], []
+    rows = {}
+
+    def large(table):
+        if table not in rows:
+            rows[table] = relation_rows(table)
+        return rows[table] >= min_rows
+
+    for key, plan in current.items():
+        before = baseline.get(key)
+        allowed = set(before["seq_scans"]) if before else set()
+        for table in plan["seq_scans"]:
+            if table not in allowed and large(table):
+                failures.append(f"{key}: sequential scan on {table} ({rows[table]} rows)")
+        if before is None:
+            notes.append(f"{key}: new statement")
+            continue
+        if before["cost"] and plan["cost"] is not None:
+            growth = plan["cost"] / before["cost"] - 1
+            if growth > cost_growth:
+                failures.append(
+                    f"{key}: estimated cost {before['cost']:.0f} -> {plan['cost']:.0f} "
+                    f"({growth * 100:+.0f}%)"
+                )
+        if plan["shape"] != before["shape"]:
+            notes.append(f"{key}: plan changed")
+    for key in baseline.keys() - current.keys():
+        notes.append(f"{key}: no longer run")
+    return failures, notes
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test.runner import DiscoverRunner
+from rest_framework.test import APIClient
+from apps.users.serializers import ClaimsTokenObtainPairSerializer
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Test runner that turns on SQL_BUDGET_ENFORCE, so any request over its
+    query budget fails the test that made it
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.budget_enforce = settings.SQL_BUDGET_ENFORCE
+        settings.SQL_BUDGET_ENFORCE = True
+
+    def teardown_test_environment(self, **kwargs):
+        settings.SQL_BUDGET_ENFORCE = self.budget_enforce
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryBudgetMixin:
+    """
+    Requests made as a user would: with an access token, starting from an
+    empty auth state cache, through the SQL instrumentation
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token(user)}")
+        return client
+
+    def auth_headers(self, user):
+        """Headers for self.async_client, which the async twins are called with"""
+        return {"Authorization": f"Bearer {self.access_token(user)}"}
+
+    def access_token(self, user):
+        return ClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+    def assertWithinBudget(self, response, viewset, action):
+        self.assertLess(response.status_code, 300, response.content)
+        self.assertLessEqual(int(response["X-SQL-Queries"]), viewset.query_budgets[action])
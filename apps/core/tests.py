@@ -0,0 +1,250 @@
+import base64
+import json
+import threading
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from apps.facilities.models import Facility
+from apps.inventory.models import FacilityInventory, InventoryItem
+from apps.pos.models import Sale
+from apps.users.models import User
+from .idempotency import idempotent
+from .ids import WIDTH, allocator, sequence_name, take_ids
+from .models import IdCounter, IdempotencyKey
+from .plans import StatementCapture, statement_key
+
+
+class IdAllocatorTests(TestCase):
+    def start_at(self, value):
+        """Make ``value`` the next transfer_id on the backend in use"""
+        if connection.vendor == "postgresql":
+            # Sequences are not rolled back with the test, so put it back
+            name = sequence_name("transfer_id")
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT last_value, is_called FROM {name}")
+                self.addCleanup(self.setval, name, *cursor.fetchone())
+            self.setval(name, value, False)
+            # Blocks reserved earlier would be served first
+            allocator._blocks.pop("transfer_id", None)
+            self.addCleanup(allocator._blocks.pop, "transfer_id", None)
+        else:
+            IdCounter.objects.filter(name="transfer_id").update(value=value)
+
+    def setval(self, name, value, is_called):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT setval(%s, %s, %s)", [name, value, is_called])
+
+    def test_ids_sort_in_numeric_order(self):
+        self.start_at(99998)
+        ids = take_ids("transfer_id", 3)
+        self.assertEqual(ids, ["000000099998", "000000099999", "000000100000"])
+        self.assertEqual(sorted(ids), ids)
+
+    def test_no_ids_past_the_column_width(self):
+        self.start_at(10 ** WIDTH - 1)
+        self.assertEqual(take_ids("transfer_id", 1), ["9" * WIDTH])
+        with self.assertRaises(OverflowError):
+            take_ids("transfer_id", 1)
+
+
+class StatementKeyTests(TestCase):
+    def test_values_do_not_change_the_key(self):
+        self.assertEqual(
+            statement_key('SELECT "id" FROM "t" WHERE "id" IN (%s, %s, %s) LIMIT 21'),
+            statement_key('SELECT "id"  FROM "t"\nWHERE "id" IN (%s) LIMIT 100'),
+        )
+        self.assertEqual(
+            statement_key("SELECT * FROM \"t\" WHERE \"name\" = 'it''s' AND \"n\" > 2.5"),
+            statement_key('SELECT * FROM "t" WHERE "name" = %s AND "n" > %s'),
+        )
+
+    def test_structure_changes_the_key(self):
+        self.assertNotEqual(
+            statement_key('SELECT "id" FROM "t1" WHERE "id" IN (%s, %s)'),
+            statement_key('SELECT "id" FROM "t2" WHERE "id" IN (%s, %s)'),
+        )
+        self.assertNotEqual(
+            statement_key('SELECT "id" FROM "t" WHERE "a" = %s'),
+            statement_key('SELECT "id" FROM "t" WHERE "b" = %s'),
+        )
+
+    def test_capture_keeps_one_statement_per_key(self):
+        capture = StatementCapture()
+        with connection.execute_wrapper(capture):
+            list(IdCounter.objects.filter(name__in=["a", "b"]))
+            list(IdCounter.objects.filter(name__in=["c"]))
+        self.assertEqual([params for _, params in capture.statements.values()], [("a", "b")])
+
+
+def cursor(position, reverse=False):
+    return base64.urlsafe_b64encode(
+        json.dumps({"p": position, "r": int(reverse)}).encode()
+    ).decode()
+
+
+class KeysetPaginationTests(TestCase):
+    URL = "/inventory/facility-inventory/"
+
+    def setUp(self):
+        facilities = [
+            Facility.objects.create(name=f"Facility {n}", city="Kumasi", region="Ashanti", country="Ghana")
+            for n in range(3)
+        ]
+        items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name="Brand", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(15)
+        ]
+        FacilityInventory.objects.bulk_create([
+            FacilityInventory(facility=facility, inventory_item=item, quantity=1)
+            for facility in facilities for item in items
+        ])
+        self.keys = list(
+            FacilityInventory.objects.order_by("facility_id", "inventory_item_id")
+            .values_list("facility_id", "inventory_item_id")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            email="super@example.com", name="Super", is_superuser=True, facility=facilities[0]
+        ))
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        keys = [(row["facility"], row["inventory_item"]) for row in response.data["results"]]
+        return keys, response.data["next"], response.data["previous"]
+
+    def test_pages_forward_and_back(self):
+        pages, url = [], f"{self.URL}?pagination=keyset"
+        while url:
+            keys, url, previous = self.page(url)
+            pages.append(keys)
+        self.assertEqual([len(keys) for keys in pages], [20, 20, 5])
+        self.assertEqual(sum(pages, []), self.keys)
+
+        back = []
+        while previous:
+            keys, _, previous = self.page(previous)
+            back.append(keys)
+        self.assertEqual(back, [pages[1], pages[0]])
+
+    def test_invalid_cursors(self):
+        for encoded in (
+            "not base64!",
+            cursor(["abc", "x"]),
+            cursor([1]),
+            cursor([None, 1]),
+            base64.urlsafe_b64encode(b"[1, 2]").decode(),
+        ):
+            with self.subTest(encoded=encoded):
+                response = self.client.get(f"{self.URL}?cursor={encoded}")
+                self.assertEqual(response.status_code, 404)
+
+    def test_ordering_is_refused(self):
+        for param in ("ordering=product_name", "search=drug"):
+            with self.subTest(param=param):
+                response = self.client.get(f"/inventory/inventory/?pagination=keyset&{param}")
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get("/inventory/inventory/?ordering=product_name")
+        self.assertEqual(response.status_code, 200)
+
+
+class IdempotencyMixin:
+    """A till with one item in stock, checking out with Idempotency-Key"""
+
+    def setUp(self):
+        self.facility = Facility.objects.create(
+            name="Adum", city="Kumasi", region="Ashanti", country="Ghana"
+        )
+        self.cashier = self.user("cashier@example.com")
+        self.item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+        self.stock = FacilityInventory.objects.create(
+            facility=self.facility, inventory_item=self.item, quantity=5
+        )
+
+    def user(self, email):
+        return User.objects.create(email=email, name="Cashier", is_admin=True, facility=self.facility)
+
+    def checkout(self, quantity, key="key-1", user=None):
+        client = APIClient()
+        client.force_authenticate(user or self.cashier)
+        return client.post("/pos/sales/checkout/", {"items": [
+            {"product_id": self.item.product_id, "quantity": quantity},
+        ]}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def assertStock(self, quantity, sales):
+        self.stock.refresh_from_db()
+        self.assertEqual((self.stock.quantity, Sale.objects.count()), (quantity, sales))
+
+
+class IdempotencyTests(IdempotencyMixin, TestCase):
+    def test_retry_replays_the_response(self):
+        first = self.checkout(1)
+        self.assertEqual(first.status_code, 201)
+        retry = self.checkout(1)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.data, first.data)
+        self.assertStock(4, 1)
+
+    def test_key_reused_for_another_request(self):
+        self.checkout(1)
+        response = self.checkout(2)
+        self.assertEqual(response.status_code, 422)
+        self.assertStock(4, 1)
+
+    def test_failed_request_frees_its_key(self):
+        self.assertEqual(self.checkout(9).status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.checkout(1).status_code, 201)
+        self.assertStock(4, 1)
+
+    def test_keys_belong_to_their_user(self):
+        self.checkout(1)
+        response = self.checkout(1, user=self.user("other@example.com"))
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertStock(3, 2)
+
+    def test_anonymous_requests_are_refused(self):
+        handler = idempotent(lambda view, request: Response(status=201))
+        request = Request(APIRequestFactory().post("/", HTTP_IDEMPOTENCY_KEY="key-1"))
+        with self.assertRaises(NotAuthenticated):
+            handler(None, request)
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class IdempotencyConcurrencyTests(IdempotencyMixin, TransactionTestCase):
+    # Keeps the rows the migrations seed, such as the ID counters
+    serialized_rollback = True
+
+    def test_concurrent_duplicates_write_once(self):
+        barrier = threading.Barrier(2)
+        responses = []
+
+        def send():
+            try:
+                barrier.wait()
+                responses.append(self.checkout(1))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=send) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([response.status_code for response in responses], [201, 201])
+        self.assertEqual(responses[0].data, responses[1].data)
+        self.assertStock(4, 1)
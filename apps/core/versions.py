@@ -0,0 +1,56 @@
+import time
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_is_shared():
+    """
+    Whether the default cache is seen by every worker. With a local-memory
+    or dummy cache a version bumped in one process never reaches the
+    others, so nothing may be served on the strength of a version.
+    """
+    return not isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+def get_version(key):
+    """
+    Current value of a version counter kept in the shared cache. A counter
+    that was evicted restarts from the clock, so it never repeats a value
+    a worker may still hold.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns())
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns())
+        return cache.get(key)
+
+
+def get_versions(keys):
+    """
+    Current values of several version counters with one cache round trip,
+    initialising any that are missing.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = get_version(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(keys):
+    """get_versions() for async views"""
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns())
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
@@ -16,6 +16,7 @@ class FacilityViewSet(viewsets.ModelViewSet):
     queryset = Facility.objects.all()
     serializer_class = FacilitySerializer
     permission_classes = [IsSuperUser]
+    keyset_ordering = ("id",)
     http_method_names = [m for m in viewsets.ModelViewSet.http_method_names if m != "put"]
     lookup_field = "slug"
 
@@ -7,7 +7,14 @@ from .models import (
 admin.site.register(TransferDetails)
 
 from django.contrib import admin
-from .models import Transfer, TransferDetails
+from .models import InventoryItem, Transfer, TransferDetails, TransferBatch
+
+
+@admin.register(InventoryItem)
+class InventoryItemAdmin(admin.ModelAdmin):
+    list_display = ("product_id", "product_name", "cost_price_pack", "selling_price_pack")
+    search_fields = ("product_id", "product_name")
+    ordering = ("product_name",)
 
 
 class InventoryItemInline(admin.TabularInline):
@@ -36,10 +43,22 @@ class TransferDetailsInline(admin.TabularInline):
     )
 
 
+class TransferBatchInline(admin.TabularInline):
+    model = TransferBatch
+    extra = 0
+    readonly_fields = (
+        "warehouse_item",
+        "inventory_item",
+        "batch_no",
+        "expiry_date",
+        "quantity",
+    )
+
+
 @admin.register(Transfer)
 class TransferAdmin(admin.ModelAdmin):
     list_display = ("transfer_id", "source", "destination", "transfer_date", "status")
-    inlines = [TransferDetailsInline]
+    inlines = [TransferDetailsInline, TransferBatchInline]
 
 
 class WarehouseInventoryInline(admin.TabularInline):
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory'
+
+    def ready(self):
+        # Connect the catalog cache and stock version invalidation signals,
+        # and register the shared cache deployment check
+        from . import catalog, checks, versions  # noqa: F401
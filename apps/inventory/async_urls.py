@@ -0,0 +1,29 @@
+from django.urls import path
+from apps.core.async_views import AsyncReadView
+from .async_views import TransferAsyncView
+from .views import FacilityInventoryViewSet, InventoryItemViewSet, TransferViewSet
+
+# Async twins of the busiest read routes, mounted under /async/inventory/
+app_name = "inventory_async"
+urlpatterns = [
+    path(
+        "inventory/",
+        AsyncReadView.as_view(viewset=InventoryItemViewSet, action="list"),
+        name="inventoryitem-list",
+    ),
+    path(
+        "facility-inventory/",
+        AsyncReadView.as_view(viewset=FacilityInventoryViewSet, action="list"),
+        name="facilityinventory-list",
+    ),
+    path(
+        "transfer/",
+        TransferAsyncView.as_view(viewset=TransferViewSet, action="list"),
+        name="transfer-list",
+    ),
+    path(
+        "transfer/<str:pk>/",
+        TransferAsyncView.as_view(viewset=TransferViewSet, action="retrieve"),
+        name="transfer-detail",
+    ),
+]
@@ -0,0 +1,16 @@
+from apps.core.async_views import AsyncReadView
+from .models import TransferDetails
+from .serializers import TransferDetailsSerializer
+
+
+class TransferAsyncView(AsyncReadView):
+    """A transfer's lines, as TransferViewSet.retrieve returns them"""
+
+    async def retrieve(self, view, request):
+        transfer = await self.aget_object(view, request)
+        transfer_details = TransferDetails.objects.filter(
+            transfer_id=transfer
+        ).select_related("inventory_item")
+        return TransferDetailsSerializer(
+            [detail async for detail in transfer_details], many=True
+        ).data
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ..core.versions import bump_version, cache_is_shared, get_version
+from .models import InventoryItem
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "inventory:catalog:version"
+
+CatalogEntry = namedtuple(
+    "CatalogEntry",
+    ["id", "product_id", "product_name", "cost_price_pack", "selling_price_pack", "pack_size"],
+)
+
+ENTRY_FIELDS = [
+    "id",
+    "product_id",
+    "product_name",
+    "cost_price_pack",
+    "selling_price_pack",
+    "pack_size",
+]
+
+
+def _entry(item):
+    return CatalogEntry(
+        item.id,
+        item.product_id,
+        item.product_name,
+        item.cost_price_pack,
+        item.selling_price_pack,
+        item.pack_size,
+    )
+
+
+class CatalogCache:
+    """
+    Worker-local LRU of product_id -> CatalogEntry.
+
+    Every write to InventoryItem bumps a version key in the shared Django
+    cache. Workers compare it with the version their entries were loaded
+    under, at most once per ``check_interval`` seconds unless a caller asks
+    for fresh data, and drop everything when it has moved. Without a shared
+    cache the version cannot reach other workers, so nothing is kept and
+    every lookup reads the database.
+    """
+
+    def __init__(self, max_size=None, check_interval=None):
+        self.max_size = max_size or getattr(settings, "CATALOG_CACHE_SIZE", 50_000)
+        self.check_interval = (
+            check_interval if check_interval is not None
+            else getattr(settings, "CATALOG_VERSION_CHECK_INTERVAL", 1.0)
+        )
+        self._entries = OrderedDict()
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _sync(self, fresh):
+        now = time.monotonic()
+        if not fresh and now - self._checked_at < self.check_interval:
+            return
+        version = get_version(VERSION_KEY)
+        self._checked_at = now
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def _store(self, entry):
+        self._entries[entry.product_id] = entry
+        self._entries.move_to_end(entry.product_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get_many(self, product_ids, fresh=False):
+        """
+        Return {product_id: CatalogEntry} for the known ``product_ids``,
+        loading misses with one query. Pass ``fresh=True`` on write paths
+        to check the shared version first.
+        """
+        if not cache_is_shared():
+            return self._load(set(product_ids))
+
+        found, missing = {}, []
+        with self._lock:
+            self._sync(fresh)
+            for product_id in set(product_ids):
+                entry = self._entries.get(product_id)
+                if entry is None:
+                    missing.append(product_id)
+                else:
+                    self._entries.move_to_end(product_id)
+                    found[product_id] = entry
+            version = self._version
+
+        if missing:
+            loaded = self._load(missing)
+            found.update(loaded)
+            with self._lock:
+                if self._version == version:
+                    for entry in loaded.values():
+                        self._store(entry)
+        return found
+
+    def _load(self, product_ids):
+        items = InventoryItem.objects.filter(product_id__in=product_ids).only(*ENTRY_FIELDS)
+        return {item.product_id: _entry(item) for item in items}
+
+    def warm(self):
+        """
+        Load the catalog up to ``max_size`` items, so the first requests do
+        not pay for the misses.
+        """
+        if not cache_is_shared():
+            return
+        try:
+            with self._lock:
+                self._sync(fresh=True)
+                version = self._version
+            items = InventoryItem.objects.only(*ENTRY_FIELDS).order_by("id")[:self.max_size]
+            entries = [_entry(item) for item in items.iterator(chunk_size=2000)]
+        except DatabaseError:
+            logger.warning("Catalog cache could not be warmed", exc_info=True)
+            return
+        with self._lock:
+            if self._version == version:
+                for entry in entries:
+                    self._store(entry)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+catalog = CatalogCache()
+
+
+def warm_on_start():
+    """
+    Warm the catalog when a server loads the application, if
+    CATALOG_WARM_ON_START is set. The query runs in its own thread, whose
+    connection is closed afterwards: ASGI servers import the application
+    inside their event loop, where queries are refused.
+    """
+    if not settings.CATALOG_WARM_ON_START:
+        return
+
+    def warm():
+        try:
+            catalog.warm()
+        finally:
+            connections.close_all()
+
+    warmer = threading.Thread(target=warm)
+    warmer.start()
+    warmer.join()
+
+
+def invalidate_catalog():
+    """
+    Bump the shared catalog version once the current transaction commits,
+    so no worker reloads rows that are about to change.
+    """
+    transaction.on_commit(lambda: bump_version(VERSION_KEY))
+
+
+@receiver([post_save, post_delete], sender=InventoryItem)
+def inventory_item_changed(sender, instance, **kwargs):
+    invalidate_catalog()
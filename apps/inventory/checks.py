@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The catalog cache, its warm-up and the ETags all need a cache every
+    worker shares, so deployments are warned when the cache is per process
+    """
+    if settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHES:
+        return []
+    return [Warning(
+        "The default cache is local to each process, so the catalog is read "
+        "from the database on every lookup and responses carry no ETags.",
+        hint="Set REDIS_URL to share a Redis cache between the workers.",
+        id="inventory.W001",
+    )]
@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from ..core.ids import take_ids
+from .catalog import invalidate_catalog
+from .models import InventoryItem, format_product_name
+
+CATALOG_FIELDS = [
+    "generic_name",
+    "brand_name",
+    "strength",
+    "product_form",
+    "cost_price_pack",
+    "selling_price_pack",
+    "pack_size",
+]
+
+STAGING_TABLE = "catalog_import_staging"
+
+
+def read_rows(stream, file_format):
+    """
+    Yield (line number, row) pairs from a text stream of CSV or NDJSON.
+    Rows that cannot be parsed are yielded as their error message.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "ndjson":
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_no, "Each line must be a JSON object."
+                continue
+            yield line_no, row
+    else:
+        raise ValueError(f"Unsupported format '{file_format}'")
+
+
+def clean_row(row):
+    """
+    Validate a row against the InventoryItem fields and its price check
+    constraints. Returns (values, errors).
+    """
+    values, errors = {}, {}
+    for name in CATALOG_FIELDS:
+        field = InventoryItem._meta.get_field(name)
+        raw = row.get(name)
+        if isinstance(raw, str):
+            raw = raw.strip()
+        if raw in (None, "") and field.null:
+            values[name] = None
+            continue
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+
+    cost, selling = values.get("cost_price_pack"), values.get("selling_price_pack")
+    if cost is not None and cost <= 0:
+        errors.setdefault("cost_price_pack", []).append("Cost price must be greater than 0.")
+    if cost is not None and selling is not None and selling < cost:
+        errors.setdefault("selling_price_pack", []).append(
+            "Selling price cannot be less than cost price."
+        )
+    return values, errors
+
+
+def _item_key(values):
+    return (
+        values["generic_name"],
+        values["brand_name"],
+        values["strength"],
+        values["product_form"],
+    )
+
+
+class CatalogImporter:
+    """
+    Stream a supplier catalog into InventoryItem in committed chunks.
+
+    Each chunk is copied into a temporary staging table and merged into the
+    catalog with one INSERT ... SELECT that skips items already present, so
+    re-running an import, or resuming one after ``start_after``, never
+    creates duplicates.
+    """
+
+    def __init__(self, chunk_size=5000, start_after=0, on_reject=None, on_commit=None):
+        self.chunk_size = chunk_size
+        self.start_after = start_after
+        self.on_reject = on_reject
+        self.on_commit = on_commit
+        self.summary = {"read": 0, "inserted": 0, "existing": 0, "rejected": 0}
+
+    def run(self, stream, file_format):
+        seen = {}
+        chunk = []
+        last_line = self.start_after
+        for line_no, row in read_rows(stream, file_format):
+            if line_no <= self.start_after:
+                continue
+            self.summary["read"] += 1
+            if isinstance(row, str):
+                self._reject(line_no, None, {"non_field_errors": [row]})
+                continue
+
+            values, errors = clean_row(row)
+            if not errors:
+                key = _item_key(values)
+                if key in seen:
+                    errors = {"non_field_errors": [f"Duplicate of line {seen[key]}."]}
+                else:
+                    seen[key] = line_no
+            if errors:
+                self._reject(line_no, row, errors)
+                continue
+
+            chunk.append(values)
+            last_line = line_no
+            if len(chunk) >= self.chunk_size:
+                self._load(chunk, last_line)
+                chunk = []
+        if chunk:
+            self._load(chunk, last_line)
+        return self.summary
+
+    def _reject(self, line_no, row, errors):
+        self.summary["rejected"] += 1
+        if self.on_reject:
+            self.on_reject({"line": line_no, "row": row, "errors": errors})
+
+    def _load(self, rows, last_line):
+        with transaction.atomic():
+            product_ids = take_ids("product_id", len(rows))
+            for values, product_id in zip(rows, product_ids):
+                values["product_id"] = product_id
+                values["product_name"] = format_product_name(
+                    values["generic_name"],
+                    values["brand_name"],
+                    values["strength"],
+                    values["product_form"],
+                    values["pack_size"],
+                )
+            if connection.vendor == "postgresql":
+                inserted = self._copy_and_merge(rows)
+            else:
+                inserted = self._bulk_insert(rows)
+            invalidate_catalog()
+        self.summary["inserted"] += inserted
+        self.summary["existing"] += len(rows) - inserted
+        if self.on_commit:
+            self.on_commit(last_line)
+
+    def _copy_and_merge(self, rows):
+        qn = connection.ops.quote_name
+        table = qn(InventoryItem._meta.db_table)
+        columns = ["product_id", "product_name"] + CATALOG_FIELDS
+        column_list = ", ".join(qn(column) for column in columns)
+        definitions = ", ".join(
+            f"{qn(column)} {InventoryItem._meta.get_field(column).db_type(connection)}"
+            for column in columns
+        )
+        # Plain equality on the NOT NULL key columns, so the lookup can use
+        # a hash anti-join or the unique index; a missing brand is matched
+        # on its own, since NULLs never compare equal
+        brand = qn("brand_name")
+        key_match = " AND ".join(
+            [
+                f"item.{qn(column)} = staged.{qn(column)}"
+                for column in ("generic_name", "strength", "product_form")
+            ]
+            + [
+                f"(item.{brand} = staged.{brand} "
+                f"OR (item.{brand} IS NULL AND staged.{brand} IS NULL))"
+            ]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} ({definitions}) "
+                f"ON COMMIT DELETE ROWS"
+            )
+            cursor.execute(f"TRUNCATE {STAGING_TABLE}")
+            copy_sql = f"COPY {STAGING_TABLE} ({column_list}) FROM STDIN"
+            if hasattr(cursor.cursor, "copy"):
+                # psycopg 3
+                with cursor.cursor.copy(copy_sql) as copy:
+                    for values in rows:
+                        copy.write_row([values[column] for column in columns])
+            else:
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                for values in rows:
+                    writer.writerow([
+                        r"\N" if values[column] is None else values[column] for column in columns
+                    ])
+                buffer.seek(0)
+                cursor.cursor.copy_expert(f"{copy_sql} WITH (FORMAT csv, NULL '\\N')", buffer)
+            cursor.execute(
+                f"INSERT INTO {table} ({column_list}) "
+                f"SELECT {', '.join(f'staged.{qn(column)}' for column in columns)} "
+                f"FROM {STAGING_TABLE} staged "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {table} item WHERE {key_match}) "
+                f"ON CONFLICT DO NOTHING"
+            )
+            return cursor.rowcount
+
+    def _bulk_insert(self, rows):
+        # The unique constraint does not catch items without a brand, whose
+        # NULLs are distinct, so existing keys are looked up first
+        existing = set(
+            InventoryItem.objects.filter(
+                generic_name__in={values["generic_name"] for values in rows}
+            ).values_list("generic_name", "brand_name", "strength", "product_form")
+        )
+        before = InventoryItem.objects.count()
+        InventoryItem.objects.bulk_create(
+            [InventoryItem(**values) for values in rows if _item_key(values) not in existing],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        return InventoryItem.objects.count() - before
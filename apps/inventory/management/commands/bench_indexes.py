@@ -0,0 +1,163 @@
+import json
+import random
+import re
+import statistics
+import time
+from importlib import import_module
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.core.plans import explain
+from apps.inventory.models import (
+    FacilityInventory,
+    Inbound,
+    InboundDetails,
+    Transfer,
+    TransferDetails,
+    WarehouseInventory,
+)
+
+access_path_indexes = import_module("apps.inventory.migrations.0009_access_path_indexes")
+
+# Single-column foreign key indexes dropped by migration 0009, recreated to
+# measure the schema as it was
+REPLACED_INDEXES = [
+    ("facility_inventory", "facility_id"),
+    ("warehouse", "inventory_item_id"),
+    ("transfers", "source_id"),
+    ("transfers", "destination_id"),
+    ("transfer_details", "transfer_id_id"),
+    ("warehouse_inbound_details", "inbound_id_id"),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the inventory access paths with the indexes of migration 0009 "
+        "and again, inside a transaction that is rolled back, with the "
+        "single-column foreign key indexes they replaced. Reports latency "
+        "percentiles and the indexes each plan reads. Takes exclusive locks "
+        "on the inventory tables while measuring the old schema, so run it "
+        "against a disposable PostgreSQL database seeded with seed_network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queries", type=int, default=200, help="Queries per access path")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", help="Write the results to this file")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Covering indexes and timings are only meaningful on PostgreSQL.")
+        if options["queries"] < 2:
+            raise CommandError("--queries must be at least 2.")
+        self.facility_ids = list(
+            FacilityInventory.objects.values_list("facility_id", flat=True).distinct()
+        )
+        self.item_ids = list(
+            WarehouseInventory.objects.filter(quantity__gt=0)
+            .values_list("inventory_item_id", flat=True).distinct()[:10000]
+        )
+        self.transfer_ids = list(Transfer.objects.values_list("pk", flat=True)[:10000])
+        self.inbound_ids = list(Inbound.objects.values_list("pk", flat=True)[:10000])
+        if not (self.facility_ids and self.item_ids and self.transfer_ids):
+            raise CommandError("Facility stock, warehouse stock and transfers are required.")
+
+        after = self.measure(options)
+        with transaction.atomic():
+            with connection.schema_editor(atomic=False) as schema_editor:
+                for model_name, index in access_path_indexes.INDEXES:
+                    schema_editor.remove_index(apps.get_model("inventory", model_name), index)
+            with connection.cursor() as cursor:
+                for table, column in REPLACED_INDEXES:
+                    cursor.execute(f'CREATE INDEX "bench_{table}_{column}" ON "{table}" ("{column}")')
+            before = self.measure(options)
+            transaction.set_rollback(True)
+
+        results = {}
+        for name in after:
+            results[name] = {"before": before[name], "after": after[name]}
+            self.stdout.write(f"{name}:")
+            for label, result in (("before", before[name]), ("after", after[name])):
+                self.stdout.write(
+                    f"  {label:<6} p50 {result['p50_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                    f"p99 {result['p99_ms']:.2f} ms, reads {', '.join(result['reads'])}"
+                )
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write("\n")
+
+    def access_paths(self, rng):
+        """Name and queryset of each access path, with parameters drawn from ``rng``"""
+        today = timezone.localdate()
+        facility_id = rng.choice(self.facility_ids)
+        yield "facility stock by facility", (
+            FacilityInventory.objects.filter(facility_id=facility_id)
+            .order_by("facility_id", "inventory_item_id")[:20]
+        )
+        yield "transfers out, newest first", (
+            Transfer.objects.filter(source_id=facility_id).order_by("-transfer_date")[:20]
+        )
+        yield "transfers in, newest first", (
+            Transfer.objects.filter(destination_id=facility_id).order_by("-transfer_date")[:20]
+        )
+        yield "pending transfers to a facility", (
+            Transfer.objects.filter(destination_id=facility_id, status="STATUS_PENDING")
+            .order_by("transfer_date")
+        )
+        yield "lines of a transfer", (
+            TransferDetails.objects.filter(transfer_id=rng.choice(self.transfer_ids))
+            .order_by("id").values_list("inventory_item_id", "quantity")
+        )
+        yield "batches to pick, first expiry first", (
+            WarehouseInventory.objects.filter(
+                inventory_item_id__in=rng.sample(self.item_ids, min(10, len(self.item_ids))),
+                quantity__gt=0,
+                expiry_date__gt=today,
+            )
+            .order_by("inventory_item_id", "expiry_date", "id")
+            .values_list("id", "inventory_item_id", "batch_no", "expiry_date", "quantity")
+        )
+        if self.inbound_ids:
+            yield "lines of an inbound", (
+                InboundDetails.objects.filter(inbound_id=rng.choice(self.inbound_ids))
+                .order_by("id").values_list("warehouse_item_id", "quantity")
+            )
+
+    def measure(self, options):
+        # The same parameters for both schemas
+        rng = random.Random(options["seed"])
+        timings, reads = {}, {}
+        for _ in range(options["queries"]):
+            for name, queryset in self.access_paths(rng):
+                if name not in reads:
+                    sql, params = queryset.query.sql_with_params()
+                    reads[name] = plan_reads(explain(sql, params)["shape"])
+                    list(queryset.all())  # Warm the buffer cache once
+                started = time.perf_counter()
+                # all() clones, so every run goes to the database
+                list(queryset.all())
+                timings.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+
+        results = {}
+        for name, samples in timings.items():
+            quantiles = statistics.quantiles(samples, n=100)
+            results[name] = {
+                "p50_ms": round(quantiles[49], 3),
+                "p95_ms": round(quantiles[94], 3),
+                "p99_ms": round(quantiles[98], 3),
+                "reads": reads[name],
+            }
+        return results
+
+
+def plan_reads(shape):
+    # "Index Only Scan using x on t" -> "Index Only Scan using x"
+    reads = []
+    for line in shape:
+        node = line.strip()
+        if re.match(r"(Parallel )?(Seq|Index|Index Only|Bitmap Index) Scan", node):
+            reads.append(node.split(" on ")[0] if " using " in node else node)
+    return reads or ["no table scan"]
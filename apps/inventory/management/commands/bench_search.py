@@ -0,0 +1,74 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from apps.inventory.models import InventoryItem
+from apps.inventory.search import CatalogSearchFilter
+from apps.inventory.views import InventoryItemViewSet
+
+
+def misspell(word, rng):
+    # Drop one inner character, the commonest typo at the counter
+    if len(word) < 5:
+        return word
+    position = rng.randrange(1, len(word) - 1)
+    return word[:position] + word[position + 1:]
+
+
+class LegacySearchView:
+    # What InventoryItemViewSet searched with before CatalogSearchFilter
+    search_fields = ["generic_name", "brand_name"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time catalog searches through SearchFilter (ICONTAINS) and "
+        "CatalogSearchFilter with terms sampled from the catalog, and report "
+        "latency percentiles and how many typo searches found their item."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--searches", type=int, default=200)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        count = InventoryItem.objects.count()
+        if not count:
+            raise CommandError("The catalog is empty.")
+
+        samples = []
+        for _ in range(options["searches"]):
+            item = InventoryItem.objects.only("id", "generic_name").order_by("id")[
+                rng.randrange(count)
+            ]
+            word = max(item.generic_name.split(), key=len)
+            samples.append((item.id, word[:rng.randint(3, max(3, len(word)))], misspell(word, rng)))
+
+        backends = [
+            ("SearchFilter", SearchFilter(), LegacySearchView()),
+            ("CatalogSearchFilter", CatalogSearchFilter(), InventoryItemViewSet()),
+        ]
+        factory = RequestFactory()
+        for name, backend, view in backends:
+            timings, found = [], 0
+            for item_id, prefix, typo in samples:
+                for term, is_typo in ((prefix, False), (typo, True)):
+                    request = Request(factory.get("/", {"search": term}))
+                    started = time.perf_counter()
+                    queryset = backend.filter_queryset(request, InventoryItem.objects.all(), view)
+                    ids = list(queryset.values_list("id", flat=True)[:options["page_size"]])
+                    timings.append((time.perf_counter() - started) * 1000)
+                    if is_typo and item_id in ids:
+                        found += 1
+
+            quantiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f"{name}: {len(timings)} searches over {count} items, "
+                f"p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, "
+                f"p99 {quantiles[98]:.1f} ms, typos found {found}/{len(samples)}"
+            )
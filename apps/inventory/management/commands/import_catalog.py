@@ -0,0 +1,61 @@
+import json
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.importers import CatalogImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a supplier catalog (CSV or NDJSON) into the inventory. "
+        "Rejected rows go to <file>.rejects.ndjson and progress to "
+        "<file>.progress so an interrupted import can be resumed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"], dest="file_format")
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Skip the lines committed by a previous run of this file",
+        )
+        parser.add_argument("--rejects", help="Where to write rejected rows")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        file_format = options["file_format"] or (
+            "ndjson" if path.suffix in (".ndjson", ".jsonl") else "csv"
+        )
+        progress_path = path.with_name(path.name + ".progress")
+        rejects_path = Path(options["rejects"] or path.with_name(path.name + ".rejects.ndjson"))
+
+        start_after = 0
+        if options["resume"] and progress_path.exists():
+            start_after = int(progress_path.read_text().strip() or 0)
+            self.stdout.write(f"Resuming after line {start_after}")
+
+        def save_progress(line_no):
+            progress_path.write_text(str(line_no))
+
+        started = time.perf_counter()
+        with open(rejects_path, "a" if options["resume"] else "w") as rejects, \
+                open(path, newline="", encoding="utf-8-sig") as stream:
+            importer = CatalogImporter(
+                chunk_size=options["chunk_size"],
+                start_after=start_after,
+                on_reject=lambda reject: rejects.write(json.dumps(reject) + "\n"),
+                on_commit=save_progress,
+            )
+            summary = importer.run(stream, file_format)
+        elapsed = time.perf_counter() - started
+
+        progress_path.unlink(missing_ok=True)
+        self.stdout.write(
+            f"Read {summary['read']} rows in {elapsed:.1f}s: {summary['inserted']} inserted, "
+            f"{summary['existing']} already in the catalog, {summary['rejected']} rejected"
+        )
+        if summary["rejected"]:
+            self.stdout.write(f"Rejected rows written to {rejects_path}")
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from apps.inventory.models import StockSummary
+from apps.inventory.services import stock_summary_from_source
+
+FIELDS = ["warehouse_on_hand", "facility_on_hand", "in_transit", "earliest_expiry"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate the stock summary from the warehouse, facility inventory "
+        "and transfer tables, reporting every figure that had drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report drift, do not rewrite the summary",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if connection.vendor == "postgresql" and not options["check"]:
+                # Hold off stock movements while the summary is rebuilt
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"LOCK TABLE {StockSummary._meta.db_table} IN EXCLUSIVE MODE"
+                    )
+            actual = stock_summary_from_source()
+            stored = {
+                row["inventory_item_id"]: row
+                for row in StockSummary.objects.values("inventory_item_id", *FIELDS)
+            }
+
+            drifted = 0
+            empty = dict.fromkeys(FIELDS[:3], 0) | {"earliest_expiry": None}
+            for inventory_item_id in sorted(set(actual) | set(stored)):
+                expected = actual.get(inventory_item_id, empty)
+                current = stored.get(inventory_item_id, empty)
+                differences = [
+                    f"{field} {current[field]} -> {expected[field]}"
+                    for field in FIELDS if current[field] != expected[field]
+                ]
+                if differences:
+                    drifted += 1
+                    self.stdout.write(f"Item {inventory_item_id}: {', '.join(differences)}")
+
+            if not options["check"]:
+                StockSummary.objects.all().delete()
+                StockSummary.objects.bulk_create(
+                    [
+                        StockSummary(inventory_item_id=inventory_item_id, **figures)
+                        for inventory_item_id, figures in actual.items()
+                    ],
+                    batch_size=1000,
+                )
+
+        verb = "found" if options["check"] else "corrected"
+        self.stdout.write(f"{len(actual)} items summarised, {drifted} with drift {verb}.")
@@ -0,0 +1,91 @@
+import random
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from rest_framework.serializers import ValidationError
+from apps.facilities.models import Facility
+from apps.inventory.models import InventoryItem, FacilityInventory
+from apps.inventory.services import transfer_stock
+
+DEADLOCK_SQLSTATE = "40P01"
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire opposing facility-to-facility transfers from parallel threads "
+        "and report throughput and deadlocks. Writes to the configured "
+        "database, so point it at a disposable PostgreSQL instance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--transfers", type=int, default=50, help="Transfers per thread")
+        parser.add_argument("--items", type=int, default=20, help="Catalog items to move")
+        parser.add_argument("--lines", type=int, default=10, help="Lines per transfer")
+        parser.add_argument("--stock", type=int, default=1_000_000, help="Opening stock per row")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Row locking is only meaningful on PostgreSQL.")
+
+        facilities = list(Facility.objects.order_by("id")[:2])
+        if len(facilities) < 2:
+            raise CommandError("At least two facilities are required.")
+        inventory_items = list(InventoryItem.objects.order_by("id")[:options["items"]])
+        if len(inventory_items) < options["lines"]:
+            raise CommandError(f"At least {options['lines']} inventory items are required.")
+
+        for facility in facilities:
+            for inventory_item in inventory_items:
+                FacilityInventory.objects.update_or_create(
+                    facility=facility,
+                    inventory_item=inventory_item,
+                    defaults={"quantity": options["stock"]},
+                )
+
+        counts = {"completed": 0, "deadlocks": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(number):
+            # Even threads push A -> B, odd threads push B -> A
+            source, destination = facilities if number % 2 == 0 else facilities[::-1]
+            rng = random.Random(number)
+            try:
+                for _ in range(options["transfers"]):
+                    lines = rng.sample(inventory_items, options["lines"])
+                    items = [
+                        {"product_id": item.product_id, "quantity": rng.randint(1, 5)}
+                        for item in lines
+                    ]
+                    try:
+                        transfer_stock(source, destination, items)
+                        outcome = "completed"
+                    except OperationalError as e:
+                        sqlstate = getattr(e.__cause__, "sqlstate", None) or getattr(e.__cause__, "pgcode", None)
+                        outcome = "deadlocks" if sqlstate == DEADLOCK_SQLSTATE else "errors"
+                    except ValidationError:
+                        outcome = "rejected"
+                    except Exception:
+                        outcome = "errors"
+                    with lock:
+                        counts[outcome] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{options['threads']} threads, {sum(counts.values())} transfers in {elapsed:.2f}s "
+            f"({counts['completed'] / elapsed:.1f} transfers/s)"
+        )
+        for outcome, count in counts.items():
+            self.stdout.write(f"  {outcome}: {count}")
+        if counts["deadlocks"]:
+            raise CommandError(f"{counts['deadlocks']} deadlocks detected")
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_inbounddetails_product_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransferBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_no', models.CharField(max_length=20)),
+                ('expiry_date', models.DateField()),
+                ('quantity', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'transfer_batches',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='inventoryitem',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='slug',
+            field=models.CharField(blank=True, max_length=300, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='inbound',
+            name='inbound_date',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='brand_name',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='product_id',
+            field=models.CharField(blank=True, max_length=5, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='transfer',
+            name='status',
+            field=models.CharField(choices=[('STATUS_PENDING', 'Pending'), ('STATUS_IN_PROGRESS', 'In Progress'), ('STATUS_COMPLETED', 'Completed')], default='STATUS_PENDING'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.CheckConstraint(condition=models.Q(('cost_price_pack__gt', 0)), name='cost_price_gt_0'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.CheckConstraint(condition=models.Q(('selling_price_pack__gte', models.F('cost_price_pack'))), name='selling_price_gte_cost_price'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryitem',
+            constraint=models.UniqueConstraint(fields=('generic_name', 'brand_name', 'strength', 'product_form'), name='unique_inventory_item'),
+        ),
+        migrations.AddField(
+            model_name='transferbatch',
+            name='inventory_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.inventoryitem'),
+        ),
+        migrations.AddField(
+            model_name='transferbatch',
+            name='transfer_id',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='inventory.transfer'),
+        ),
+        migrations.AddField(
+            model_name='transferbatch',
+            name='warehouse_item',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.warehouseinventory'),
+        ),
+    ]
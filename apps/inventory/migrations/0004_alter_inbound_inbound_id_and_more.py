@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_transferbatch_alter_inventoryitem_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inbound',
+            name='inbound_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='inbounddetails',
+            name='product_id',
+            field=models.CharField(editable=False, max_length=12),
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='product_id',
+            field=models.CharField(blank=True, max_length=12, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='transfer',
+            name='transfer_id',
+            field=models.CharField(editable=False, max_length=12, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='warehouseinventory',
+            name='product_id',
+            field=models.CharField(editable=False, max_length=12),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min, Q, Sum
+
+
+def populate_stock_summary(apps, schema_editor):
+    WarehouseInventory = apps.get_model("inventory", "WarehouseInventory")
+    FacilityInventory = apps.get_model("inventory", "FacilityInventory")
+    TransferDetails = apps.get_model("inventory", "TransferDetails")
+    StockSummary = apps.get_model("inventory", "StockSummary")
+
+    summary = {}
+
+    def row_for(inventory_item_id):
+        return summary.setdefault(inventory_item_id, StockSummary(inventory_item_id=inventory_item_id))
+
+    for row in WarehouseInventory.objects.values("inventory_item_id").annotate(
+        total=Sum("quantity"), earliest=Min("expiry_date", filter=Q(quantity__gt=0))
+    ):
+        row_for(row["inventory_item_id"]).warehouse_on_hand = row["total"]
+        row_for(row["inventory_item_id"]).earliest_expiry = row["earliest"]
+    for row in FacilityInventory.objects.values("inventory_item_id").annotate(total=Sum("quantity")):
+        row_for(row["inventory_item_id"]).facility_on_hand = row["total"]
+    for row in TransferDetails.objects.exclude(
+        transfer_id__status="STATUS_COMPLETED"
+    ).values("inventory_item_id").annotate(total=Sum("quantity")):
+        row_for(row["inventory_item_id"]).in_transit = row["total"]
+
+    StockSummary.objects.bulk_create(summary.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_alter_inbound_inbound_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSummary',
+            fields=[
+                ('inventory_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stock_summary', serialize=False, to='inventory.inventoryitem')),
+                ('warehouse_on_hand', models.BigIntegerField(default=0)),
+                ('facility_on_hand', models.BigIntegerField(default=0)),
+                ('in_transit', models.BigIntegerField(default=0)),
+                ('earliest_expiry', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'stock_summary',
+            },
+        ),
+        migrations.RunPython(populate_stock_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Kept out of the model's Meta so SQLite databases, which cannot build GIN
+# indexes, can still be created and migrated
+SEARCH_INDEXES = [
+    GinIndex(
+        SearchVector("generic_name", "brand_name", weight="A", config="simple")
+        + SearchVector("strength", "product_form", weight="B", config="simple"),
+        name="inv_item_search_idx",
+    ),
+    GinIndex(OpClass("generic_name", name="gin_trgm_ops"), name="inv_item_generic_trgm_idx"),
+    GinIndex(OpClass("brand_name", name="gin_trgm_ops"), name="inv_item_brand_trgm_idx"),
+]
+
+
+def add_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    for index in SEARCH_INDEXES:
+        schema_editor.add_index(InventoryItem, index, concurrently=True)
+
+
+def remove_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    for index in SEARCH_INDEXES:
+        schema_editor.remove_index(InventoryItem, index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so the catalog stays writable
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0005_stocksummary'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def format_product_name(item):
+    # Frozen copy of models.format_product_name
+    parts = [item.generic_name]
+    if item.brand_name:
+        parts.append(f"({item.brand_name})")
+    parts.append(item.strength)
+    parts.append(item.product_form.title())
+    parts.append(f"x{item.pack_size}")
+    return " ".join(parts)
+
+
+def populate_product_name(apps, schema_editor):
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    batch = []
+    for item in InventoryItem.objects.only(
+        "id", "generic_name", "brand_name", "strength", "product_form", "pack_size"
+    ).order_by("id").iterator(chunk_size=BATCH_SIZE):
+        item.product_name = format_product_name(item)
+        batch.append(item)
+        if len(batch) >= BATCH_SIZE:
+            InventoryItem.objects.bulk_update(batch, ["product_name"])
+            batch = []
+    if batch:
+        InventoryItem.objects.bulk_update(batch, ["product_name"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_catalog_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='product_name',
+            field=models.CharField(default='', editable=False, max_length=900),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_product_name, migrations.RunPython.noop),
+        # Indexed once filled so the backfill does not maintain the index
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='product_name',
+            field=models.CharField(db_index=True, editable=False, max_length=900),
+        ),
+    ]
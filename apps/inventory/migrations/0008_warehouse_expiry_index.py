@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_inventoryitem_product_name'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='warehouseinventory',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['expiry_date', 'inventory_item'], name='warehouse_expiry_item_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# (model, index) pairs, built before the single-column foreign key indexes
+# they replace are dropped
+INDEXES = [
+    ('inbounddetails', models.Index(fields=['inbound_id', 'id'], include=('warehouse_item', 'quantity'), name='inbound_details_inbound_idx')),
+    ('transfer', models.Index(fields=['source', '-transfer_date'], name='transfers_source_date_idx')),
+    ('transfer', models.Index(fields=['destination', '-transfer_date'], name='transfers_destination_date_idx')),
+    ('transfer', models.Index(condition=models.Q(('status', 'STATUS_PENDING')), fields=['destination', 'transfer_date'], name='transfers_pending_idx')),
+    ('transferdetails', models.Index(fields=['transfer_id', 'id'], include=('inventory_item', 'quantity'), name='transfer_details_transfer_idx')),
+    ('warehouseinventory', models.Index(condition=models.Q(('quantity__gt', 0)), fields=['inventory_item', 'expiry_date', 'id'], name='warehouse_fefo_idx')),
+]
+
+
+def add_indexes(apps, schema_editor):
+    # Built concurrently on PostgreSQL so stock keeps moving meanwhile
+    options = {"concurrently": True} if schema_editor.connection.vendor == "postgresql" else {}
+    for model_name, index in INDEXES:
+        schema_editor.add_index(apps.get_model('inventory', model_name), index, **options)
+
+
+def remove_indexes(apps, schema_editor):
+    options = {"concurrently": True} if schema_editor.connection.vendor == "postgresql" else {}
+    for model_name, index in INDEXES:
+        schema_editor.remove_index(apps.get_model('inventory', model_name), index, **options)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('facilities', '0007_alter_facility_date_added_alter_facility_modified_at'),
+        ('inventory', '0008_warehouse_expiry_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_indexes, remove_indexes),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='facilityinventory',
+            name='facility',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='facilities.facility'),
+        ),
+        migrations.AlterField(
+            model_name='inbounddetails',
+            name='inbound_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='inventory.inbound'),
+        ),
+        migrations.AlterField(
+            model_name='transfer',
+            name='destination',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transfers_destination', to='facilities.facility'),
+        ),
+        migrations.AlterField(
+            model_name='transfer',
+            name='source',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transfers_source', to='facilities.facility'),
+        ),
+        migrations.AlterField(
+            model_name='transferdetails',
+            name='transfer_id',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='details', to='inventory.transfer'),
+        ),
+        migrations.AlterField(
+            model_name='warehouseinventory',
+            name='inventory_item',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='inventory.inventoryitem'),
+        ),
+    ]
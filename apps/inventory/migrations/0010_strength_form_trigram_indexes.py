@@ -0,0 +1,37 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db import migrations
+
+# Like 0006, kept out of the model's Meta for SQLite
+TRIGRAM_INDEXES = [
+    GinIndex(OpClass("strength", name="gin_trgm_ops"), name="inv_item_strength_trgm_idx"),
+    GinIndex(OpClass("product_form", name="gin_trgm_ops"), name="inv_item_form_trgm_idx"),
+]
+
+
+def add_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    for index in TRIGRAM_INDEXES:
+        schema_editor.add_index(InventoryItem, index, concurrently=True)
+
+
+def remove_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    InventoryItem = apps.get_model("inventory", "InventoryItem")
+    for index in TRIGRAM_INDEXES:
+        schema_editor.remove_index(InventoryItem, index, concurrently=True)
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so the catalog stays writable
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0009_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_trigram_indexes, remove_trigram_indexes),
+    ]
@@ -5,13 +5,27 @@ from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from rest_framework.serializers import ValidationError
 from ..facilities.models import Facility
+from ..core.ids import next_id
+
+# Fields product_name is built from
+PRODUCT_NAME_FIELDS = ["generic_name", "brand_name", "strength", "product_form", "pack_size"]
+
+
+def format_product_name(generic_name, brand_name, strength, product_form, pack_size):
+    parts = [generic_name]
+    if brand_name:
+        parts.append(f"({brand_name})")
+    parts.append(strength)
+    parts.append(product_form.title())
+    parts.append(f"x{pack_size}")
+    return " ".join(parts)
 
 
 class InventoryItem(models.Model):
     """
     List of items in the company inventory
     """
-    product_id = models.CharField(max_length=5, unique=True, null=True, blank=True)
+    product_id = models.CharField(max_length=12, unique=True, null=True, blank=True)
     generic_name = models.CharField(max_length=255)
     brand_name = models.CharField(max_length=255, null=True, blank=True)
     strength = models.CharField(max_length=255, null=False, blank=False)
@@ -19,6 +33,8 @@ class InventoryItem(models.Model):
     cost_price_pack = models.DecimalField(max_digits=7, decimal_places=2, blank=False)
     selling_price_pack = models.DecimalField(max_digits=7, decimal_places=2, blank=False)
     pack_size = models.PositiveIntegerField(blank=False)
+    # Kept in step with the fields above by save(); bulk writes must set it
+    product_name = models.CharField(max_length=900, editable=False, db_index=True)
     slug = models.CharField(max_length=300, unique=True, null=True, blank=True)
 
     class Meta:
@@ -27,7 +43,7 @@ class InventoryItem(models.Model):
                 condition=models.Q(cost_price_pack__gt=0), name="cost_price_gt_0"
             ),
             models.CheckConstraint(
-                condition=models.Q(selling_price__gte=models.F("cost_price_pack")),
+                condition=models.Q(selling_price_pack__gte=models.F("cost_price_pack")),
                 name="selling_price_gte_cost_price",
             ),
             models.UniqueConstraint(
@@ -38,16 +54,8 @@ class InventoryItem(models.Model):
     def __str__(self):
         return self.product_name
 
-    # Try using GeneratedField
-    @property
-    def product_name(self):
-        parts = [self.generic_name]
-        if self.brand_name:
-            parts.append(f"({self.brand_name})")
-        parts.append(self.strength)
-        parts.append(self.product_form.title())
-        parts.append(f"x{self.pack_size}")
-        return " ".join(parts)
+    def build_product_name(self):
+        return format_product_name(*(getattr(self, field) for field in PRODUCT_NAME_FIELDS))
 
     @property
     def uint_selling_price(self):
@@ -56,13 +64,11 @@ class InventoryItem(models.Model):
     def save(self, *args, **kwargs):
         # Read on SKUs to generate a more meaningful product ID
         if not self.product_id:
-            last_product_id = InventoryItem.objects.aggregate(
-                models.Max("product_id"))["product_id__max"]
-            if not last_product_id:
-                new_id = 1
-            else:
-                new_id = int(last_product_id) + 1
-            self.product_id = f"{new_id:05}"
+            self.product_id = next_id("product_id")
+        self.product_name = self.build_product_name()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(PRODUCT_NAME_FIELDS):
+            kwargs["update_fields"] = {*update_fields, "product_name"}
         super().save(*args, **kwargs)
 
 
@@ -73,7 +79,9 @@ class FacilityInventory(models.Model):
     """
     Inventory of items in a facility
     """
-    facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
+    # Lookups by facility use the unique (facility, inventory_item) index.
+    # quantity is left out of every index so stock updates stay HOT.
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE, db_index=False)
     inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=0)
 
@@ -86,8 +94,11 @@ class WarehouseInventory(models.Model):
     """
     Inventory of items in the warehouse
     """
-    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, null=False, blank=False)
-    product_id = models.CharField(max_length=5, editable=False, null=False, blank=False)
+    # Lookups by item use the unique (inventory_item, batch_no) index
+    inventory_item = models.ForeignKey(
+        InventoryItem, on_delete=models.CASCADE, null=False, blank=False, db_index=False
+    )
+    product_id = models.CharField(max_length=12, editable=False, null=False, blank=False)
     batch_no = models.CharField(max_length=20, null=False, blank=False)
     expiry_date = models.DateField(null=False, blank=False)
     quantity = models.PositiveIntegerField(default=0)
@@ -95,6 +106,24 @@ class WarehouseInventory(models.Model):
     class Meta:
         db_table = "warehouse"
         unique_together = ["inventory_item", "batch_no"]
+        indexes = [
+            # Expiry reports range-scan batches that still hold stock
+            models.Index(
+                fields=["expiry_date", "inventory_item"],
+                condition=models.Q(quantity__gt=0),
+                name="warehouse_expiry_item_idx",
+            ),
+            # First-expiry-first-out picking reads an item's stocked batches
+            # in expiry order. It locks them, so it reads the heap anyway and
+            # nothing is covered. Both predicates name quantity, which keeps
+            # batch updates from being HOT: accepted, since batches change
+            # only on inbound and supply and drained ones leave both indexes.
+            models.Index(
+                fields=["inventory_item", "expiry_date", "id"],
+                condition=models.Q(quantity__gt=0),
+                name="warehouse_fefo_idx",
+            ),
+        ]
 
     # Ensure batch number always have the same expiry date
     # Make this a signal
@@ -124,6 +153,32 @@ class WarehouseInventory(models.Model):
         )
 
 
+class StockSummary(models.Model):
+    """
+    Network-wide stock of each item, updated in the same transaction as
+    every stock movement
+    """
+    inventory_item = models.OneToOneField(
+        InventoryItem, on_delete=models.CASCADE, primary_key=True, related_name="stock_summary"
+    )
+    warehouse_on_hand = models.BigIntegerField(default=0)
+    facility_on_hand = models.BigIntegerField(default=0)
+    # Quantity on transfers that are not completed yet. Stock is booked to
+    # the destination when a transfer is made, so this is already part of
+    # facility_on_hand.
+    in_transit = models.BigIntegerField(default=0)
+    earliest_expiry = models.DateField(null=True, blank=True)
+
+    class Meta:
+        db_table = "stock_summary"
+
+    def __str__(self):
+        return (
+            f"{self.inventory_item_id}, Warehouse: {self.warehouse_on_hand}, "
+            f"Facilities: {self.facility_on_hand}, In transit: {self.in_transit}"
+        )
+
+
 class Transfer(models.Model):
     """
     Record of Inventory transfer between facilities
@@ -138,32 +193,43 @@ class Transfer(models.Model):
         ("STATUS_COMPLETED", "Completed"),
     ]
 
-    transfer_id = models.CharField(max_length=5, primary_key=True, editable=False)
+    transfer_id = models.CharField(max_length=12, primary_key=True, editable=False)
+    # Indexed with transfer_date in Meta.indexes
     source = models.ForeignKey(
-        "facilities.Facility", on_delete=models.CASCADE, related_name="transfers_source"
+        "facilities.Facility", on_delete=models.CASCADE, related_name="transfers_source",
+        db_index=False,
     )
     destination = models.ForeignKey(
         "facilities.Facility",
         on_delete=models.CASCADE,
         related_name="transfers_destination",
+        db_index=False,
     )
     transfer_date = models.DateTimeField(default=timezone.now)
     status = models.CharField(default="STATUS_PENDING", choices=STATUS_CHOICES)
 
     class Meta:
         db_table = "transfers"
+        indexes = [
+            # A facility's transfers out and in, newest first
+            models.Index(fields=["source", "-transfer_date"], name="transfers_source_date_idx"),
+            models.Index(
+                fields=["destination", "-transfer_date"], name="transfers_destination_date_idx"
+            ),
+            # Each facility's queue of transfers still to be received
+            models.Index(
+                fields=["destination", "transfer_date"],
+                condition=models.Q(status="STATUS_PENDING"),
+                name="transfers_pending_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"ID: {self.transfer_id}, From: {self.source.name}, Date: {self.transfer_date.date()}"
 
     def save(self, *args, **kwargs):
         if not self.transfer_id:
-            last_transfer = Transfer.objects.order_by("-transfer_id").first()
-            if last_transfer:
-                new_id = int(last_transfer.transfer_id) + 1
-            else:
-                new_id = 1
-            self.transfer_id = f"{new_id:05}"
+            self.transfer_id = next_id("transfer_id")
         super().save(*args, **kwargs)
 
 
@@ -172,20 +238,47 @@ class TransferDetails(models.Model):
     Details of inventory transfer between facilities
     """
     transfer_id = models.ForeignKey(
-        Transfer, on_delete=models.CASCADE, related_name="details"
+        Transfer, on_delete=models.CASCADE, related_name="details", db_index=False
     )
     inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
     quantity = models.IntegerField(null=False, blank=False)
 
     class Meta:
         db_table = "transfer_details"
+        indexes = [
+            # Lines of a transfer in export order. Rows are never updated,
+            # so item and quantity are carried in the index for index-only
+            # scans.
+            models.Index(
+                fields=["transfer_id", "id"],
+                include=["inventory_item", "quantity"],
+                name="transfer_details_transfer_idx",
+            ),
+        ]
+
+
+class TransferBatch(models.Model):
+    """
+    Warehouse batches picked to fill a transfer
+    """
+    transfer_id = models.ForeignKey(
+        Transfer, on_delete=models.CASCADE, related_name="batches"
+    )
+    warehouse_item = models.ForeignKey(WarehouseInventory, on_delete=models.CASCADE)
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    batch_no = models.CharField(max_length=20)
+    expiry_date = models.DateField()
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = "transfer_batches"
 
 
 class Inbound(models.Model):
     """
     Record of products received from suppliers
     """
-    inbound_id = models.CharField(max_length=5, primary_key=True)
+    inbound_id = models.CharField(max_length=12, primary_key=True)
     supplier = models.CharField(max_length=255)
     invoice_no = models.CharField(max_length=20)
     invoice_date = models.DateField()
@@ -196,12 +289,7 @@ class Inbound(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.inbound_id:
-            last_inbound = Inbound.objects.order_by("-inbound_id").first()
-            if last_inbound:
-                new_id = int(last_inbound.inbound_id) + 1
-            else:
-                new_id =  1
-            self.inbound_id = f"{new_id:05}"
+            self.inbound_id = next_id("inbound_id")
         super().save(*args, **kwargs)
 
 
@@ -209,8 +297,8 @@ class InboundDetails(models.Model):
     """
     Details of products received from suppliers
     """
-    inbound_id = models.ForeignKey(Inbound, on_delete=models.CASCADE)
-    product_id = models.CharField(max_length=5, editable=False)
+    inbound_id = models.ForeignKey(Inbound, on_delete=models.CASCADE, db_index=False)
+    product_id = models.CharField(max_length=12, editable=False)
     warehouse_item = models.ForeignKey(WarehouseInventory, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
 
@@ -220,3 +308,11 @@ class InboundDetails(models.Model):
         
     class Meta:
         db_table = "warehouse_inbound_details"
+        indexes = [
+            # Lines of an inbound in export order, like transfer_details
+            models.Index(
+                fields=["inbound_id", "id"],
+                include=["warehouse_item", "quantity"],
+                name="inbound_details_inbound_idx",
+            ),
+        ]
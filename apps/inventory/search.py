@@ -0,0 +1,89 @@
+import re
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramWordSimilarity,
+)
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+# Text search configuration without stemming; product names are not prose
+SEARCH_CONFIG = "simple"
+
+SEARCH_FIELDS = ["generic_name", "brand_name", "strength", "product_form"]
+
+# Columns matched with trigrams so misspelt names still find the product,
+# each with its own trigram index (migrations 0006 and 0010)
+TRIGRAM_FIELDS = ["generic_name", "brand_name", "strength", "product_form"]
+
+
+def catalog_search_vector():
+    """
+    Weighted search document of an InventoryItem. Migration 0006 builds the
+    catalog's GIN index on this exact expression, so queries must use it
+    unchanged to be answered from it.
+    """
+    return (
+        SearchVector("generic_name", "brand_name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("strength", "product_form", weight="B", config=SEARCH_CONFIG)
+    )
+
+
+def search_terms(value):
+    return re.findall(r"\w+", value.lower())
+
+
+class CatalogSearchFilter(BaseFilterBackend):
+    """
+    Product search for the catalog.
+
+    On PostgreSQL a term matches an item whose name words start with it
+    (full-text prefix query) or that is close to it by trigram word
+    similarity, both answered from GIN indexes, and results are ranked.
+    Other databases fall back to case-insensitive containment of every
+    term, like SearchFilter.
+    """
+    search_param = api_settings.SEARCH_PARAM
+    # Searching orders by rank, which keyset pagination would override
+    ordering_param = search_param
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, "")
+        terms = search_terms(value)
+        if not terms:
+            return queryset
+        if connection.vendor == "postgresql":
+            return self.rank(queryset, " ".join(terms), terms)
+        for term in terms:
+            queryset = queryset.filter(
+                Q(*[Q(**{f"{field}__icontains": term}) for field in SEARCH_FIELDS], _connector=Q.OR)
+            )
+        return queryset
+
+    def rank(self, queryset, text, terms):
+        query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms), search_type="raw", config=SEARCH_CONFIG
+        )
+        similar = Q(*[
+            Q(**{f"{field}__trigram_word_similar": text}) for field in TRIGRAM_FIELDS
+        ], _connector=Q.OR)
+        return queryset.alias(document=catalog_search_vector()).filter(
+            Q(document=query) | similar
+        ).annotate(
+            search_rank=SearchRank(F("document"), query) + Greatest(*[
+                TrigramWordSimilarity(text, field) for field in TRIGRAM_FIELDS
+            ])
+        ).order_by("-search_rank", "id")
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            "name": self.search_param,
+            "required": False,
+            "in": "query",
+            "description": "Product name, brand, strength or form; tolerates typos",
+            "schema": {"type": "string"},
+        }]
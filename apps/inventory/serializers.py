@@ -5,6 +5,7 @@ from .models import (
     TransferDetails,
     Transfer,
     WarehouseInventory,
+    StockSummary,
     Inbound,
     InboundDetails
 )
@@ -18,7 +19,7 @@ class InventoryItemSerializer(serializers.ModelSerializer):
         fields = ["product_id", "product_name", "cost_price_pack", "selling_price_pack"]
 
 
-class WarehouseInventorySerializer:
+class WarehouseInventorySerializer(serializers.ModelSerializer):
     inventory_item = InventoryItemSerializer()
 
     class Meta:
@@ -32,6 +33,22 @@ class FacilityInventorySerializer(serializers.ModelSerializer):
         fields = ["facility", "inventory_item", "quantity"]
 
 
+class StockSummarySerializer(serializers.ModelSerializer):
+    product_id = serializers.CharField(source="inventory_item.product_id", read_only=True)
+    product_name = serializers.CharField(source="inventory_item.product_name", read_only=True)
+
+    class Meta:
+        model = StockSummary
+        fields = [
+            "product_id",
+            "product_name",
+            "warehouse_on_hand",
+            "facility_on_hand",
+            "in_transit",
+            "earliest_expiry",
+        ]
+
+
 class TransferSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transfer
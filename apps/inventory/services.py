@@ -0,0 +1,551 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import (
+    Case, F, Min, OuterRef, PositiveIntegerField, Q, Subquery, Sum, Value, When
+)
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.serializers import ValidationError
+from ..core.db import upsert_increment
+from ..reports.services import record_inbound, record_transfer
+from .catalog import catalog
+from .versions import invalidate_facility_inventory
+from .models import (
+    FacilityInventory,
+    WarehouseInventory,
+    StockSummary,
+    Transfer,
+    TransferDetails,
+    TransferBatch,
+    Inbound,
+    InboundDetails,
+)
+
+STATUS_COMPLETED = "STATUS_COMPLETED"
+
+
+def _raise_line_errors(errors):
+    if any(errors):
+        raise ValidationError({"items": errors})
+
+
+def _clean_lines(items, required, max_lengths=None):
+    """
+    Check every line for the ``required`` keys, values no longer than
+    ``max_lengths`` ({key: characters}) and a positive integer quantity.
+    Returns the line errors, one dict per line.
+    """
+    errors = []
+    for item in items:
+        line_errors = {}
+        if not isinstance(item, dict):
+            errors.append({"non_field_errors": ["Each item must be an object."]})
+            continue
+        for key in required:
+            if item.get(key) in (None, ""):
+                line_errors[key] = ["This field is required."]
+        for key, max_length in (max_lengths or {}).items():
+            if key not in line_errors and len(str(item.get(key, ""))) > max_length:
+                line_errors[key] = [f"Ensure this field has no more than {max_length} characters."]
+        if "quantity" not in line_errors:
+            try:
+                quantity = int(item["quantity"])
+            except (TypeError, ValueError):
+                quantity = 0
+            if quantity <= 0:
+                line_errors["quantity"] = ["Quantity must be a positive integer."]
+        errors.append(line_errors)
+    return errors
+
+
+def _resolve_items(items, errors):
+    """
+    Map every requested product_id to its catalog entry, querying only for
+    the ones the catalog cache does not hold, and record unknown products
+    against their lines.
+    """
+    product_ids = {
+        item["product_id"] for item, line_errors in zip(items, errors)
+        if not line_errors
+    }
+    inventory_items = catalog.get_many(product_ids, fresh=True)
+    for item, line_errors in zip(items, errors):
+        if not line_errors and item["product_id"] not in inventory_items:
+            line_errors["product_id"] = [f"Product '{item['product_id']}' does not exist."]
+    return inventory_items
+
+
+def _requested_quantities(items, inventory_items):
+    """
+    Sum the requested quantity per InventoryItem id, keeping the line
+    indexes that asked for it so errors land on the right lines.
+    """
+    requested = {}
+    for index, item in enumerate(items):
+        inventory_item = inventory_items[item["product_id"]]
+        quantity, indexes = requested.get(inventory_item.id, (0, []))
+        requested[inventory_item.id] = (quantity + int(item["quantity"]), indexes + [index])
+    return requested
+
+
+def _subtract(model, amounts):
+    """
+    Subtract ``amounts`` ({pk: quantity}) from the rows' quantity in a
+    single UPDATE statement.
+    """
+    if not amounts:
+        return 0
+    return model.objects.filter(pk__in=amounts).update(
+        quantity=F("quantity") - Case(
+            *[When(pk=pk, then=Value(quantity)) for pk, quantity in amounts.items()],
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+def _add_to_facility(facility, amounts):
+    """
+    Add ``amounts`` ({inventory_item_id: quantity}) to a facility's stock,
+    creating missing FacilityInventory rows in the same statement.
+    """
+    upsert_increment(
+        FacilityInventory,
+        conflict_fields=["facility_id", "inventory_item_id"],
+        rows=[
+            {"facility_id": facility.id, "inventory_item_id": inventory_item_id, "quantity": quantity}
+            for inventory_item_id, quantity in amounts.items()
+        ],
+        increment_fields=["quantity"],
+    )
+
+
+class _Shortfall(Exception):
+    pass
+
+
+def deduct_facility_stock(facility, requested, errors):
+    """
+    Take ``requested`` ({inventory_item_id: (quantity, [line indexes])})
+    from a facility's stock with one conditional UPDATE. Rows are locked in
+    item order first, so concurrent baskets queue instead of deadlocking.
+    If any row cannot cover its quantity, nothing is taken and a
+    ValidationError is always raised: the shortfalls against their lines,
+    read from the rows locked again, or a request to retry when the stock
+    changed in between and would now cover the basket.
+    """
+    needed = Case(
+        *[When(inventory_item_id=inventory_item_id, then=Value(quantity))
+          for inventory_item_id, (quantity, _) in requested.items()],
+        output_field=PositiveIntegerField(),
+    )
+    locked = FacilityInventory.objects.select_for_update().filter(
+        facility=facility, inventory_item_id__in=requested
+    ).order_by("inventory_item_id")
+    try:
+        with transaction.atomic():
+            taken = FacilityInventory.objects.filter(
+                pk__in=Subquery(locked.values("pk")), quantity__gte=needed
+            ).update(quantity=F("quantity") - needed)
+            if taken != len(requested):
+                # Undo the rows that could be taken before reading stock
+                raise _Shortfall
+        return
+    except _Shortfall:
+        pass
+
+    # Rolling back the savepoint released its locks; the caller's
+    # transaction holds these until it ends
+    available = dict(locked.values_list("inventory_item_id", "quantity"))
+    for inventory_item_id, (quantity, indexes) in requested.items():
+        stock = available.get(inventory_item_id, 0)
+        if stock < quantity:
+            for index in indexes:
+                errors[index]["quantity"] = [f"Insufficient stock. {stock} packs available."]
+    _raise_line_errors(errors)
+    raise ValidationError("Stock changed while the request was processed, please retry.")
+
+
+def record_stock_movement(warehouse=None, facility=None, in_transit=None):
+    """
+    Apply stock deltas ({inventory_item_id: quantity}) to StockSummary in
+    one upsert. Call it inside the transaction that moves the stock.
+    """
+    deltas = {
+        "warehouse_on_hand": warehouse or {},
+        "facility_on_hand": facility or {},
+        "in_transit": in_transit or {},
+    }
+    inventory_item_ids = set().union(*deltas.values())
+    upsert_increment(
+        StockSummary,
+        conflict_fields=["inventory_item_id"],
+        rows=[
+            {
+                "inventory_item_id": inventory_item_id,
+                **{column: amounts.get(inventory_item_id, 0) for column, amounts in deltas.items()},
+            }
+            for inventory_item_id in inventory_item_ids
+        ],
+        increment_fields=list(deltas),
+    )
+
+
+def refresh_earliest_expiry(inventory_item_ids):
+    """
+    Recompute StockSummary.earliest_expiry of the given items from their
+    warehouse batches in one UPDATE.
+    """
+    StockSummary.objects.filter(inventory_item_id__in=inventory_item_ids).update(
+        earliest_expiry=Subquery(
+            WarehouseInventory.objects.filter(
+                inventory_item_id=OuterRef("inventory_item_id"), quantity__gt=0
+            ).order_by("expiry_date").values("expiry_date")[:1]
+        )
+    )
+
+
+def transfer_status_changed(transfer, old_status):
+    """
+    Keep the in-transit quantity in step when a transfer is completed or
+    reopened.
+    """
+    if (old_status == STATUS_COMPLETED) == (transfer.status == STATUS_COMPLETED):
+        return
+    _record_in_transit(transfer, -1 if transfer.status == STATUS_COMPLETED else 1)
+
+
+def transfer_deleted(transfer):
+    """
+    Take a transfer that never arrived out of the in-transit quantity.
+    Call it before the transfer and its lines are deleted.
+    """
+    if transfer.status != STATUS_COMPLETED:
+        _record_in_transit(transfer, -1)
+
+
+def _record_in_transit(transfer, sign):
+    quantities = TransferDetails.objects.filter(transfer_id=transfer).values(
+        "inventory_item_id"
+    ).annotate(total=Sum("quantity"))
+    record_stock_movement(in_transit={
+        row["inventory_item_id"]: sign * row["total"] for row in quantities
+    })
+
+
+def stock_summary_from_source():
+    """
+    Recompute every item's StockSummary figures from the warehouse,
+    facility inventory and transfer tables.
+    """
+    summary = defaultdict(lambda: {
+        "warehouse_on_hand": 0,
+        "facility_on_hand": 0,
+        "in_transit": 0,
+        "earliest_expiry": None,
+    })
+    warehouse = WarehouseInventory.objects.values("inventory_item_id").annotate(
+        total=Sum("quantity"),
+        earliest=Min("expiry_date", filter=Q(quantity__gt=0)),
+    )
+    for row in warehouse:
+        summary[row["inventory_item_id"]]["warehouse_on_hand"] = row["total"]
+        summary[row["inventory_item_id"]]["earliest_expiry"] = row["earliest"]
+    facilities = FacilityInventory.objects.values("inventory_item_id").annotate(
+        total=Sum("quantity")
+    )
+    for row in facilities:
+        summary[row["inventory_item_id"]]["facility_on_hand"] = row["total"]
+    in_transit = TransferDetails.objects.exclude(
+        transfer_id__status=STATUS_COMPLETED
+    ).values("inventory_item_id").annotate(total=Sum("quantity"))
+    for row in in_transit:
+        summary[row["inventory_item_id"]]["in_transit"] = row["total"]
+    return dict(summary)
+
+
+def allocate_fefo(requested, errors):
+    """
+    Lock the unexpired warehouse batches of every requested item in one
+    ordered SELECT ... FOR UPDATE and fill each quantity from the batches
+    that expire first. Must run inside a transaction.
+
+    Returns a list of (batch, quantity) picks. Items without enough stock
+    are recorded against their lines in ``errors``.
+    """
+    batches = (
+        WarehouseInventory.objects.select_for_update()
+        .filter(
+            inventory_item_id__in=requested,
+            quantity__gt=0,
+            expiry_date__gt=timezone.localdate(),
+        )
+        .order_by("inventory_item_id", "expiry_date", "id")
+        .only("id", "inventory_item_id", "batch_no", "expiry_date", "quantity")
+    )
+    batches_by_item = {}
+    for batch in batches:
+        batches_by_item.setdefault(batch.inventory_item_id, []).append(batch)
+
+    picks = []
+    for inventory_item_id, (quantity, indexes) in requested.items():
+        candidates = batches_by_item.get(inventory_item_id, [])
+        available = sum(batch.quantity for batch in candidates)
+        if available < quantity:
+            for index in indexes:
+                errors[index]["quantity"] = [
+                    f"Insufficient stock. {available} packs available."
+                ]
+            continue
+        remaining = quantity
+        for batch in candidates:
+            if not remaining:
+                break
+            picked = min(remaining, batch.quantity)
+            picks.append((batch, picked))
+            remaining -= picked
+    return picks
+
+
+def supply_facility(source, destination, items):
+    """
+    Supply a facility from the warehouse, filling every line first-expiry
+    first-out across batches. Runs a fixed number of queries however many
+    lines the order has.
+    """
+    errors = _clean_lines(items, ("product_id", "quantity"))
+    inventory_items = _resolve_items(items, errors)
+    _raise_line_errors(errors)
+    requested = _requested_quantities(items, inventory_items)
+
+    with transaction.atomic():
+        picks = allocate_fefo(requested, errors)
+        _raise_line_errors(errors)
+
+        _subtract(WarehouseInventory, {batch.id: quantity for batch, quantity in picks})
+        supplied = {
+            inventory_item_id: quantity for inventory_item_id, (quantity, _) in requested.items()
+        }
+        _add_to_facility(destination, supplied)
+        invalidate_facility_inventory(destination.id)
+        record_stock_movement(
+            warehouse={inventory_item_id: -quantity for inventory_item_id, quantity in supplied.items()},
+            facility=supplied,
+            in_transit=supplied,
+        )
+        refresh_earliest_expiry(supplied)
+
+        transfer = Transfer.objects.create(source=source, destination=destination)
+        TransferDetails.objects.bulk_create([
+            TransferDetails(
+                transfer_id=transfer,
+                inventory_item_id=inventory_item_id,
+                quantity=quantity,
+            )
+            for inventory_item_id, (quantity, _) in requested.items()
+        ])
+        TransferBatch.objects.bulk_create([
+            TransferBatch(
+                transfer_id=transfer,
+                warehouse_item_id=batch.id,
+                inventory_item_id=batch.inventory_item_id,
+                batch_no=batch.batch_no,
+                expiry_date=batch.expiry_date,
+                quantity=quantity,
+            )
+            for batch, quantity in picks
+        ])
+        record_transfer(transfer, supplied)
+    return transfer
+
+
+def transfer_stock(source, destination, items):
+    """
+    Move stock between two facilities. Every affected (facility, item) row
+    is locked in one pass in (facility, item) order, so opposing transfers
+    queue behind each other instead of deadlocking.
+    """
+    if source.id == destination.id:
+        raise ValidationError("Source and destination facilities must be different")
+
+    errors = _clean_lines(items, ("product_id", "quantity"))
+    inventory_items = _resolve_items(items, errors)
+    _raise_line_errors(errors)
+    requested = _requested_quantities(items, inventory_items)
+
+    with transaction.atomic():
+        locked = (
+            FacilityInventory.objects.select_for_update()
+            .filter(
+                facility_id__in=[source.id, destination.id],
+                inventory_item_id__in=requested,
+            )
+            .order_by("facility_id", "inventory_item_id")
+            .only("id", "facility_id", "inventory_item_id", "quantity")
+        )
+        source_rows = {
+            row.inventory_item_id: row for row in locked if row.facility_id == source.id
+        }
+
+        for inventory_item_id, (quantity, indexes) in requested.items():
+            row = source_rows.get(inventory_item_id)
+            available = row.quantity if row else 0
+            if available < quantity:
+                for index in indexes:
+                    errors[index]["quantity"] = [
+                        f"Insufficient stock. {available} packs available."
+                    ]
+        _raise_line_errors(errors)
+
+        _subtract(
+            FacilityInventory,
+            {source_rows[inventory_item_id].id: quantity
+             for inventory_item_id, (quantity, _) in requested.items()},
+        )
+        moved = {
+            inventory_item_id: quantity for inventory_item_id, (quantity, _) in requested.items()
+        }
+        _add_to_facility(destination, moved)
+        invalidate_facility_inventory(source.id, destination.id)
+        record_stock_movement(in_transit=moved)
+
+        transfer = Transfer.objects.create(source=source, destination=destination)
+        TransferDetails.objects.bulk_create([
+            TransferDetails(
+                transfer_id=transfer,
+                inventory_item_id=inventory_item_id,
+                quantity=quantity,
+            )
+            for inventory_item_id, (quantity, _) in requested.items()
+        ])
+        record_transfer(transfer, moved)
+    return transfer
+
+
+def _clean_invoice(supplier, invoice_no, invoice_date):
+    """Check the invoice header against the Inbound columns, returning its date"""
+    errors = {}
+    for name, value in (("supplier", supplier), ("invoice_no", invoice_no)):
+        max_length = Inbound._meta.get_field(name).max_length
+        if len(str(value)) > max_length:
+            errors[name] = [f"Ensure this field has no more than {max_length} characters."]
+    try:
+        parsed = parse_date(str(invoice_date))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        errors["invoice_date"] = ["Enter a valid date in the format YYYY-MM-DD."]
+    if errors:
+        raise ValidationError(errors)
+    return parsed
+
+
+def receive_inbound(supplier, invoice_no, invoice_date, items):
+    """
+    Record a supplier invoice and add every line to its warehouse batch.
+    Runs a fixed number of queries however many lines the invoice has.
+    """
+    invoice_date = _clean_invoice(supplier, invoice_no, invoice_date)
+    errors = _clean_lines(
+        items,
+        ("product_id", "batch_no", "expiry_date", "quantity"),
+        max_lengths={"batch_no": WarehouseInventory._meta.get_field("batch_no").max_length},
+    )
+    for item, line_errors in zip(items, errors):
+        if line_errors:
+            continue
+        try:
+            expiry_date = parse_date(str(item["expiry_date"]))
+        except ValueError:
+            expiry_date = None
+        if expiry_date is None:
+            line_errors["expiry_date"] = ["Enter a valid date in the format YYYY-MM-DD."]
+
+    inventory_items = _resolve_items(items, errors)
+    _raise_line_errors(errors)
+
+    lines = []
+    batches = {}
+    for index, item in enumerate(items):
+        inventory_item = inventory_items[item["product_id"]]
+        key = (inventory_item.id, str(item["batch_no"]))
+        line = {
+            "key": key,
+            "inventory_item": inventory_item,
+            "expiry_date": parse_date(str(item["expiry_date"])),
+            "quantity": int(item["quantity"]),
+        }
+        batch = batches.get(key)
+        if batch is None:
+            batches[key] = {
+                "inventory_item_id": inventory_item.id,
+                "product_id": inventory_item.product_id,
+                "batch_no": key[1],
+                "expiry_date": line["expiry_date"],
+                "quantity": line["quantity"],
+            }
+        elif batch["expiry_date"] != line["expiry_date"]:
+            errors[index]["expiry_date"] = [
+                f"The batch number '{key[1]}' must have the expiry date "
+                f"'{batch['expiry_date']}'"
+            ]
+        else:
+            batch["quantity"] += line["quantity"]
+        lines.append(line)
+    _raise_line_errors(errors)
+
+    with transaction.atomic():
+        inbound = Inbound.objects.create(
+            supplier=supplier,
+            invoice_no=invoice_no,
+            invoice_date=invoice_date,
+        )
+        upserted = upsert_increment(
+            WarehouseInventory,
+            conflict_fields=["inventory_item_id", "batch_no"],
+            rows=list(batches.values()),
+            increment_fields=["quantity"],
+            match_fields=["expiry_date"],
+            returning=["id", "inventory_item_id", "batch_no"],
+        )
+        warehouse_ids = {
+            (inventory_item_id, batch_no): warehouse_id
+            for warehouse_id, inventory_item_id, batch_no in upserted
+        }
+
+        if len(warehouse_ids) < len(batches):
+            # Only reached when a batch already exists with another expiry
+            conflicting = {
+                (record.inventory_item_id, record.batch_no): record.expiry_date
+                for record in WarehouseInventory.objects.filter(
+                    inventory_item_id__in={key[0] for key in batches if key not in warehouse_ids},
+                    batch_no__in={key[1] for key in batches if key not in warehouse_ids},
+                )
+            }
+            for line, line_errors in zip(lines, errors):
+                if line["key"] not in warehouse_ids and line["key"] in conflicting:
+                    line_errors["expiry_date"] = [
+                        f"The batch number '{line['key'][1]}' for item "
+                        f"'{line['inventory_item'].product_id}' must have the expiry date "
+                        f"'{conflicting[line['key']]}'"
+                    ]
+            _raise_line_errors(errors)
+
+        received = defaultdict(int)
+        for batch in batches.values():
+            received[batch["inventory_item_id"]] += batch["quantity"]
+        record_stock_movement(warehouse=received)
+        refresh_earliest_expiry(received)
+
+        InboundDetails.objects.bulk_create([
+            InboundDetails(
+                inbound_id=inbound,
+                product_id=line["inventory_item"].product_id,
+                warehouse_item_id=warehouse_ids[line["key"]],
+                quantity=line["quantity"],
+            )
+            for line in lines
+        ])
+        record_inbound(inbound, received, {
+            entry.id: entry.cost_price_pack for entry in inventory_items.values()
+        })
+    return inbound
@@ -1,3 +1,923 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import shutil
+import tempfile
+import threading
+import uuid
+from decimal import Decimal
+from unittest import mock, skipIf, skipUnless
+from asgiref.sync import sync_to_async
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from rest_framework.serializers import ValidationError
+from rest_framework.test import APIClient
+from apps.core.instrumentation import QueryBudgetExceeded
+from apps.core.testing import QueryBudgetMixin
+from apps.facilities.models import Facility
+from apps.users.models import User
+from .catalog import CatalogCache
+from .checks import check_shared_cache
+from .expiry import ExpiryReport, parse_horizons
+from .exports import export_response, stream_rows
+from .importers import CatalogImporter
+from .models import (
+    FacilityInventory,
+    Inbound,
+    InventoryItem,
+    StockSummary,
+    Transfer,
+    TransferBatch,
+    TransferDetails,
+    WarehouseInventory,
+)
+from .services import stock_summary_from_source, transfer_stock
+from .views import (
+    FacilityInventoryViewSet,
+    InboundViewSet,
+    TransferViewSet,
+    WarehouseInventoryViewSet,
+)
 
-# Create your tests here.
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        self.item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+        self.catalog = CatalogCache(check_interval=0)
+
+    def rename(self, name):
+        # Without signals, so the version does not move
+        InventoryItem.objects.filter(pk=self.item.pk).update(product_name=name)
+
+    def lookup(self):
+        return self.catalog.get_many([self.item.product_id])[self.item.product_id].product_name
+
+    def test_reads_through_without_a_shared_cache(self):
+        self.catalog.warm()
+        self.rename("Renamed")
+        self.assertEqual(self.lookup(), "Renamed")
+
+    def test_keeps_entries_with_a_shared_cache(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        with self.settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": location,
+        }}):
+            self.catalog.warm()
+            name = self.item.product_name
+            self.rename("Renamed")
+            self.assertEqual(self.lookup(), name)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.item.save()
+            self.assertEqual(self.lookup(), self.item.product_name)
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ["inventory.W001"])
+        with self.settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://localhost:6379/0",
+        }}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class FacilityInventoryETagTests(TestCase):
+    def setUp(self):
+        self.facility = Facility.objects.create(
+            name="Adum", city="Kumasi", region="Ashanti", country="Ghana"
+        )
+        self.admin = User.objects.create(
+            email="admin@example.com", name="Admin", is_admin=True, facility=self.facility
+        )
+        item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+        self.stock = FacilityInventory.objects.create(
+            facility=self.facility, inventory_item=item, quantity=5
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def poll(self, etag=None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.client.get("/inventory/facility-inventory/", headers=headers)
+
+    def test_no_etag_without_a_shared_cache(self):
+        response = self.poll()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_etag_follows_stock_writes(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.enterContext(self.settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": location,
+        }}))
+        etag = self.poll()["ETag"]
+        self.assertEqual(self.poll(etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stock.quantity = 4
+            self.stock.save()
+        self.assertEqual(self.poll(etag).status_code, 200)
+
+
+class StockSummaryTests(TestCase):
+    """Manual edits keep StockSummary equal to the stock tables"""
+
+    def setUp(self):
+        self.warehouse = Facility.objects.create(
+            name="Central", city="Accra", region="Greater Accra", country="Ghana"
+        )
+        self.facility = Facility.objects.create(
+            name="Adum", city="Kumasi", region="Ashanti", country="Ghana"
+        )
+        self.superuser = User.objects.create(
+            email="super@example.com", name="Super", is_superuser=True, facility=self.warehouse
+        )
+        self.item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+        today = datetime.date.today()
+        self.early, self.late = [
+            WarehouseInventory.objects.create(
+                inventory_item=self.item, batch_no=batch_no, quantity=10,
+                expiry_date=today + datetime.timedelta(days=days),
+            )
+            for batch_no, days in (("EARLY", 30), ("LATE", 300))
+        ]
+        self.transfer = Transfer.objects.create(source=self.warehouse, destination=self.facility)
+        TransferDetails.objects.create(transfer_id=self.transfer, inventory_item=self.item, quantity=4)
+        call_command("rebuild_stock_summary", verbosity=0)
+        self.warehouse_user = User.objects.create(
+            email="warehouse@example.com", name="Warehouse", is_warehouse=True,
+            facility=self.warehouse,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.superuser)
+
+    def assertSummaryMatchesStock(self):
+        summary = StockSummary.objects.get(inventory_item=self.item)
+        source = stock_summary_from_source()[self.item.id]
+        self.assertEqual(
+            {field: getattr(summary, field) for field in source}, source
+        )
+
+    def test_warehouse_batch_update(self):
+        self.client.force_authenticate(self.warehouse_user)
+        response = self.client.patch(
+            f"/inventory/warehouse/{self.early.pk}/", {"quantity": 3}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertSummaryMatchesStock()
+
+    def test_warehouse_batch_delete(self):
+        self.client.force_authenticate(self.warehouse_user)
+        response = self.client.delete(f"/inventory/warehouse/{self.early.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertSummaryMatchesStock()
+        self.assertEqual(
+            StockSummary.objects.get(inventory_item=self.item).earliest_expiry,
+            self.late.expiry_date,
+        )
+
+    def test_pending_transfer_delete(self):
+        response = self.client.delete(f"/inventory/transfer/{self.transfer.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertSummaryMatchesStock()
+        self.assertEqual(StockSummary.objects.get(inventory_item=self.item).in_transit, 0)
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Every declared query budget holds for a multi-line request"""
+
+    def setUp(self):
+        super().setUp()
+        self.warehouse = Facility.objects.create(
+            name="Central", city="Accra", region="Greater Accra", country="Ghana"
+        )
+        self.facility, self.other = [
+            Facility.objects.create(name=name, city=city, region="Ashanti", country="Ghana")
+            for name, city in (("Adum", "Kumasi"), ("Bantama", "Kumasi"))
+        ]
+        self.superuser = User.objects.create(
+            email="super@example.com", name="Super", is_superuser=True, facility=self.warehouse
+        )
+        self.warehouse_user = User.objects.create(
+            email="warehouse@example.com", name="Warehouse", is_warehouse=True,
+            facility=self.warehouse,
+        )
+        self.admin = User.objects.create(
+            email="admin@example.com", name="Admin", is_admin=True, facility=self.facility
+        )
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name=f"Brand {n}", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(3)
+        ]
+        self.today = datetime.date.today()
+        for item in self.items:
+            for batch_no, days in (("EARLY", 30), ("LATE", 300)):
+                WarehouseInventory.objects.create(
+                    inventory_item=item, batch_no=batch_no, quantity=10,
+                    expiry_date=self.today + datetime.timedelta(days=days),
+                )
+            FacilityInventory.objects.create(facility=self.facility, inventory_item=item, quantity=10)
+        call_command("rebuild_stock_summary", verbosity=0)
+
+    def lines(self, **fields):
+        return [{"product_id": item.product_id, **fields} for item in self.items]
+
+    def test_warehouse_list(self):
+        response = self.client_for(self.warehouse_user).get("/inventory/warehouse/")
+        self.assertWithinBudget(response, WarehouseInventoryViewSet, "list")
+
+    def test_warehouse_inbound(self):
+        # New batches and top-ups of existing ones
+        new, early = [
+            (self.today + datetime.timedelta(days=days)).isoformat() for days in (400, 30)
+        ]
+        response = self.client_for(self.warehouse_user).post("/inventory/warehouse/inbound/", {
+            "supplier": "Ernest Chemists", "invoice_no": "INV-1", "invoice_date": "2026-01-05",
+            "items": self.lines(batch_no="NEW", expiry_date=new, quantity=5)
+                + self.lines(batch_no="EARLY", expiry_date=early, quantity=5),
+        }, format="json", HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()))
+        self.assertWithinBudget(response, WarehouseInventoryViewSet, "inbound")
+
+    def test_warehouse_supply(self):
+        # Every line spans both batches
+        response = self.client_for(self.warehouse_user).post("/inventory/warehouse/supply/", {
+            "facility": self.other.id, "items": self.lines(quantity=15),
+        }, format="json", HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()))
+        self.assertWithinBudget(response, WarehouseInventoryViewSet, "supply")
+
+    def test_facility_list(self):
+        response = self.client_for(self.admin).get("/inventory/facility-inventory/")
+        self.assertWithinBudget(response, FacilityInventoryViewSet, "list")
+
+    def test_facility_transfer(self):
+        manager = User.objects.create(
+            email="manager@example.com", name="Manager", is_superuser=True, facility=self.facility
+        )
+        response = self.client_for(manager).post("/inventory/facility-inventory/transfer/", {
+            "facility": self.other.id, "items": self.lines(quantity=4),
+        }, format="json", HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()))
+        self.assertWithinBudget(response, FacilityInventoryViewSet, "transfer")
+
+    def transfer(self):
+        transfer = Transfer.objects.create(source=self.warehouse, destination=self.facility)
+        TransferDetails.objects.bulk_create([
+            TransferDetails(transfer_id=transfer, inventory_item=item, quantity=2)
+            for item in self.items
+        ])
+        return transfer
+
+    def test_transfer_retrieve(self):
+        transfer = self.transfer()
+        response = self.client_for(self.superuser).get(f"/inventory/transfer/{transfer.pk}/")
+        self.assertWithinBudget(response, TransferViewSet, "retrieve")
+        self.assertEqual(len(response.data), 3)
+
+    def test_inbound_retrieve(self):
+        self.test_warehouse_inbound()
+        inbound = Inbound.objects.get()
+        response = self.client_for(self.superuser).get(f"/inventory/inbound/{inbound.pk}/")
+        self.assertWithinBudget(response, InboundViewSet, "retrieve")
+        self.assertEqual(len(response.data), 6)
+
+    def test_exceeded_budget_fails(self):
+        transfer = self.transfer()
+        client = self.client_for(self.superuser)
+        with self.settings(SQL_QUERY_BUDGETS={"TransferViewSet.retrieve": 2}):
+            with self.assertRaises(QueryBudgetExceeded):
+                client.get(f"/inventory/transfer/{transfer.pk}/")
+
+
+class CatalogImportTests(TestCase):
+    CSV = (
+        "generic_name,brand_name,strength,product_form,cost_price_pack,selling_price_pack,pack_size\n"
+        "Paracetamol,Panadol,500mg,tablet,10.00,12.00,10\n"
+        "Paracetamol,,500mg,tablet,8.00,9.00,10\n"
+        "Amoxicillin,Amoxil,250mg,capsule,20.00,15.00,21\n"
+        "Ibuprofen,Brufen,400mg,tablet,5.00,6.00,ten\n"
+        "Paracetamol,Panadol,500mg,tablet,10.00,12.00,10\n"
+        "Metformin,,500mg,tablet,6.00,7.50,28\n"
+        "Cetirizine,Zyrtec,10mg,tablet,4.00,5.00,10\n"
+    )
+
+    def run_import(self, **options):
+        rejects = []
+        importer = CatalogImporter(on_reject=rejects.append, **options)
+        summary = importer.run(io.StringIO(self.CSV), "csv")
+        return summary, rejects
+
+    def test_rejects_are_reported_by_line(self):
+        summary, rejects = self.run_import()
+        self.assertEqual(
+            summary, {"read": 7, "inserted": 4, "existing": 0, "rejected": 3}
+        )
+        errors = {reject["line"]: reject["errors"] for reject in rejects}
+        self.assertEqual(errors[4], {
+            "selling_price_pack": ["Selling price cannot be less than cost price."]
+        })
+        self.assertEqual(list(errors[5]), ["pack_size"])
+        self.assertEqual(errors[6], {"non_field_errors": ["Duplicate of line 2."]})
+        self.assertEqual(rejects[0]["row"]["generic_name"], "Amoxicillin")
+
+    def test_resume_after_an_interruption(self):
+        committed = []
+
+        def interrupt(line_no):
+            committed.append(line_no)
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.run_import(chunk_size=2, on_commit=interrupt)
+        self.assertEqual(committed, [3])
+        self.assertEqual(InventoryItem.objects.count(), 2)
+
+        summary, rejects = self.run_import(chunk_size=2, start_after=committed[0])
+        # Line 6 repeats line 2, committed before the resume, so it is found
+        # in the catalog rather than rejected
+        self.assertEqual(
+            summary, {"read": 5, "inserted": 2, "existing": 1, "rejected": 2}
+        )
+        self.assertEqual([reject["line"] for reject in rejects], [4, 5])
+        self.assertEqual(InventoryItem.objects.count(), 4)
+
+    def test_reimport_creates_no_duplicates(self):
+        self.run_import()
+        summary, _ = self.run_import()
+        self.assertEqual(
+            summary, {"read": 7, "inserted": 0, "existing": 4, "rejected": 3}
+        )
+        # Including the items without a brand
+        self.assertEqual(InventoryItem.objects.filter(brand_name=None).count(), 2)
+
+
+class InboundTests(TestCase):
+    def setUp(self):
+        self.warehouse = Facility.objects.create(
+            name="Central", city="Accra", region="Greater Accra", country="Ghana"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            email="warehouse@example.com", name="Warehouse", is_warehouse=True,
+            facility=self.warehouse,
+        ))
+        self.item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+        self.batch = WarehouseInventory.objects.create(
+            inventory_item=self.item, batch_no="B1", quantity=10,
+            expiry_date=datetime.date(2030, 1, 1),
+        )
+
+    def inbound(self, items, invoice_date="2026-01-05", invoice_no="INV-1"):
+        return self.client.post("/inventory/warehouse/inbound/", {
+            "supplier": "Ernest Chemists", "invoice_no": invoice_no,
+            "invoice_date": invoice_date, "items": items,
+        }, format="json")
+
+    def line(self, **fields):
+        return {
+            "product_id": self.item.product_id, "batch_no": "B2",
+            "expiry_date": "2031-01-01", "quantity": 5, **fields,
+        }
+
+    def assertNothingReceived(self):
+        self.assertFalse(Inbound.objects.exists())
+        self.assertEqual(list(WarehouseInventory.objects.values_list("quantity", flat=True)), [10])
+
+    def test_receives_new_and_existing_batches(self):
+        response = self.inbound([self.line(), self.line(batch_no="B1", expiry_date="2030-01-01")])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            dict(WarehouseInventory.objects.values_list("batch_no", "quantity")), {"B1": 15, "B2": 5}
+        )
+
+    def test_errors_are_reported_per_line(self):
+        response = self.inbound([
+            self.line(),
+            self.line(batch_no="B" * 21),
+            self.line(expiry_date="2031-02-30"),
+            self.line(quantity=0),
+            self.line(product_id="99999"),
+            {"product_id": self.item.product_id},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.data["items"]
+        self.assertEqual(errors[0], {})
+        self.assertEqual(
+            errors[1], {"batch_no": ["Ensure this field has no more than 20 characters."]}
+        )
+        self.assertEqual(list(errors[2]), ["expiry_date"])
+        self.assertEqual(list(errors[3]), ["quantity"])
+        self.assertEqual(errors[4], {"product_id": ["Product '99999' does not exist."]})
+        self.assertEqual(set(errors[5]), {"batch_no", "expiry_date", "quantity"})
+        self.assertNothingReceived()
+
+    def test_invalid_invoice(self):
+        response = self.inbound([self.line()], invoice_date="2026-13-01", invoice_no="N" * 21)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {"invoice_date", "invoice_no"})
+        self.assertNothingReceived()
+
+    def test_expiry_must_match_the_existing_batch(self):
+        response = self.inbound([self.line(), self.line(batch_no="B1", expiry_date="2030-06-01")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["items"][0], {})
+        self.assertEqual(response.data["items"][1], {"expiry_date": [
+            f"The batch number 'B1' for item '{self.item.product_id}' must have the expiry "
+            f"date '2030-01-01'"
+        ]})
+        self.assertNothingReceived()
+
+    def test_expiry_must_match_within_the_invoice(self):
+        response = self.inbound([self.line(), self.line(expiry_date="2031-06-01")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data["items"][1]), ["expiry_date"])
+        self.assertNothingReceived()
+
+
+class SupplyTests(TestCase):
+    """Supplying a facility from the warehouse, first expiry first out"""
+
+    def setUp(self):
+        self.warehouse, self.facility = [
+            Facility.objects.create(name=name, city="Accra", region="Greater Accra", country="Ghana")
+            for name in ("Central", "Adum")
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            email="warehouse@example.com", name="Warehouse", is_warehouse=True,
+            facility=self.warehouse,
+        ))
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name="Brand", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(2)
+        ]
+        today = datetime.date.today()
+        # Created out of expiry order
+        for item, batch_no, days, quantity in (
+            (self.items[0], "LATE", 300, 10),
+            (self.items[0], "EXPIRED", -1, 50),
+            (self.items[0], "EARLY", 30, 10),
+            (self.items[0], "MID", 90, 10),
+            (self.items[1], "ONLY", 60, 5),
+        ):
+            WarehouseInventory.objects.create(
+                inventory_item=item, batch_no=batch_no, quantity=quantity,
+                expiry_date=today + datetime.timedelta(days=days),
+            )
+        call_command("rebuild_stock_summary", verbosity=0)
+
+    def supply(self, *quantities):
+        return self.client.post("/inventory/warehouse/supply/", {
+            "facility": self.facility.id,
+            "items": [
+                {"product_id": item.product_id, "quantity": quantity}
+                for item, quantity in quantities
+            ],
+        }, format="json")
+
+    def batches(self):
+        return dict(WarehouseInventory.objects.values_list("batch_no", "quantity"))
+
+    def test_picks_the_earliest_expiry_first(self):
+        response = self.supply((self.items[0], 25))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.batches(), {"EARLY": 0, "MID": 0, "LATE": 5, "EXPIRED": 50, "ONLY": 5}
+        )
+        self.assertEqual(
+            list(TransferBatch.objects.order_by("expiry_date").values_list("batch_no", "quantity")),
+            [("EARLY", 10), ("MID", 10), ("LATE", 5)],
+        )
+        self.assertEqual(
+            FacilityInventory.objects.get(facility=self.facility, inventory_item=self.items[0]).quantity,
+            25,
+        )
+        self.assertEqual(
+            list(TransferDetails.objects.values_list("inventory_item", "quantity")),
+            [(self.items[0].id, 25)],
+        )
+
+    def test_expired_batches_are_not_supplied(self):
+        response = self.supply((self.items[0], 31))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["items"][0], {"quantity": ["Insufficient stock. 30 packs available."]}
+        )
+
+    def test_shortfall_is_reported_per_line_and_nothing_moves(self):
+        summary = list(StockSummary.objects.order_by("inventory_item").values())
+        response = self.supply((self.items[0], 5), (self.items[1], 6), (self.items[0], 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["items"], [
+            {}, {"quantity": ["Insufficient stock. 5 packs available."]}, {},
+        ])
+        self.assertEqual(
+            self.batches(), {"EARLY": 10, "MID": 10, "LATE": 10, "EXPIRED": 50, "ONLY": 5}
+        )
+        self.assertFalse(Transfer.objects.exists())
+        self.assertFalse(FacilityInventory.objects.exists())
+        self.assertEqual(list(StockSummary.objects.order_by("inventory_item").values()), summary)
+
+
+class TransferMixin:
+    def setUp(self):
+        self.source, self.destination = [
+            Facility.objects.create(name=name, city="Accra", region="Greater Accra", country="Ghana")
+            for name in ("Adum", "Bantama")
+        ]
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name="Brand", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(2)
+        ]
+        for facility in (self.source, self.destination):
+            for item in self.items:
+                FacilityInventory.objects.create(facility=facility, inventory_item=item, quantity=20)
+
+    def stock(self):
+        return {
+            (row.facility_id, row.inventory_item_id): row.quantity
+            for row in FacilityInventory.objects.all()
+        }
+
+
+class TransferTests(TransferMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            email="super@example.com", name="Super", is_superuser=True, facility=self.source,
+        ))
+
+    def transfer(self, *quantities):
+        return self.client.post("/inventory/facility-inventory/transfer/", {
+            "facility": self.destination.id,
+            "items": [
+                {"product_id": item.product_id, "quantity": quantity}
+                for item, quantity in quantities
+            ],
+        }, format="json")
+
+    def test_moves_stock_and_records_the_transfer(self):
+        response = self.transfer((self.items[0], 5), (self.items[1], 20))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock(), {
+            (self.source.id, self.items[0].id): 15,
+            (self.source.id, self.items[1].id): 0,
+            (self.destination.id, self.items[0].id): 25,
+            (self.destination.id, self.items[1].id): 40,
+        })
+        transfer = Transfer.objects.get()
+        self.assertEqual((transfer.source, transfer.destination), (self.source, self.destination))
+        self.assertEqual(
+            sorted(TransferDetails.objects.values_list("transfer_id", "inventory_item", "quantity")),
+            [(transfer.pk, self.items[0].id, 5), (transfer.pk, self.items[1].id, 20)],
+        )
+
+    def test_insufficient_stock_is_reported_per_line(self):
+        stock = self.stock()
+        response = self.transfer((self.items[0], 5), (self.items[1], 21))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["items"], [
+            {}, {"quantity": ["Insufficient stock. 20 packs available."]},
+        ])
+        self.assertEqual(self.stock(), stock)
+        self.assertFalse(Transfer.objects.exists())
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class TransferConcurrencyTests(TransferMixin, TransactionTestCase):
+    # Keeps the rows the migrations seed, such as the ID counters
+    serialized_rollback = True
+
+    def test_parallel_transfers_conserve_stock(self):
+        barrier = threading.Barrier(4)
+        outcomes, failures = [], []
+
+        def push(source, destination):
+            try:
+                barrier.wait()
+                for _ in range(5):
+                    items = [{"product_id": item.product_id, "quantity": 3} for item in self.items]
+                    try:
+                        transfer_stock(source, destination, items)
+                        outcomes.append((source.id, destination.id))
+                    except ValidationError:
+                        pass
+            except Exception as e:
+                failures.append(e)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=push, args=pair)
+            for pair in [(self.source, self.destination), (self.destination, self.source)] * 2
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+
+        stock = self.stock()
+        for item in self.items:
+            self.assertEqual(
+                stock[self.source.id, item.id] + stock[self.destination.id, item.id], 40
+            )
+        outgoing = outcomes.count((self.source.id, self.destination.id))
+        incoming = outcomes.count((self.destination.id, self.source.id))
+        self.assertEqual(
+            stock[self.source.id, self.items[0].id], 20 - 3 * outgoing + 3 * incoming
+        )
+        self.assertEqual(Transfer.objects.count(), len(outcomes))
+        self.assertEqual(TransferDetails.objects.count(), 2 * len(outcomes))
+
+
+class CatalogSearchTests(TestCase):
+    def setUp(self):
+        self.brands = {}
+        for generic_name, brand_name, strength, product_form in (
+            ("Paracetamol", "Panadol", "500mg", "tablet"),
+            ("Paracetamol", "Calpol", "120mg/5ml", "syrup"),
+            ("Amoxicillin", "Amoxil", "500mg", "capsule"),
+            ("Amoxicillin", "Amoxin", "250mg", "capsule"),
+            ("Ibuprofen", "Brufen", "400mg", "tablet"),
+        ):
+            item = InventoryItem.objects.create(
+                generic_name=generic_name, brand_name=brand_name, strength=strength,
+                product_form=product_form, cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            self.brands[item.product_id] = brand_name
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            email="super@example.com", name="Super", is_superuser=True,
+        ))
+
+    def search(self, value):
+        response = self.client.get("/inventory/inventory/", {"search": value})
+        self.assertEqual(response.status_code, 200)
+        return [self.brands[row["product_id"]] for row in response.data["results"]]
+
+    def test_every_term_must_match(self):
+        self.assertEqual(sorted(self.search("paracetamol")), ["Calpol", "Panadol"])
+        self.assertEqual(self.search("paracetamol tablet"), ["Panadol"])
+        self.assertEqual(self.search("ibuprofen syrup"), [])
+
+    def test_blank_search_lists_everything(self):
+        self.assertEqual(len(self.search(" , ")), 5)
+
+    @skipIf(connection.vendor == "postgresql", "PostgreSQL ranks full-text matches instead.")
+    def test_fallback_matches_anywhere_in_any_field(self):
+        self.assertEqual(self.search("CETAMOL 120"), ["Calpol"])
+        self.assertEqual(sorted(self.search("500MG")), ["Amoxil", "Panadol"])
+
+    @skipUnless(connection.vendor == "postgresql", "Needs full-text and trigram search.")
+    def test_matches_word_prefixes(self):
+        self.assertEqual(sorted(self.search("parac")), ["Calpol", "Panadol"])
+        self.assertEqual(sorted(self.search("amox caps 500")), ["Amoxil"])
+
+    @skipUnless(connection.vendor == "postgresql", "Needs full-text and trigram search.")
+    def test_tolerates_typos(self):
+        self.assertEqual(sorted(self.search("amoxicilin")), ["Amoxil", "Amoxin"])
+        self.assertEqual(self.search("ibuprofin"), ["Brufen"])
+        self.assertEqual(sorted(self.search("capsle")), ["Amoxil", "Amoxin"])
+
+    @skipUnless(connection.vendor == "postgresql", "Needs full-text and trigram search.")
+    def test_ranks_word_matches_above_near_spellings(self):
+        # Amoxin only matches "amoxil" by trigram similarity
+        self.assertEqual(self.search("amoxil"), ["Amoxil", "Amoxin"])
+
+
+class AsyncReadTests(QueryBudgetMixin, TestCase):
+    """The async twins answer as the viewsets they stand in for"""
+
+    def setUp(self):
+        super().setUp()
+        self.facility, self.other = [
+            Facility.objects.create(name=name, city="Kumasi", region="Ashanti", country="Ghana")
+            for name in ("Adum", "Bantama")
+        ]
+        self.superuser = User.objects.create(
+            email="super@example.com", name="Super", is_superuser=True, facility=self.facility
+        )
+        self.admin = User.objects.create(
+            email="admin@example.com", name="Admin", is_admin=True, facility=self.other
+        )
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name=f"Brand {n}", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(3)
+        ]
+        for facility in (self.facility, self.other):
+            for item in self.items:
+                FacilityInventory.objects.create(facility=facility, inventory_item=item, quantity=10)
+        transfer_stock(self.facility, self.other, [
+            {"product_id": item.product_id, "quantity": 2} for item in self.items
+        ])
+        self.transfer = Transfer.objects.get()
+
+    async def assertSameAnswer(self, user, path):
+        """GET ``path`` from both routes as ``user``, returning the async response"""
+        sync = await sync_to_async(self.client_for(user).get)(f"/inventory/{path}")
+        response = await self.async_client.get(
+            f"/async/inventory/{path}", headers=self.auth_headers(user)
+        )
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(sync.content))
+        return response
+
+    async def test_same_payloads(self):
+        for path in (
+            "inventory/", "facility-inventory/", "transfer/", f"transfer/{self.transfer.pk}/",
+        ):
+            with self.subTest(path=path):
+                response = await self.assertSameAnswer(self.superuser, path)
+                self.assertEqual(response.status_code, 200)
+
+    async def test_same_scoping_and_permissions(self):
+        for path, status in (
+            ("facility-inventory/", 200),
+            (f"transfer/{self.transfer.pk}/", 200),
+            ("inventory/", 403),
+            ("transfer/", 403),
+            ("transfer/unknown/", 404),
+        ):
+            with self.subTest(path=path):
+                response = await self.assertSameAnswer(self.admin, path)
+                self.assertEqual(response.status_code, status)
+        response = await self.async_client.get(
+            "/async/inventory/facility-inventory/", headers=self.auth_headers(self.admin)
+        )
+        self.assertEqual(
+            {row["facility"] for row in json.loads(response.content)["results"]}, {self.other.id}
+        )
+
+    async def test_anonymous_requests_are_refused(self):
+        response = await self.async_client.get("/async/inventory/facility-inventory/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+    async def test_queries_are_counted(self):
+        path = f"/async/inventory/transfer/{self.transfer.pk}/"
+        response = await self.async_client.get(path, headers=self.auth_headers(self.superuser))
+        self.assertGreater(int(response["X-SQL-Queries"]), 0)
+        self.assertWithinBudget(response, TransferViewSet, "retrieve")
+
+        with self.settings(SQL_QUERY_BUDGETS={"TransferViewSet.retrieve": 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.get(path, headers=self.auth_headers(self.superuser))
+
+
+class ExpiryReportTests(TestCase):
+    today = datetime.date(2026, 1, 1)
+
+    def setUp(self):
+        self.item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+
+    def batch(self, days, quantity=1):
+        return WarehouseInventory.objects.create(
+            inventory_item=self.item, batch_no=f"B{days}", quantity=quantity,
+            expiry_date=self.today + datetime.timedelta(days=days),
+        )
+
+    def report(self):
+        return ExpiryReport(WarehouseInventory.objects.all(), today=self.today)
+
+    def test_bucket_boundaries(self):
+        for days in (-1, 0, 1, 30, 31, 60, 61, 90, 91):
+            self.batch(days)
+        self.batch(5, quantity=0)
+        self.assertEqual(
+            [(batch.batch_no, batch.bucket) for batch in self.report().batches()],
+            [
+                ("B-1", "expired"), ("B0", "expired"), ("B1", "30"), ("B30", "30"),
+                ("B31", "60"), ("B60", "60"), ("B61", "90"), ("B90", "90"),
+            ],
+        )
+
+    def test_summary_lists_every_bucket(self):
+        self.batch(0, quantity=3)
+        self.batch(90, quantity=2)
+        self.assertEqual(self.report().summary(), [
+            {"bucket": "expired", "batches": 1, "quantity": 3, "cost_value": Decimal("30.00")},
+            {"bucket": "30", "batches": 0, "quantity": 0, "cost_value": 0},
+            {"bucket": "60", "batches": 0, "quantity": 0, "cost_value": 0},
+            {"bucket": "90", "batches": 1, "quantity": 2, "cost_value": Decimal("20.00")},
+        ])
+
+    def test_parse_horizons(self):
+        self.assertEqual(parse_horizons("7,30"), (7, 30))
+        for value in ("", "30,x", "0,30", "60,30", "30,30"):
+            with self.subTest(value=value):
+                self.assertIsNone(parse_horizons(value))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.facility, self.other = [
+            Facility.objects.create(name=name, city="Kumasi", region="Ashanti", country="Ghana")
+            for name in ("Adum", "Bantama")
+        ]
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name=f"Brand, {n}", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(2)
+        ]
+        for facility in (self.facility, self.other):
+            for quantity, item in enumerate(self.items, start=3):
+                FacilityInventory.objects.create(
+                    facility=facility, inventory_item=item, quantity=quantity
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(
+            email="admin@example.com", name="Admin", is_admin=True, facility=self.facility
+        ))
+
+    def export(self, file_format):
+        response = self.client.get(f"/inventory/facility-inventory/export/{file_format}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="facility_inventory.{file_format}"',
+        )
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, content = self.export("csv")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(content.splitlines(), [
+            "facility_id,facility__name,inventory_item__product_id,inventory_item__generic_name,"
+            "inventory_item__brand_name,inventory_item__strength,quantity",
+            f'{self.facility.id},Adum,{self.items[0].product_id},Drug 0,"Brand, 0",500mg,3',
+            f'{self.facility.id},Adum,{self.items[1].product_id},Drug 1,"Brand, 1",500mg,4',
+        ])
+
+    def test_ndjson(self):
+        response, content = self.export("ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line) for line in content.splitlines()], [
+            {
+                "facility_id": self.facility.id,
+                "facility__name": "Adum",
+                "inventory_item__product_id": item.product_id,
+                "inventory_item__generic_name": item.generic_name,
+                "inventory_item__brand_name": item.brand_name,
+                "inventory_item__strength": "500mg",
+                "quantity": quantity,
+            }
+            for quantity, item in enumerate(self.items, start=3)
+        ])
+
+    def test_rows_are_read_as_the_response_is_consumed(self):
+        with self.assertNumQueries(0):
+            response = export_response(
+                FacilityInventory.objects.order_by("id"), ["quantity"], "csv", "stock"
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(b"".join(response.streaming_content), b"quantity\r\n3\r\n4\r\n3\r\n4\r\n")
+
+    def test_first_row_is_sent_on_its_own(self):
+        rows = [{"n": n, "cost": Decimal("1.50")} for n in range(5)]
+        with mock.patch("apps.inventory.exports.CHUNK_SIZE", 2):
+            chunks = list(stream_rows(iter(rows), ["n", "cost"], "ndjson"))
+        self.assertEqual([chunk.count("\n") for chunk in chunks], [1, 2, 2])
+        self.assertEqual(json.loads(chunks[0]), {"n": 0, "cost": "1.50"})
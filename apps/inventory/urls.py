@@ -6,6 +6,7 @@ from .views import (
     TransferViewSet,
     WarehouseInventoryViewSet,
     InboundViewSet,
+    StockSummaryViewSet,
 )
 
 router = DefaultRouter()
@@ -14,6 +15,7 @@ router.register(r"facility-inventory", FacilityInventoryViewSet)
 router.register(r"transfer", TransferViewSet, basename="transfer")
 router.register(r"warehouse", WarehouseInventoryViewSet)
 router.register(r"inbound", InboundViewSet)
+router.register(r"stock-summary", StockSummaryViewSet)
 
 app_name = "inventory"
 urlpatterns = [
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ..core.versions import bump_version
+from .models import FacilityInventory
+
+# Bumped for every facility, so network-wide listings see any change
+ALL_FACILITIES = "all"
+
+
+def facility_version_key(facility_id=ALL_FACILITIES):
+    return f"inventory:facility:{facility_id}:version"
+
+
+def invalidate_facility_inventory(*facility_ids):
+    """
+    Bump the stock version of each facility, and the network-wide one, once
+    the current transaction commits. Set-based service writes bypass the
+    model signals and must call this themselves.
+    """
+    keys = [facility_version_key(facility_id) for facility_id in set(facility_ids)]
+    keys.append(facility_version_key())
+
+    def bump():
+        for key in keys:
+            bump_version(key)
+
+    transaction.on_commit(bump)
+
+
+@receiver([post_save, post_delete], sender=FacilityInventory)
+def facility_inventory_changed(sender, instance, **kwargs):
+    invalidate_facility_inventory(instance.facility_id)
@@ -1,10 +1,16 @@
+import io
+from collections import defaultdict
 from django.db import transaction
-from django.db.models import Q, F
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.serializers import ValidationError
 from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from .serializers import (
     InventoryItemSerializer,
@@ -12,6 +18,7 @@ from .serializers import (
     TransferDetailsSerializer,
     TransferSerializer,
     WarehouseInventorySerializer,
+    StockSummarySerializer,
     InboundDetailsSerializer,
     InboundSerializer
 )
@@ -21,87 +28,157 @@ from .models import (
     Transfer,
     TransferDetails,
     WarehouseInventory,
+    StockSummary,
     Inbound, InboundDetails
 )
+from .catalog import VERSION_KEY as CATALOG_VERSION_KEY
+from .expiry import BATCH_COLUMNS, HORIZONS, ExpiryReport, parse_horizons
+from .exports import ExportRenderer, export_response
+from .importers import CatalogImporter
+from .search import CatalogSearchFilter
+from .services import (
+    receive_inbound,
+    supply_facility,
+    transfer_stock,
+    transfer_status_changed,
+    record_stock_movement,
+    refresh_earliest_expiry,
+    transfer_deleted,
+)
+from .versions import facility_version_key, invalidate_facility_inventory
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.idempotency import idempotent
 from apps.users.permissions import IsSuperUser, IsWarehouse, IsAdminUser
 from apps.facilities.models import Facility
 
 
-class InventoryItemViewSet(viewsets.ModelViewSet):
+class InventoryItemViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemSerializer
     permission_classes = [IsSuperUser]
+    keyset_ordering = ("id",)
+
+    filter_backends = [DjangoFilterBackend, CatalogSearchFilter, OrderingFilter]
+    filterset_fields = ["generic_name", "brand_name", "product_name"]
+    ordering_fields = ["product_name", "product_id"]
+
+    # Rejected rows echoed back by the import endpoint
+    MAX_REPORTED_REJECTS = 1000
+
+    def get_etag_keys(self):
+        return [CATALOG_VERSION_KEY]
+
+    @action(detail=False, methods=["POST"], url_path="import", parser_classes=[MultiPartParser])
+    def import_catalog(self, request):
+        upload = request.FILES.get("file")
+        if not upload:
+            raise ValidationError("A catalog file must be uploaded as 'file'")
+        file_format = request.data.get("format") or (
+            "ndjson" if upload.name.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        if file_format not in ("csv", "ndjson"):
+            raise ValidationError("Format must be 'csv' or 'ndjson'")
+
+        rejects = []
 
-    filterset_fields = ["generic_name", "brand_name"]
-    search_fields = ["generic_name", "brand_name"]
+        def collect_reject(reject):
+            if len(rejects) < self.MAX_REPORTED_REJECTS:
+                rejects.append(reject)
+
+        importer = CatalogImporter(on_reject=collect_reject)
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        summary = importer.run(stream, file_format)
+        return Response({**summary, "rejects": rejects}, status=201)
 
 
 class WarehouseInventoryViewSet(viewsets.ModelViewSet):
-    queryset = WarehouseInventory.objects.all()
+    queryset = WarehouseInventory.objects.select_related("inventory_item")
     serializer_class = WarehouseInventorySerializer
     permission_classes = [IsWarehouse]
+    keyset_ordering = ("inventory_item_id", "batch_no")
+    # Most queries per request, whatever the number of lines
+    query_budgets = {"list": 3, "inbound": 16, "supply": 20}
 
     filterset_fields = ["inventory_item__product_name", "inventory_item__product_id"]
     search_fields = []
 
     def get_queryset(self):
         user = self.request.user
-        if user.is_superuser or user.has_perm("IsWarehouse"):
+        if user.is_superuser or user.is_warehouse:
             return self.queryset
         return WarehouseInventory.objects.none()
+
+    def get_expiry_report(self):
+        horizons = HORIZONS
+        if "horizons" in self.request.query_params:
+            horizons = parse_horizons(self.request.query_params["horizons"])
+            if horizons is None:
+                raise ValidationError("'horizons' must be increasing day counts, e.g. 30,60,90")
+        return ExpiryReport(self.get_queryset(), horizons=horizons)
+
+    # Manual corrections must reach the stock summary too
+    @transaction.atomic
+    def perform_create(self, serializer):
+        batch = serializer.save()
+        record_stock_movement(warehouse={batch.inventory_item_id: batch.quantity})
+        refresh_earliest_expiry([batch.inventory_item_id])
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_item, old_quantity = serializer.instance.inventory_item_id, serializer.instance.quantity
+        batch = serializer.save()
+        deltas = defaultdict(int)
+        deltas[old_item] -= old_quantity
+        deltas[batch.inventory_item_id] += batch.quantity
+        record_stock_movement(warehouse=deltas)
+        refresh_earliest_expiry(list(deltas))
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        record_stock_movement(warehouse={instance.inventory_item_id: -instance.quantity})
+        instance.delete()
+        refresh_earliest_expiry([instance.inventory_item_id])
+
+    @action(
+        detail=False, methods=["GET"], permission_classes=[IsAuthenticated, IsWarehouse | IsSuperUser]
+    )
+    def expiry(self, request):
+        report = self.get_expiry_report()
+        return Response({"date": report.today, "buckets": report.summary()}, status=200)
+
+    @action(
+        detail=False, methods=["GET"], url_path=r"expiry/export/(?P<file_format>csv|ndjson)",
+        permission_classes=[IsAuthenticated, IsWarehouse | IsSuperUser],
+        renderer_classes=[JSONRenderer, ExportRenderer],
+    )
+    def expiry_export(self, request, file_format=None):
+        report = self.get_expiry_report()
+        return export_response(
+            report.batches(), BATCH_COLUMNS, file_format, f"expiry_{report.today}"
+        )
     
     @action(detail=False, methods=["POST"], permission_classes=[IsWarehouse | IsSuperUser])
+    @idempotent
     def inbound(self, request):
-        # consider bulk create
         supplier = request.data.get("supplier")
         invoice_no = request.data.get("invoice_no")
         invoice_date = request.data.get("invoice_date")
         items = request.data.get("items")
 
-        if not any([supplier, invoice_no, invoice_date]):
+        if not all([supplier, invoice_no, invoice_date]):
             raise ValidationError(
                 "'Supplier', 'Invoice Number' and 'Invoice Date' are required")
 
         if not items or not isinstance(items, list):
             raise ValidationError("A valid list of inventory items must be provided")
-        
-        with transaction.atomic():
-            inbound = Inbound.objects.create(
-                supplier = supplier,
-                invoice_no = invoice_no,
-                invoice_date = invoice_date
-            )
-            for item in items:
-                product_id = item.get("product_id")
-                batch_no = item.get("batch_no")
-                expiry_date = item.get("expiry_date")
-                quantity = int(item.get("quantity"))
-
-                if not all([product_id, batch_no, expiry_date, quantity]):
-                    raise ValidationError(
-                        "Each item must have a 'product id', 'batch no', 'expiry date' and 'quantity'."
-                    )
-                
-                inventory_item = get_object_or_404(InventoryItem, product_id=product_id)
-
-                warehouse_item, created = WarehouseInventory.objects.get_or_create(
-                    inventory_item = inventory_item,
-                    batch_no = batch_no,
-                    expiry_date = expiry_date
-                )
-                warehouse_item.quantity = F("quantity") + quantity
-                warehouse_item.save()
-
-                InboundDetails.objects.create(
-                    inbound_id = inbound,
-                    warehouse_item = warehouse_item,
-                    quantity = quantity
-                )
+
+        receive_inbound(supplier, invoice_no, invoice_date, items)
         return Response("Inbound successful.", status=201)
 
     # IDEA
     # Consider adding batch_no so facilities can track expiries
     @action(detail=False, methods=["POST"], permission_classes=[IsWarehouse | IsSuperUser])
+    @idempotent
     def supply(self, request):
         destination_id = request.data.get("facility")
         items = request.data.get("items")
@@ -111,56 +188,20 @@ class WarehouseInventoryViewSet(viewsets.ModelViewSet):
         if not items or not isinstance(items, list):
             raise ValidationError("A valid list of inventory items must be provided")
 
-        with transaction.atomic():
-            transfer = Transfer.objects.create(
-                source=request.user.facility, destination=destination
-            )
-            for item in items:
-                product_id = item.get("product_id")
-                quantity = int(item.get("quantity"))
-
-                if product_id is None or quantity is None:
-                    raise ValidationError(
-                        "Each item must have a 'product_id' and 'quantity'."
-                    )
-
-                inventory_item = get_object_or_404(InventoryItem, product_id = product_id)
-
-                warehouse_item = get_object_or_404(
-                    WarehouseInventory, inventory_item=inventory_item.id,
-                )
-
-                if warehouse_item.quantity < quantity:
-                    raise ValidationError(
-                        f"Insufficient stock. {warehouse_item.quantity} packs available."
-                    )
-
-                facility_item, created = FacilityInventory.objects.get_or_create(
-                    facility = destination,
-                    inventory_item = inventory_item.id,
-                )
-                # use F() to avoid race conditions
-                facility_item.quantity = F("quantity") + quantity
-                warehouse_item.quantity = F("quantity") - quantity
-                facility_item.save()
-                warehouse_item.save()
-
-                TransferDetails.objects.create(
-                    transfer_id = transfer,
-                    inventory_item = inventory_item,
-                    quantity = quantity
-                )
+        supply_facility(request.user.facility, destination, items)
 
         return Response("Transfer successful", status=200)
 
 
-class FacilityInventoryViewSet(viewsets.ModelViewSet):
+class FacilityInventoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = FacilityInventory.objects.select_related("inventory_item", "facility")
     serializer_class = FacilityInventorySerializer
     permission_classes = [IsAuthenticated]
+    keyset_ordering = ("facility_id", "inventory_item_id")
+    query_budgets = {"list": 3, "transfer": 18}
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "export"]:
             permission_classes = [IsAuthenticated]
         else:
             permission_classes = [IsSuperUser]
@@ -173,9 +214,55 @@ class FacilityInventoryViewSet(viewsets.ModelViewSet):
         return FacilityInventory.objects.filter(
             Q(facility=user.facility)
         )
+
+    def get_etag_keys(self):
+        user = self.request.user
+        if user.is_superuser:
+            return [facility_version_key()]
+        return [facility_version_key(user.facility_id)]
+
+    @action(
+        detail=False, methods=["GET"], url_path=r"export/(?P<file_format>csv|ndjson)",
+        renderer_classes=[JSONRenderer, ExportRenderer],
+    )
+    def export(self, request, file_format=None):
+        queryset = self.get_queryset().order_by("facility_id", "inventory_item_id")
+        columns = [
+            "facility_id",
+            "facility__name",
+            "inventory_item__product_id",
+            "inventory_item__generic_name",
+            "inventory_item__brand_name",
+            "inventory_item__strength",
+            "quantity",
+        ]
+        return export_response(queryset, columns, file_format, "facility_inventory")
+
+    # Manual corrections by superusers must reach the stock summary too
+    @transaction.atomic
+    def perform_create(self, serializer):
+        facility_item = serializer.save()
+        record_stock_movement(facility={facility_item.inventory_item_id: facility_item.quantity})
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_item, old_quantity = serializer.instance.inventory_item_id, serializer.instance.quantity
+        # The save signal only knows the facility the row ends up in
+        invalidate_facility_inventory(serializer.instance.facility_id)
+        facility_item = serializer.save()
+        deltas = defaultdict(int)
+        deltas[old_item] -= old_quantity
+        deltas[facility_item.inventory_item_id] += facility_item.quantity
+        record_stock_movement(facility=deltas)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        record_stock_movement(facility={instance.inventory_item_id: -instance.quantity})
+        instance.delete()
     # add a view to allow stock transfer between facilities
     
     @action(detail=False, methods=["POST"], permission_classes=[IsAdminUser|IsSuperUser])
+    @idempotent
     def transfer(self, request):
         destination_id = request.data.get("facility")
         items = request.data.get("items")
@@ -185,45 +272,8 @@ class FacilityInventoryViewSet(viewsets.ModelViewSet):
         if not items or not isinstance(items, list):
             raise ValidationError("A valid list of inventory items must be provided")
         
-        with transaction.atomic():
-            transfer = Transfer.objects.create(
-                source=request.user.facility, destination=destination
-            )
-            for item in items:
-                product_id = item.get("product_id")
-                quantity = int(item.get("quantity"))
-
-                if product_id is None or quantity is None:
-                    raise ValidationError(
-                        "Each item must have a 'product_id' and 'quantity'."
-                    )
-
-                inventory_item = get_object_or_404(InventoryItem, product_id = product_id)
-
-                facility_item = get_object_or_404(
-                    FacilityInventory, facility=request.user.facility, inventory_item=inventory_item.id
-                )
-
-                if facility_item.quantity < quantity:
-                    raise ValidationError(
-                        f"Insufficient stock. {facility_item.quantity} packs available."
-                    )
-
-                destination_item, created = FacilityInventory.objects.get_or_create(
-                    facility = destination,
-                    inventory_item = inventory_item.id
-                )
-                destination_item.quantity = F("quantity") + quantity
-                facility_item.quantity = F("quantity") - quantity
-                destination_item.save()
-                facility_item.save()
-
-                TransferDetails.objects.create(
-                    transfer_id = transfer,
-                    inventory_item = inventory_item,
-                    quantity = quantity
-                )
-        
+        transfer_stock(request.user.facility, destination, items)
+
         return Response("Transfer successful", status=200)
 
 
@@ -231,6 +281,8 @@ class TransferViewSet(viewsets.ModelViewSet):
     queryset = Transfer.objects.all()
     serializer_class = TransferSerializer
     permission_classes = [IsSuperUser]
+    keyset_ordering = ("transfer_id",)
+    query_budgets = {"retrieve": 3}
 
     def get_queryset(self):
         user = self.request.user
@@ -245,13 +297,47 @@ class TransferViewSet(viewsets.ModelViewSet):
             return super().get_permissions()
         if self.action == "partial_update":
             permission_classes = [IsAdminUser]
-        elif self.action == "retrieve":
+        elif self.action in ["retrieve", "export"]:
             permission_classes = [IsAuthenticated | IsAdminUser]
+        else:
+            return super().get_permissions()
         return [permission() for permission in permission_classes]
 
+    @action(
+        detail=False, methods=["GET"], url_path=r"export/(?P<file_format>csv|ndjson)",
+        renderer_classes=[JSONRenderer, ExportRenderer],
+    )
+    def export(self, request, file_format=None):
+        queryset = TransferDetails.objects.filter(
+            transfer_id__in=self.get_queryset().values("pk")
+        ).order_by("transfer_id", "id")
+        columns = [
+            "transfer_id",
+            "transfer_id__source_id",
+            "transfer_id__destination_id",
+            "transfer_id__transfer_date",
+            "transfer_id__status",
+            "inventory_item__product_id",
+            "quantity",
+        ]
+        return export_response(queryset, columns, file_format, "transfers")
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_status = serializer.instance.status
+        transfer = serializer.save()
+        transfer_status_changed(transfer, old_status)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        transfer_deleted(instance)
+        instance.delete()
+
     def retrieve(self, request, *args, **kwargs):
         transfer = self.get_object()
-        transfer_details = TransferDetails.objects.filter(transfer_id=transfer)
+        transfer_details = TransferDetails.objects.filter(
+            transfer_id=transfer
+        ).select_related("inventory_item")
         serializer = TransferDetailsSerializer(transfer_details, many=True)
         return Response(serializer.data, status=200)
 
@@ -266,8 +352,11 @@ class TransferViewSet(viewsets.ModelViewSet):
         if new_status not in valid_status:
             raise ValidationError("Invalid status")
 
-        transfer.status = new_status
-        transfer.save()
+        with transaction.atomic():
+            old_status = transfer.status
+            transfer.status = new_status
+            transfer.save()
+            transfer_status_changed(transfer, old_status)
 
         return Response("Status updated succesfully", status=200)
 
@@ -276,14 +365,48 @@ class InboundViewSet(viewsets.ModelViewSet):
     queryset = Inbound.objects.all()
     serializer_class = InboundSerializer
     permission_classes = [IsSuperUser]
+    keyset_ordering = ("inbound_id",)
+    query_budgets = {"retrieve": 3}
 
     def get_permissions(self):
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "export"]:
             permission_classes = [IsWarehouse|IsSuperUser]
         return [permission() for permission in permission_classes]
     
     def retrieve(self, request, *args, **kwargs):
         inbound = self.get_object()
-        inbound_details = InboundDetails.objects.filter(inbound_id=inbound)
+        inbound_details = InboundDetails.objects.filter(
+            inbound_id=inbound
+        ).select_related("warehouse_item__inventory_item")
         serializer = InboundDetailsSerializer(inbound_details, many=True)
         return Response(serializer.data, status=200)
+
+    @action(
+        detail=False, methods=["GET"], url_path=r"export/(?P<file_format>csv|ndjson)",
+        renderer_classes=[JSONRenderer, ExportRenderer],
+    )
+    def export(self, request, file_format=None):
+        queryset = InboundDetails.objects.filter(
+            inbound_id__in=self.get_queryset().values("pk")
+        ).order_by("inbound_id", "id")
+        columns = [
+            "inbound_id",
+            "inbound_id__supplier",
+            "inbound_id__invoice_no",
+            "inbound_id__invoice_date",
+            "inbound_id__inbound_date",
+            "product_id",
+            "warehouse_item__batch_no",
+            "warehouse_item__expiry_date",
+            "quantity",
+        ]
+        return export_response(queryset, columns, file_format, "inbound")
+
+
+class StockSummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = StockSummary.objects.select_related("inventory_item")
+    serializer_class = StockSummarySerializer
+    permission_classes = [IsAuthenticated, IsSuperUser | IsAdminUser | IsWarehouse]
+    keyset_ordering = ("inventory_item_id",)
+
+    filterset_fields = ["inventory_item__product_id"]
@@ -1,3 +1,21 @@
 from django.contrib import admin
+from .models import Sale, SaleLine, SaleSyncKey
 
-# Register your models here.
+
+class SaleLineInline(admin.TabularInline):
+    model = SaleLine
+    extra = 0
+    readonly_fields = ("inventory_item", "quantity", "unit_price", "line_total")
+
+
+@admin.register(Sale)
+class SaleAdmin(admin.ModelAdmin):
+    list_display = ("id", "facility", "cashier", "payment_method", "total", "sold_at")
+    list_filter = ("facility", "payment_method")
+    inlines = [SaleLineInline]
+
+
+@admin.register(SaleSyncKey)
+class SaleSyncKeyAdmin(admin.ModelAdmin):
+    list_display = ("facility", "key", "sale", "synced_at")
+    list_filter = ("facility",)
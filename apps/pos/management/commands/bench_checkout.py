@@ -0,0 +1,100 @@
+import random
+import statistics
+import threading
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from rest_framework.serializers import ValidationError
+from apps.facilities.models import Facility
+from apps.inventory.models import InventoryItem, FacilityInventory
+from apps.pos.services import checkout
+
+DEADLOCK_SQLSTATE = "40P01"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run checkouts from parallel tills at one facility and report "
+        "latency percentiles, throughput and failures. Writes sales to the "
+        "configured database, so point it at a disposable PostgreSQL instance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tills", type=int, default=12)
+        parser.add_argument("--checkouts", type=int, default=100, help="Checkouts per till")
+        parser.add_argument("--items", type=int, default=200, help="Catalog items on sale")
+        parser.add_argument("--lines", type=int, default=20, help="Lines per basket")
+        parser.add_argument("--stock", type=int, default=1_000_000, help="Opening stock per item")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Concurrent checkouts are only meaningful on PostgreSQL.")
+
+        facility = Facility.objects.order_by("id").first()
+        if facility is None:
+            raise CommandError("At least one facility is required.")
+        inventory_items = list(InventoryItem.objects.order_by("id")[:options["items"]])
+        if len(inventory_items) < options["lines"]:
+            raise CommandError(f"At least {options['lines']} inventory items are required.")
+
+        for inventory_item in inventory_items:
+            FacilityInventory.objects.update_or_create(
+                facility=facility,
+                inventory_item=inventory_item,
+                defaults={"quantity": options["stock"]},
+            )
+
+        timings = []
+        counts = {"completed": 0, "deadlocks": 0, "rejected": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def till(number):
+            rng = random.Random(number)
+            try:
+                for _ in range(options["checkouts"]):
+                    basket = [
+                        {"product_id": item.product_id, "quantity": rng.randint(1, 3)}
+                        for item in rng.sample(inventory_items, options["lines"])
+                    ]
+                    started = time.perf_counter()
+                    try:
+                        checkout(facility, None, basket)
+                        outcome = "completed"
+                    except OperationalError as e:
+                        sqlstate = getattr(e.__cause__, "sqlstate", None) or getattr(e.__cause__, "pgcode", None)
+                        outcome = "deadlocks" if sqlstate == DEADLOCK_SQLSTATE else "errors"
+                    except ValidationError:
+                        outcome = "rejected"
+                    except Exception:
+                        outcome = "errors"
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        counts[outcome] += 1
+                        if outcome == "completed":
+                            timings.append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=till, args=(n,)) for n in range(options["tills"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{options['tills']} tills, {sum(counts.values())} checkouts of "
+            f"{options['lines']} lines in {elapsed:.2f}s "
+            f"({counts['completed'] / elapsed:.1f} checkouts/s)"
+        )
+        if len(timings) >= 2:
+            quantiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f"  latency p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, "
+                f"p99 {quantiles[98]:.1f} ms"
+            )
+        for outcome, count in counts.items():
+            self.stdout.write(f"  {outcome}: {count}")
+        if counts["deadlocks"]:
+            raise CommandError(f"{counts['deadlocks']} deadlocks detected")
@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.facilities.models import Facility
+from apps.pos.models import Sale
+from apps.pos.partitions import add_months, create_partition, existing_partitions, month_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Time date-range queries on the sales history, optionally after "
+        "generating millions of sales spread over the past months. Writes to "
+        "the configured database, so point it at a disposable PostgreSQL "
+        "instance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--populate", type=int, default=0,
+            help="Generate this many sales first, e.g. 10000000",
+        )
+        parser.add_argument("--months", type=int, default=12, help="Months the sales span")
+        parser.add_argument("--queries", type=int, default=50, help="Queries per range")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Sales are only partitioned on PostgreSQL.")
+        facility_ids = list(Facility.objects.values_list("id", flat=True))
+        if not facility_ids:
+            raise CommandError("At least one facility is required.")
+
+        now = timezone.now()
+        if options["populate"]:
+            self.populate(options["populate"], options["months"], facility_ids, now)
+
+        rng = random.Random(options["seed"])
+        span = timedelta(days=30 * options["months"])
+        for days in (1, 7, 30):
+            timings, scanned = [], set()
+            for _ in range(options["queries"]):
+                start = now - span + timedelta(seconds=rng.randrange(int(span.total_seconds())))
+                queryset = Sale.objects.filter(
+                    facility_id=rng.choice(facility_ids),
+                    sold_at__gte=start,
+                    sold_at__lt=start + timedelta(days=days),
+                ).order_by("-sold_at", "-id")
+                started = time.perf_counter()
+                queryset.count()
+                list(queryset[:20])
+                timings.append((time.perf_counter() - started) * 1000)
+                plan = queryset.explain()
+                scanned.add(sum(1 for line in plan.splitlines() if " on sales_" in line))
+
+            quantiles = statistics.quantiles(timings, n=100)
+            self.stdout.write(
+                f"{days:>2} day range: p50 {quantiles[49]:.1f} ms, p95 {quantiles[94]:.1f} ms, "
+                f"p99 {quantiles[98]:.1f} ms (count + first page), "
+                f"plan scans {min(scanned)}-{max(scanned)} partition(s)"
+            )
+
+    def populate(self, rows, months, facility_ids, now):
+        oldest = add_months(month_start(now), -months)
+        with connection.cursor() as cursor:
+            existing = set(existing_partitions(cursor))
+        month = oldest
+        while month <= month_start(now):
+            if month not in existing:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    create_partition(cursor, month)
+            month = add_months(month, 1)
+
+        # Generated in time order, as tills would write them, so the BRIN
+        # index reflects production
+        start = now - timedelta(days=30 * months)
+        step = (now - start) / rows
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO sales (facility_id, cashier, payment_method, total, sold_at) "
+                "SELECT (%s::bigint[])[1 + n %% %s], '', 'cash', 100, %s + n * %s "
+                "FROM generate_series(0, %s - 1) AS n",
+                [facility_ids, len(facility_ids), start, step, rows],
+            )
+            cursor.execute("ANALYZE sales")
+        self.stdout.write(f"Generated {rows} sales over {months} months")
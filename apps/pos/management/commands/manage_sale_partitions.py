@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.pos.partitions import (
+    add_months,
+    create_partition,
+    detach_partition,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the monthly sales partitions for the coming months and, "
+        "optionally, detach old ones to an archive schema or drop them. "
+        "Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead", type=int, default=3, help="Months to create after the current one"
+        )
+        parser.add_argument(
+            "--retain", type=int,
+            help="Detach partitions older than this many months before the current one",
+        )
+        parser.add_argument(
+            "--archive-schema", default="archive",
+            help="Schema detached partitions are moved to",
+        )
+        parser.add_argument(
+            "--drop", action="store_true", help="Drop detached partitions instead of archiving"
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Sales are only partitioned on PostgreSQL.")
+
+        current = month_start(timezone.now())
+        with connection.cursor() as cursor:
+            existing = set(existing_partitions(cursor))
+
+        for offset in range(options["ahead"] + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            with transaction.atomic(), connection.cursor() as cursor:
+                create_partition(cursor, month)
+            self.stdout.write(f"Created {partition_name(month)}")
+
+        if options["retain"] is None:
+            return
+        cutoff = add_months(current, -options["retain"])
+        for month in sorted(existing):
+            if month >= cutoff:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                detach_partition(
+                    cursor, month, archive_schema=options["archive_schema"], drop=options["drop"]
+                )
+            outcome = "dropped" if options["drop"] else f"moved to {options['archive_schema']}"
+            self.stdout.write(f"Detached {partition_name(month)}, {outcome}")
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('facilities', '0007_alter_facility_date_added_alter_facility_modified_at'),
+        ('inventory', '0008_warehouse_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cashier', models.EmailField(blank=True, max_length=254)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('card', 'Card'), ('mobile_money', 'Mobile Money'), ('insurance', 'Insurance')], default='cash', max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('sold_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='facilities.facility')),
+            ],
+            options={
+                'db_table': 'sales',
+            },
+        ),
+        migrations.CreateModel(
+            name='SaleLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='inventory.inventoryitem')),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='pos.sale')),
+            ],
+            options={
+                'db_table': 'sale_lines',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(fields=['facility', 'sold_at'], name='sales_facility_sold_at_idx'),
+        ),
+    ]
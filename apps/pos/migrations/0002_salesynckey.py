@@ -0,0 +1,30 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0007_alter_facility_date_added_alter_facility_modified_at'),
+        ('pos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleSyncKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('errors', models.JSONField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now_add=True)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='facilities.facility')),
+                ('sale', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pos.sale')),
+            ],
+            options={
+                'db_table': 'sale_sync_keys',
+                'constraints': [models.UniqueConstraint(fields=('facility', 'key'), name='unique_sale_sync_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:23
+
+import django.db.models.deletion
+from datetime import date
+from django.db import migrations, models
+from django.utils import timezone
+
+# Months created ahead of today; manage_sale_partitions keeps this up
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_sales(apps, schema_editor):
+    """
+    Rebuild the sales table as a range partitioned table with one partition
+    per month, a default partition and a BRIN index on sold_at.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    facilities = connection.ops.quote_name(apps.get_model("facilities", "Facility")._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE sales RENAME TO sales_unpartitioned")
+        cursor.execute(
+            "CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING CONSTRAINTS) "
+            "PARTITION BY RANGE (sold_at)"
+        )
+        cursor.execute("CREATE SEQUENCE sale_ids OWNED BY sales.id")
+        cursor.execute("ALTER TABLE sales ALTER COLUMN id SET DEFAULT nextval('sale_ids')")
+        # A partitioned table's unique keys must include the partition key
+        cursor.execute("ALTER TABLE sales ADD PRIMARY KEY (id, sold_at)")
+        cursor.execute(
+            f"ALTER TABLE sales ADD CONSTRAINT sales_facility_id_fk FOREIGN KEY (facility_id) "
+            f"REFERENCES {facilities} (id) DEFERRABLE INITIALLY DEFERRED"
+        )
+        cursor.execute("CREATE TABLE sales_default PARTITION OF sales DEFAULT")
+
+        cursor.execute("SELECT min(sold_at) FROM sales_unpartitioned")
+        now = timezone.now()
+        oldest = cursor.fetchone()[0] or now
+        month = date(oldest.year, oldest.month, 1)
+        last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f"CREATE TABLE sales_p{month:%Y%m} PARTITION OF sales "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [f"{month:%Y-%m-%d} 00:00:00+00", f"{_add_months(month, 1):%Y-%m-%d} 00:00:00+00"],
+            )
+            month = _add_months(month, 1)
+
+        cursor.execute("INSERT INTO sales SELECT * FROM sales_unpartitioned")
+        cursor.execute("SELECT setval('sale_ids', coalesce(max(id), 0) + 1, false) FROM sales")
+        cursor.execute("DROP TABLE sales_unpartitioned")
+        cursor.execute("CREATE INDEX sales_facility_sold_at_idx ON sales (facility_id, sold_at)")
+        # Sales arrive in time order, so a BRIN index stays tiny and still
+        # skips most blocks of a partition on a date range
+        cursor.execute("CREATE INDEX sales_sold_at_brin ON sales USING brin (sold_at)")
+
+
+def unpartition_sales(apps, schema_editor):
+    """
+    Put every sale back in a plain sales table keyed by id, as 0001 created
+    it, and drop the partitions.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    Sale = apps.get_model("pos", "Sale")
+    columns = ", ".join(connection.ops.quote_name(field.column) for field in Sale._meta.local_fields)
+    with connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE sales RENAME TO sales_partitioned")
+        # Index names are per schema, and create_model() reuses these
+        cursor.execute("ALTER INDEX sales_pkey RENAME TO sales_partitioned_pkey")
+        cursor.execute("DROP INDEX sales_facility_sold_at_idx")
+        cursor.execute("DROP INDEX sales_sold_at_brin")
+    schema_editor.create_model(Sale)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO sales ({columns}) SELECT {columns} FROM sales_partitioned")
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('sales', 'id'), coalesce(max(id), 0) + 1, false) "
+            "FROM sales"
+        )
+        # Takes the partitions and the sale_ids sequence with it
+        cursor.execute("DROP TABLE sales_partitioned CASCADE")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pos', '0002_salesynckey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='saleline',
+            name='sale',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='pos.sale'),
+        ),
+        migrations.AlterField(
+            model_name='salesynckey',
+            name='sale',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pos.sale'),
+        ),
+        migrations.RunPython(partition_sales, unpartition_sales),
+    ]
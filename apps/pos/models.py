@@ -1,6 +1,78 @@
 from django.db import models
+from django.utils import timezone
+from ..facilities.models import Facility
+from ..inventory.models import InventoryItem
 
 
-# Cart Model (Add to cart, payment option, create)
-# If cart model, add to payment, create sale history, delete cart instance
-# Sale History Model(filter by date)
+class Sale(models.Model):
+    """
+    A basket sold at a facility till.
+
+    On PostgreSQL the table is range partitioned by month on sold_at (see
+    migration 0003 and partitions.py), so its primary key is (id, sold_at)
+    and other tables cannot hold a foreign key constraint to it.
+    """
+    PAYMENT_CHOICES = [
+        ("cash", "Cash"),
+        ("card", "Card"),
+        ("mobile_money", "Mobile Money"),
+        ("insurance", "Insurance"),
+    ]
+
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
+    # Email of the user who rang the sale up. Not a foreign key while the
+    # users migrations still describe an integer primary key.
+    cashier = models.EmailField(blank=True)
+    payment_method = models.CharField(max_length=20, choices=PAYMENT_CHOICES, default="cash")
+    total = models.DecimalField(max_digits=12, decimal_places=2)
+    sold_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = "sales"
+        indexes = [models.Index(fields=["facility", "sold_at"], name="sales_facility_sold_at_idx")]
+
+    def __str__(self):
+        return f"Sale {self.id} at {self.facility}, {self.total}"
+
+
+class SaleLine(models.Model):
+    """
+    An item on a sale, priced when it was sold
+    """
+    sale = models.ForeignKey(
+        Sale, on_delete=models.CASCADE, related_name="lines", db_constraint=False
+    )
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=7, decimal_places=2)
+    line_total = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        db_table = "sale_lines"
+
+    def __str__(self):
+        return f"{self.inventory_item_id} x{self.quantity} on sale {self.sale_id}"
+
+
+class SaleSyncKey(models.Model):
+    """
+    Idempotency key of a sale uploaded by an offline till, with the outcome
+    it got, so a replayed upload is answered without touching stock again
+    """
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    sale = models.ForeignKey(
+        Sale, on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False
+    )
+    # Line errors when the sale was rejected for lack of stock
+    errors = models.JSONField(null=True, blank=True)
+    synced_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "sale_sync_keys"
+        constraints = [
+            models.UniqueConstraint(fields=["facility", "key"], name="unique_sale_sync_key")
+        ]
+
+    def __str__(self):
+        return f"{self.facility_id}:{self.key}"
@@ -0,0 +1,83 @@
+"""
+Monthly range partitions of the sales table (PostgreSQL only).
+
+Partitions are named sales_pYYYYMM and cover [first of month, first of
+next month) in UTC. Rows outside every partition land in sales_default
+until their month is created.
+"""
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+TABLE = "sales"
+DEFAULT_PARTITION = "sales_default"
+PARTITION_NAME = re.compile(r"^sales_p(\d{4})(\d{2})$")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc).isoformat()
+
+
+def existing_partitions(cursor):
+    """
+    Months that have a partition attached to the sales table, oldest first.
+    """
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = %s",
+        [TABLE],
+    )
+    months = []
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match[1]), int(match[2]), 1))
+    return sorted(months)
+
+
+def create_partition(cursor, month):
+    """
+    Create and attach the partition for ``month``, moving any of its rows
+    that were parked in the default partition. Run inside a transaction.
+    """
+    name = partition_name(month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+        f"WHERE sold_at >= %s AND sold_at < %s RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved",
+        [lower, upper],
+    )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+        [lower, upper],
+    )
+
+
+def detach_partition(cursor, month, archive_schema=None, drop=False):
+    """
+    Detach the partition for ``month`` from the sales table, then drop it
+    or move it to ``archive_schema``.
+    """
+    name = partition_name(month)
+    cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+    if drop:
+        cursor.execute(f"DROP TABLE {name}")
+    elif archive_schema:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}")
+        cursor.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema}")
@@ -0,0 +1,24 @@
+from rest_framework import serializers
+from .models import Sale, SaleLine
+
+
+class SaleLineSerializer(serializers.ModelSerializer):
+    product_id = serializers.CharField(source="inventory_item.product_id", read_only=True)
+    product_name = serializers.CharField(source="inventory_item.product_name", read_only=True)
+
+    class Meta:
+        model = SaleLine
+        fields = ["product_id", "product_name", "quantity", "unit_price", "line_total"]
+
+
+class SaleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Sale
+        fields = ["id", "facility", "cashier", "payment_method", "total", "sold_at"]
+
+
+class SaleDetailSerializer(SaleSerializer):
+    lines = SaleLineSerializer(many=True, read_only=True)
+
+    class Meta(SaleSerializer.Meta):
+        fields = SaleSerializer.Meta.fields + ["lines"]
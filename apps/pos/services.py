@@ -0,0 +1,284 @@
+from collections import defaultdict
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from ..inventory.catalog import catalog
+from ..inventory.models import FacilityInventory, InventoryItem
+from ..inventory.services import (
+    _clean_lines,
+    _raise_line_errors,
+    _requested_quantities,
+    _resolve_items,
+    _subtract,
+    deduct_facility_stock,
+    record_stock_movement,
+)
+from ..inventory.versions import invalidate_facility_inventory
+from ..reports.services import record_sales
+from .models import Sale, SaleLine, SaleSyncKey
+
+# Keys looked up per query when deduplicating an upload
+KEY_LOOKUP_BATCH_SIZE = 1000
+BULK_BATCH_SIZE = 1000
+
+
+def _prices(inventory_item_ids):
+    """
+    {inventory_item_id: (selling price, cost price)} read from InventoryItem
+    inside the sale's transaction. The catalog cache only resolves product
+    IDs, since it can lag behind a price change until its version moves.
+    """
+    return {
+        inventory_item_id: (selling_price, cost_price)
+        for inventory_item_id, selling_price, cost_price in InventoryItem.objects.filter(
+            id__in=inventory_item_ids
+        ).values_list("id", "selling_price_pack", "cost_price_pack")
+    }
+
+
+def _sale_lines(items, inventory_items, prices):
+    lines = []
+    for item in items:
+        inventory_item_id = inventory_items[item["product_id"]].id
+        unit_price = prices[inventory_item_id][0]
+        quantity = int(item["quantity"])
+        lines.append(SaleLine(
+            inventory_item_id=inventory_item_id,
+            quantity=quantity,
+            unit_price=unit_price,
+            line_total=unit_price * quantity,
+        ))
+    return lines
+
+
+def _unit_costs(prices):
+    return {inventory_item_id: cost for inventory_item_id, (_, cost) in prices.items()}
+
+
+def checkout(facility, cashier, items, payment_method="cash"):
+    """
+    Sell a basket from a facility's stock. The whole basket is checked and
+    taken with one conditional UPDATE, lines are priced from the items'
+    current rows and the sale is written with a fixed number of statements however many
+    lines it has.
+    """
+    errors = _clean_lines(items, ("product_id", "quantity"))
+    inventory_items = _resolve_items(items, errors)
+    _raise_line_errors(errors)
+    requested = _requested_quantities(items, inventory_items)
+
+    with transaction.atomic():
+        deduct_facility_stock(facility, requested, errors)
+        prices = _prices(requested)
+        lines = _sale_lines(items, inventory_items, prices)
+        sale = Sale.objects.create(
+            facility=facility,
+            cashier=cashier.email if cashier else "",
+            payment_method=payment_method,
+            total=sum(line.line_total for line in lines),
+        )
+        for line in lines:
+            line.sale = sale
+        SaleLine.objects.bulk_create(lines)
+        record_sales(facility, [(sale, lines)], _unit_costs(prices))
+        record_stock_movement(facility={
+            inventory_item_id: -quantity for inventory_item_id, (quantity, _) in requested.items()
+        })
+        invalidate_facility_inventory(facility.id)
+    return sale
+
+
+def _clean_sale(sale):
+    """
+    Check the shape of an uploaded sale. Returns its errors, with the line
+    errors under "items".
+    """
+    if not isinstance(sale, dict):
+        return {"non_field_errors": ["Each sale must be an object."]}
+    errors = {}
+    key = sale.get("key")
+    if not isinstance(key, str) or not key or len(key) > 64:
+        errors["key"] = ["A key of at most 64 characters is required."]
+    if sale.get("payment_method", "cash") not in dict(Sale.PAYMENT_CHOICES):
+        errors["payment_method"] = ["Invalid payment method."]
+    if sale.get("sold_at") is not None and _parse_sold_at(sale) is None:
+        errors["sold_at"] = ["Enter a valid date/time."]
+    items = sale.get("items")
+    if not items or not isinstance(items, list):
+        errors["items"] = ["A valid list of inventory items must be provided."]
+    else:
+        line_errors = _clean_lines(items, ("product_id", "quantity"))
+        if any(line_errors):
+            errors["items"] = line_errors
+    return errors
+
+
+def _parse_sold_at(sale):
+    try:
+        return parse_datetime(str(sale["sold_at"]))
+    except ValueError:
+        # Well formed but impossible, e.g. February 30th
+        return None
+
+
+def _sold_at(sale, default):
+    """The sale's sold_at, or ``default`` when it is missing or null"""
+    if sale.get("sold_at") is None:
+        return default
+    sold_at = _parse_sold_at(sale)
+    if timezone.is_naive(sold_at):
+        sold_at = timezone.make_aware(sold_at)
+    return sold_at
+
+
+def _known_keys(facility, keys):
+    known = {}
+    keys = list(keys)
+    for start in range(0, len(keys), KEY_LOOKUP_BATCH_SIZE):
+        for sync_key in SaleSyncKey.objects.filter(
+            facility=facility, key__in=keys[start:start + KEY_LOOKUP_BATCH_SIZE]
+        ).only("key", "sale_id", "errors"):
+            known[sync_key.key] = sync_key
+    return known
+
+
+def _duplicate(sync_key):
+    result = {"key": sync_key.key, "status": "duplicate", "sale": sync_key.sale_id}
+    if sync_key.errors:
+        result["errors"] = sync_key.errors
+    return result
+
+
+def sync_sales(facility, cashier, sales):
+    """
+    Ingest sales queued by an offline till. Each sale carries a key unique
+    to its till; keys already ingested are answered from SaleSyncKey, so a
+    replayed upload changes nothing. New sales take stock earliest first,
+    through one grouped UPDATE for the whole upload, and a sale the stock
+    cannot cover is rejected on its own. Returns one result per sale, in
+    upload order.
+    """
+    try:
+        return _sync_sales(facility, cashier, sales)
+    except IntegrityError:
+        # A concurrent upload of the same keys committed first; replaying
+        # now answers them as duplicates
+        return _sync_sales(facility, cashier, sales)
+
+
+def _sync_sales(facility, cashier, sales):
+    results = [None] * len(sales)
+    pending = {}
+    for index, sale in enumerate(sales):
+        errors = _clean_sale(sale)
+        if not errors and sale["key"] in pending:
+            errors = {"key": ["Duplicate key in this upload."]}
+        if errors:
+            results[index] = {
+                "key": sale.get("key") if isinstance(sale, dict) else None,
+                "status": "invalid",
+                "errors": errors,
+            }
+            continue
+        pending[sale["key"]] = index
+
+    for key, sync_key in _known_keys(facility, pending).items():
+        results[pending.pop(key)] = _duplicate(sync_key)
+
+    product_ids = {
+        item["product_id"] for index in pending.values() for item in sales[index]["items"]
+    }
+    inventory_items = catalog.get_many(product_ids, fresh=True)
+    for key, index in list(pending.items()):
+        unknown = [
+            {"product_id": [f"Product '{item['product_id']}' does not exist."]}
+            if item["product_id"] not in inventory_items else {}
+            for item in sales[index]["items"]
+        ]
+        if any(unknown):
+            results[index] = {"key": key, "status": "invalid", "errors": {"items": unknown}}
+            del pending[key]
+    if not pending:
+        return results
+
+    with transaction.atomic():
+        stock = {
+            inventory_item_id: [pk, quantity]
+            for pk, inventory_item_id, quantity in FacilityInventory.objects.select_for_update()
+            .filter(
+                facility=facility,
+                inventory_item_id__in={entry.id for entry in inventory_items.values()},
+            )
+            .order_by("inventory_item_id")
+            .values_list("pk", "inventory_item_id", "quantity")
+        }
+        # Keys another upload committed while this one waited for the locks
+        for key, sync_key in _known_keys(facility, pending).items():
+            results[pending.pop(key)] = _duplicate(sync_key)
+
+        now = timezone.now()
+        taken = defaultdict(int)
+        accepted, sync_keys = [], []
+        ordered = sorted(
+            pending.items(),
+            key=lambda pair: (_sold_at(sales[pair[1]], now), pair[1]),
+        )
+        for key, index in ordered:
+            sale = sales[index]
+            requested = _requested_quantities(sale["items"], inventory_items)
+            line_errors = [{} for _ in sale["items"]]
+            for inventory_item_id, (quantity, indexes) in requested.items():
+                available = stock.get(inventory_item_id, [None, 0])[1]
+                if available < quantity:
+                    for line in indexes:
+                        line_errors[line]["quantity"] = [
+                            f"Insufficient stock. {available} packs available."
+                        ]
+            if any(line_errors):
+                errors = {"items": line_errors}
+                results[index] = {"key": key, "status": "rejected", "errors": errors}
+                sync_keys.append(SaleSyncKey(facility=facility, key=key, errors=errors))
+                continue
+
+            for inventory_item_id, (quantity, _) in requested.items():
+                stock[inventory_item_id][1] -= quantity
+                taken[inventory_item_id] += quantity
+            accepted.append((key, index, requested))
+
+        _subtract(FacilityInventory, {
+            stock[inventory_item_id][0]: quantity for inventory_item_id, quantity in taken.items()
+        })
+
+        prices = _prices(taken)
+        sale_rows, lines = [], []
+        for key, index, _ in accepted:
+            sale = sales[index]
+            sale_lines = _sale_lines(sale["items"], inventory_items, prices)
+            sale_rows.append(Sale(
+                facility=facility,
+                cashier=cashier.email if cashier else "",
+                payment_method=sale.get("payment_method", "cash"),
+                total=sum(line.line_total for line in sale_lines),
+                sold_at=_sold_at(sale, now),
+            ))
+            lines.append(sale_lines)
+        Sale.objects.bulk_create(sale_rows, batch_size=BULK_BATCH_SIZE)
+
+        for (key, index, _), sale, sale_lines in zip(accepted, sale_rows, lines):
+            for line in sale_lines:
+                line.sale = sale
+            sync_keys.append(SaleSyncKey(facility=facility, key=key, sale=sale))
+            results[index] = {"key": key, "status": "created", "sale": sale.id}
+        SaleLine.objects.bulk_create(
+            [line for sale_lines in lines for line in sale_lines], batch_size=BULK_BATCH_SIZE
+        )
+        # Conflicts with a concurrent upload of the same keys surface here
+        SaleSyncKey.objects.bulk_create(sync_keys, batch_size=BULK_BATCH_SIZE)
+
+        if taken:
+            record_sales(facility, zip(sale_rows, lines), _unit_costs(prices))
+            record_stock_movement(facility={
+                inventory_item_id: -quantity for inventory_item_id, quantity in taken.items()
+            })
+            invalidate_facility_inventory(facility.id)
+    return results
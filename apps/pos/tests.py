@@ -1,3 +1,241 @@
+import datetime
+import shutil
+import tempfile
+import uuid
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+from apps.core.testing import QueryBudgetMixin
+from apps.facilities.models import Facility
+from apps.inventory.catalog import catalog
+from apps.inventory.models import FacilityInventory, InventoryItem
+from apps.users.models import User
+from apps.reports.models import DailySales
+from .models import Sale, SaleLine
+from .partitions import (
+    DEFAULT_PARTITION,
+    add_months,
+    create_partition,
+    existing_partitions,
+    month_start,
+    partition_name,
+)
+from .views import SaleViewSet
 
-# Create your tests here.
+
+class SaleTestCase(TestCase):
+    """A facility with two items in stock and an admin at the till"""
+
+    def setUp(self):
+        self.facility = Facility.objects.create(
+            name="Adum", city="Kumasi", region="Ashanti", country="Ghana"
+        )
+        self.cashier = User.objects.create(
+            email="cashier@example.com", name="Cashier", is_admin=True, facility=self.facility
+        )
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name=f"Brand {n}", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.00"), pack_size=10,
+            )
+            for n in range(2)
+        ]
+        self.stock = [
+            FacilityInventory.objects.create(facility=self.facility, inventory_item=item, quantity=5)
+            for item in self.items
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.cashier)
+
+    def checkout(self, quantities, **extra):
+        return self.client.post("/pos/sales/checkout/", {"items": [
+            {"product_id": item.product_id, "quantity": quantity}
+            for item, quantity in zip(self.items, quantities)
+        ]}, format="json", **extra)
+
+    def quantities(self):
+        return [row.quantity for row in FacilityInventory.objects.order_by("inventory_item_id")]
+
+
+class CheckoutTests(SaleTestCase):
+
+    def test_checkout_takes_stock(self):
+        response = self.checkout([2, 5])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.quantities(), [3, 0])
+        self.assertEqual(SaleLine.objects.count(), 2)
+
+    def test_shortfall_writes_nothing(self):
+        response = self.checkout([2, 6])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["items"][1]["quantity"], ["Insufficient stock. 5 packs available."]
+        )
+        self.assertFalse(Sale.objects.exists())
+        self.assertEqual(self.quantities(), [5, 5])
+
+    def test_restock_after_shortfall_still_fails(self):
+        # Another till restocks between the failed UPDATE and the re-read
+        restocked = []
+
+        def restock(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if sql.startswith("ROLLBACK TO SAVEPOINT") and not restocked:
+                restocked.append(sql)
+                context["cursor"].execute(
+                    "UPDATE facility_inventory SET quantity = quantity + 10 WHERE id = %s",
+                    [self.stock[1].pk],
+                )
+            return result
+
+        with connection.execute_wrapper(restock):
+            response = self.checkout([2, 6])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("retry", str(response.data[0]))
+        self.assertFalse(Sale.objects.exists())
+        # The restock ran in the test's transaction and was rolled back with
+        # the sale; nothing was taken
+        self.assertEqual(self.quantities(), [5, 5])
+
+    def warm_catalog(self):
+        # The catalog is only kept with a cache every process can see
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.enterContext(self.settings(CACHES={"default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": location,
+        }}))
+        self.addCleanup(catalog.clear)
+        catalog.warm()
+
+    def test_lines_priced_from_current_rows(self):
+        self.warm_catalog()
+        # A price change the catalog cache has not seen yet
+        InventoryItem.objects.filter(pk=self.items[0].pk).update(
+            selling_price_pack=Decimal("15.00"), cost_price_pack=Decimal("11.00")
+        )
+        response = self.checkout([2])
+        self.assertEqual(response.status_code, 201)
+        line = SaleLine.objects.get()
+        self.assertEqual((line.unit_price, line.line_total), (Decimal("15.00"), Decimal("30.00")))
+        self.assertEqual(DailySales.objects.get().cost_of_goods, Decimal("22.00"))
+
+    def test_sync_priced_from_current_rows(self):
+        self.warm_catalog()
+        InventoryItem.objects.filter(pk=self.items[0].pk).update(selling_price_pack=Decimal("15.00"))
+        response = self.client.post("/pos/sales/sync/", {"sales": [
+            {"key": "till-1", "items": [{"product_id": self.items[0].product_id, "quantity": 1}]},
+        ]}, format="json")
+        self.assertEqual(response.data["results"][0]["status"], "created")
+        self.assertEqual(SaleLine.objects.get().unit_price, Decimal("15.00"))
+        self.assertEqual(self.quantities(), [4, 5])
+
+
+class SyncTests(SaleTestCase):
+    def sync(self, *sales):
+        response = self.client.post("/pos/sales/sync/", {"sales": list(sales)}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return [(result["key"], result["status"]) for result in response.data["results"]]
+
+    def sale(self, key, quantity=1, **fields):
+        return {
+            "key": key,
+            "items": [{"product_id": self.items[0].product_id, "quantity": quantity}],
+            **fields,
+        }
+
+    def test_replay_changes_nothing(self):
+        sales = [self.sale("till-1"), self.sale("till-2", quantity=2)]
+        self.assertEqual(self.sync(*sales), [("till-1", "created"), ("till-2", "created")])
+        self.assertEqual(self.sync(*sales), [("till-1", "duplicate"), ("till-2", "duplicate")])
+        self.assertEqual(self.quantities(), [2, 5])
+        self.assertEqual(Sale.objects.count(), 2)
+
+    def test_bad_sales_are_reported_alone(self):
+        results = self.sync(
+            self.sale("till-1", sold_at="2026-02-30T10:00:00"),
+            self.sale("till-2", sold_at="yesterday"),
+            self.sale("till-3", quantity=9),
+            self.sale("till-4", sold_at=None),
+            self.sale("till-5", sold_at="2026-02-27T10:00:00"),
+        )
+        self.assertEqual(results, [
+            ("till-1", "invalid"),
+            ("till-2", "invalid"),
+            ("till-3", "rejected"),
+            ("till-4", "created"),
+            ("till-5", "created"),
+        ])
+        self.assertEqual(self.quantities(), [3, 5])
+        self.assertEqual(
+            Sale.objects.order_by("sold_at").first().sold_at.date(), datetime.date(2026, 2, 27)
+        )
+
+
+class QueryBudgetTests(QueryBudgetMixin, SaleTestCase):
+    """SaleViewSet's query budgets hold for a multi-line sale"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.cashier)
+
+    def test_checkout(self):
+        response = self.checkout([2, 3], HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()))
+        self.assertWithinBudget(response, SaleViewSet, "checkout")
+
+    def test_list(self):
+        self.checkout([1, 1])
+        self.checkout([1, 1])
+        # The checkouts cached the token's user, budgets hold without it
+        cache.clear()
+        response = self.client.get("/pos/sales/")
+        self.assertWithinBudget(response, SaleViewSet, "list")
+
+    def test_retrieve(self):
+        self.checkout([1, 1])
+        cache.clear()
+        response = self.client.get(f"/pos/sales/{Sale.objects.get().pk}/")
+        self.assertWithinBudget(response, SaleViewSet, "retrieve")
+
+
+@skipUnless(connection.vendor == "postgresql", "Sales are only partitioned on PostgreSQL.")
+class PartitionTests(SaleTestCase):
+    def count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {table}")
+            return cursor.fetchone()[0]
+
+    def test_creates_the_coming_months(self):
+        current = month_start(datetime.datetime.now(datetime.timezone.utc))
+        with connection.cursor() as cursor:
+            existing = existing_partitions(cursor)
+        # Migration 0003 created the current month and the three after it
+        self.assertEqual(existing[-4:], [add_months(current, n) for n in range(4)])
+
+        out = StringIO()
+        call_command("manage_sale_partitions", ahead=5, stdout=out)
+        self.assertEqual(out.getvalue().split(), [
+            word for n in (4, 5) for word in ("Created", partition_name(add_months(current, n)))
+        ])
+        with connection.cursor() as cursor:
+            self.assertEqual(
+                existing_partitions(cursor), existing + [add_months(current, n) for n in (4, 5)]
+            )
+
+    def test_sales_outside_every_partition_land_in_the_default(self):
+        month = add_months(month_start(datetime.datetime.now(datetime.timezone.utc)), 24)
+        sold_at = datetime.datetime(month.year, month.month, 15, tzinfo=datetime.timezone.utc)
+        sale = Sale.objects.create(facility=self.facility, total=Decimal("12.00"), sold_at=sold_at)
+        self.assertEqual(self.count(DEFAULT_PARTITION), 1)
+
+        with connection.cursor() as cursor:
+            create_partition(cursor, month)
+        self.assertEqual(self.count(DEFAULT_PARTITION), 0)
+        self.assertEqual(self.count(partition_name(month)), 1)
+        self.assertEqual(Sale.objects.get().pk, sale.pk)
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import SaleViewSet
+
+router = DefaultRouter()
+router.register(r"sales", SaleViewSet)
+
+app_name = "pos"
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -1,3 +1,99 @@
-from django.shortcuts import render
+from datetime import datetime, time, timedelta
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.serializers import ValidationError
+from ..core.idempotency import idempotent
+from .models import Sale, SaleLine
+from .serializers import SaleDetailSerializer, SaleSerializer
+from .services import checkout, sync_sales
 
-# Create your views here.
+
+class SaleViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Sale.objects.order_by("-sold_at", "-id")
+    serializer_class = SaleSerializer
+    permission_classes = [IsAuthenticated]
+    keyset_ordering = ("-sold_at", "-id")
+    query_budgets = {"list": 3, "retrieve": 3, "checkout": 17}
+
+    # Sales accepted in one offline upload
+    MAX_SYNC_BATCH = 5000
+
+    filterset_fields = ["payment_method", "cashier"]
+
+    def get_queryset(self):
+        user = self.request.user
+        queryset = self.queryset
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related(
+                Prefetch("lines", queryset=SaleLine.objects.select_related("inventory_item"))
+            )
+        elif self.action == "list":
+            queryset = self.filter_sold_at(queryset)
+        if user.is_superuser:
+            return queryset
+        return queryset.filter(facility=user.facility)
+
+    def filter_sold_at(self, queryset):
+        """
+        Apply ?date_from= and ?date_to= (inclusive days) as plain bounds on
+        sold_at, so PostgreSQL only scans the partitions of those months.
+        """
+        params = self.request.query_params
+        for param, lookup, days in (("date_from", "gte", 0), ("date_to", "lt", 1)):
+            if param not in params:
+                continue
+            try:
+                day = parse_date(params[param])
+            except ValueError:
+                day = None
+            if day is None:
+                raise ValidationError({param: ["Enter a valid date (YYYY-MM-DD)."]})
+            bound = timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+            queryset = queryset.filter(**{f"sold_at__{lookup}": bound})
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "retrieve":
+            return SaleDetailSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=["POST"])
+    @idempotent
+    def checkout(self, request):
+        facility = request.user.facility
+        items = request.data.get("items")
+        payment_method = request.data.get("payment_method", "cash")
+
+        if facility is None:
+            raise ValidationError("Only staff assigned to a facility can sell")
+
+        if not items or not isinstance(items, list):
+            raise ValidationError("A valid list of inventory items must be provided")
+
+        if payment_method not in dict(Sale.PAYMENT_CHOICES):
+            raise ValidationError("Invalid payment method")
+
+        sale = checkout(facility, request.user, items, payment_method)
+        return Response(SaleSerializer(sale).data, status=201)
+
+    @action(detail=False, methods=["POST"])
+    def sync(self, request):
+        facility = request.user.facility
+        sales = request.data.get("sales")
+
+        if facility is None:
+            raise ValidationError("Only staff assigned to a facility can sell")
+
+        if not sales or not isinstance(sales, list):
+            raise ValidationError("A valid list of sales must be provided")
+
+        if len(sales) > self.MAX_SYNC_BATCH:
+            raise ValidationError(f"At most {self.MAX_SYNC_BATCH} sales can be synced at once")
+
+        results = sync_sales(facility, request.user, sales)
+        return Response({"results": results}, status=200)
@@ -0,0 +1,22 @@
+from django.contrib import admin
+from .models import DailyInbound, DailySales, DailyStockMovement
+
+
+@admin.register(DailySales)
+class DailySalesAdmin(admin.ModelAdmin):
+    list_display = ("day", "facility", "inventory_item", "quantity", "revenue", "cost_of_goods")
+    list_filter = ("facility",)
+    date_hierarchy = "day"
+
+
+@admin.register(DailyStockMovement)
+class DailyStockMovementAdmin(admin.ModelAdmin):
+    list_display = ("day", "facility", "inventory_item", "transferred_in", "transferred_out")
+    list_filter = ("facility",)
+    date_hierarchy = "day"
+
+
+@admin.register(DailyInbound)
+class DailyInboundAdmin(admin.ModelAdmin):
+    list_display = ("day", "inventory_item", "quantity", "cost_value")
+    date_hierarchy = "day"
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.inventory.models import Inbound, Transfer
+from apps.pos.models import Sale
+from apps.pos.partitions import add_months, month_start
+from apps.reports.services import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily sales, stock movement and inbound rollups from the "
+        "source tables, one month per transaction. Defaults to the whole "
+        "history. Cost of goods is valued at the current cost prices."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date-from", help="First day to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--date-to", help="Last day to rebuild (YYYY-MM-DD)")
+
+    def parse_day(self, value, option):
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"{option} must be a date in the format YYYY-MM-DD.")
+        return day
+
+    def handle(self, *args, **options):
+        date_to = timezone.localdate()
+        if options["date_to"]:
+            date_to = self.parse_day(options["date_to"], "--date-to")
+        if options["date_from"]:
+            date_from = self.parse_day(options["date_from"], "--date-from")
+        else:
+            firsts = [
+                model.objects.aggregate(first=Min(TruncDate(field)))["first"]
+                for model, field in (
+                    (Sale, "sold_at"),
+                    (Transfer, "transfer_date"),
+                    (Inbound, "inbound_date"),
+                )
+            ]
+            firsts = [day for day in firsts if day is not None]
+            if not firsts:
+                self.stdout.write("Nothing to rebuild")
+                return
+            date_from = min(firsts)
+        if date_from > date_to:
+            raise CommandError("--date-from must not be after --date-to.")
+
+        start = date_from
+        while start <= date_to:
+            end = min(add_months(month_start(start), 1) - timedelta(days=1), date_to)
+            rebuild_rollups(start, end)
+            self.stdout.write(f"Rebuilt {start} to {end}")
+            start = end + timedelta(days=1)
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('facilities', '0007_alter_facility_date_added_alter_facility_modified_at'),
+        ('inventory', '0008_warehouse_expiry_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyInbound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('cost_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.inventoryitem')),
+            ],
+            options={
+                'db_table': 'daily_inbound',
+                'constraints': [models.UniqueConstraint(fields=('day', 'inventory_item'), name='daily_inbound_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cost_of_goods', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='facilities.facility')),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.inventoryitem')),
+            ],
+            options={
+                'db_table': 'daily_sales',
+                'indexes': [models.Index(fields=['day'], name='daily_sales_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facility', 'day', 'inventory_item'), name='daily_sales_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyStockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transferred_in', models.BigIntegerField(default=0)),
+                ('transferred_out', models.BigIntegerField(default=0)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='facilities.facility')),
+                ('inventory_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.inventoryitem')),
+            ],
+            options={
+                'db_table': 'daily_stock_movements',
+                'indexes': [models.Index(fields=['day'], name='daily_stock_movements_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facility', 'day', 'inventory_item'), name='daily_stock_movements_key')],
+            },
+        ),
+    ]
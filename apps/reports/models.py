@@ -0,0 +1,76 @@
+from django.db import models
+from ..facilities.models import Facility
+from ..inventory.models import InventoryItem
+
+
+class DailySales(models.Model):
+    """
+    Units sold, revenue and cost of goods of an item at a facility on one
+    day, kept up to date by every sale as it commits
+    """
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
+    day = models.DateField()
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    quantity = models.BigIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cost_of_goods = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "daily_sales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facility", "day", "inventory_item"], name="daily_sales_key"
+            ),
+        ]
+        indexes = [models.Index(fields=["day"], name="daily_sales_day_idx")]
+
+    def __str__(self):
+        return f"{self.facility_id} {self.day} {self.inventory_item_id}: {self.quantity}"
+
+
+class DailyStockMovement(models.Model):
+    """
+    Packs of an item transferred into and out of a facility on one day,
+    kept up to date by every supply and transfer as it commits
+    """
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
+    day = models.DateField()
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    transferred_in = models.BigIntegerField(default=0)
+    transferred_out = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "daily_stock_movements"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["facility", "day", "inventory_item"], name="daily_stock_movements_key"
+            ),
+        ]
+        indexes = [models.Index(fields=["day"], name="daily_stock_movements_day_idx")]
+
+    def __str__(self):
+        return (
+            f"{self.facility_id} {self.day} {self.inventory_item_id}: "
+            f"+{self.transferred_in} -{self.transferred_out}"
+        )
+
+
+class DailyInbound(models.Model):
+    """
+    Packs of an item received from suppliers into the warehouse on one day,
+    and their value at cost. Inbound invoices are not tied to a facility, so
+    these are keyed by day and item only.
+    """
+    day = models.DateField()
+    inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
+    quantity = models.BigIntegerField(default=0)
+    cost_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = "daily_inbound"
+        constraints = [
+            models.UniqueConstraint(fields=["day", "inventory_item"], name="daily_inbound_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.inventory_item_id}: {self.quantity}"
@@ -0,0 +1,218 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from ..core.db import upsert_increment
+from ..inventory.models import InboundDetails, TransferDetails
+from ..pos.models import SaleLine
+from .models import DailyInbound, DailySales, DailyStockMovement
+
+BULK_BATCH_SIZE = 1000
+
+ZERO = Decimal("0.00")
+
+
+def record_sales(facility, sold, unit_costs):
+    """
+    Add sales to the daily sales rollup in one upsert. ``sold`` holds
+    (sale, lines) pairs and ``unit_costs`` the cost price of every item
+    sold ({inventory_item_id: cost}). Call it inside the transaction that
+    writes the sales.
+    """
+    totals = defaultdict(lambda: [0, ZERO, ZERO])
+    for sale, lines in sold:
+        day = timezone.localdate(sale.sold_at)
+        for line in lines:
+            row = totals[(day, line.inventory_item_id)]
+            row[0] += line.quantity
+            row[1] += line.line_total
+            row[2] += unit_costs[line.inventory_item_id] * line.quantity
+    upsert_increment(
+        DailySales,
+        conflict_fields=["facility_id", "day", "inventory_item_id"],
+        rows=[
+            {
+                "facility_id": facility.id,
+                "day": day,
+                "inventory_item_id": inventory_item_id,
+                "quantity": quantity,
+                "revenue": revenue,
+                "cost_of_goods": cost_of_goods,
+            }
+            for (day, inventory_item_id), (quantity, revenue, cost_of_goods) in totals.items()
+        ],
+        increment_fields=["quantity", "revenue", "cost_of_goods"],
+    )
+
+
+def record_transfer(transfer, moved):
+    """
+    Add a transfer's quantities ({inventory_item_id: quantity}) to the
+    daily stock movement rollup of its source and destination in one
+    upsert. Call it inside the transaction that moves the stock.
+    """
+    day = timezone.localdate(transfer.transfer_date)
+    rows = []
+    for facility_id, column in (
+        (transfer.source_id, "transferred_out"),
+        (transfer.destination_id, "transferred_in"),
+    ):
+        rows.extend(
+            {
+                "facility_id": facility_id,
+                "day": day,
+                "inventory_item_id": inventory_item_id,
+                "transferred_in": 0,
+                "transferred_out": 0,
+                column: quantity,
+            }
+            for inventory_item_id, quantity in moved.items()
+        )
+    upsert_increment(
+        DailyStockMovement,
+        conflict_fields=["facility_id", "day", "inventory_item_id"],
+        rows=rows,
+        increment_fields=["transferred_in", "transferred_out"],
+    )
+
+
+def record_inbound(inbound, received, unit_costs):
+    """
+    Add an invoice's quantities ({inventory_item_id: quantity}) to the
+    daily inbound rollup in one upsert. Call it inside the transaction that
+    receives the stock.
+    """
+    day = timezone.localdate(inbound.inbound_date)
+    upsert_increment(
+        DailyInbound,
+        conflict_fields=["day", "inventory_item_id"],
+        rows=[
+            {
+                "day": day,
+                "inventory_item_id": inventory_item_id,
+                "quantity": quantity,
+                "cost_value": unit_costs[inventory_item_id] * quantity,
+            }
+            for inventory_item_id, quantity in received.items()
+        ],
+        increment_fields=["quantity", "cost_value"],
+    )
+
+
+def _value(quantity, price):
+    return Sum(ExpressionWrapper(
+        F(quantity) * F(price), output_field=DecimalField(max_digits=18, decimal_places=2)
+    ))
+
+
+def rebuild_rollups(day_from, day_to):
+    """
+    Recompute every rollup row from ``day_from`` to ``day_to`` (inclusive)
+    from the sales, transfer and inbound tables. Cost of goods is valued at
+    the items' current cost price, since sale lines do not record it.
+
+    On PostgreSQL the rollup tables are locked against writes first, so
+    sales committing meanwhile either are read here or wait and add
+    themselves on top once the rebuild commits.
+    """
+    lower = timezone.make_aware(datetime.combine(day_from, time.min))
+    upper = timezone.make_aware(datetime.combine(day_to + timedelta(days=1), time.min))
+
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "LOCK TABLE daily_sales, daily_stock_movements, daily_inbound "
+                    "IN SHARE ROW EXCLUSIVE MODE"
+                )
+
+        sales = (
+            SaleLine.objects.filter(sale__sold_at__gte=lower, sale__sold_at__lt=upper)
+            .annotate(day=TruncDate("sale__sold_at"))
+            .values("sale__facility_id", "day", "inventory_item_id")
+            .annotate(
+                total_quantity=Sum("quantity"),
+                total_revenue=Sum("line_total"),
+                total_cost=_value("quantity", "inventory_item__cost_price_pack"),
+            )
+            .order_by()
+        )
+        DailySales.objects.filter(day__gte=day_from, day__lte=day_to).delete()
+        DailySales.objects.bulk_create(
+            (
+                DailySales(
+                    facility_id=row["sale__facility_id"],
+                    day=row["day"],
+                    inventory_item_id=row["inventory_item_id"],
+                    quantity=row["total_quantity"],
+                    revenue=row["total_revenue"],
+                    cost_of_goods=row["total_cost"],
+                )
+                for row in sales.iterator()
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        movements = defaultdict(lambda: [0, 0])
+        transfers = (
+            TransferDetails.objects.filter(
+                transfer_id__transfer_date__gte=lower, transfer_id__transfer_date__lt=upper
+            )
+            .annotate(day=TruncDate("transfer_id__transfer_date"))
+            .values(
+                "transfer_id__source_id",
+                "transfer_id__destination_id",
+                "day",
+                "inventory_item_id",
+            )
+            .annotate(total=Sum("quantity"))
+            .order_by()
+        )
+        for row in transfers.iterator():
+            day, inventory_item_id = row["day"], row["inventory_item_id"]
+            movements[(row["transfer_id__destination_id"], day, inventory_item_id)][0] += row["total"]
+            movements[(row["transfer_id__source_id"], day, inventory_item_id)][1] += row["total"]
+        DailyStockMovement.objects.filter(day__gte=day_from, day__lte=day_to).delete()
+        DailyStockMovement.objects.bulk_create(
+            (
+                DailyStockMovement(
+                    facility_id=facility_id,
+                    day=day,
+                    inventory_item_id=inventory_item_id,
+                    transferred_in=transferred_in,
+                    transferred_out=transferred_out,
+                )
+                for (facility_id, day, inventory_item_id), (transferred_in, transferred_out)
+                in movements.items()
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+        inbound = (
+            InboundDetails.objects.filter(
+                inbound_id__inbound_date__gte=lower, inbound_id__inbound_date__lt=upper
+            )
+            .annotate(day=TruncDate("inbound_id__inbound_date"))
+            .values("day", "warehouse_item__inventory_item_id")
+            .annotate(
+                total_quantity=Sum("quantity"),
+                total_cost=_value("quantity", "warehouse_item__inventory_item__cost_price_pack"),
+            )
+            .order_by()
+        )
+        DailyInbound.objects.filter(day__gte=day_from, day__lte=day_to).delete()
+        DailyInbound.objects.bulk_create(
+            (
+                DailyInbound(
+                    day=row["day"],
+                    inventory_item_id=row["warehouse_item__inventory_item_id"],
+                    quantity=row["total_quantity"],
+                    cost_value=row["total_cost"],
+                )
+                for row in inbound.iterator()
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
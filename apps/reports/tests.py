@@ -0,0 +1,99 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+from apps.facilities.models import Facility
+from apps.inventory.models import FacilityInventory, InventoryItem
+from apps.inventory.services import receive_inbound, supply_facility, transfer_stock
+from apps.pos.services import checkout, sync_sales
+from apps.users.models import User
+from .models import DailyInbound, DailySales, DailyStockMovement
+from .services import rebuild_rollups
+
+
+class RollupTests(TestCase):
+    """The rollups kept by each commit match a rebuild from the source tables"""
+
+    def setUp(self):
+        self.warehouse, self.adum, self.bantama = [
+            Facility.objects.create(name=name, city="Kumasi", region="Ashanti", country="Ghana")
+            for name in ("Central", "Adum", "Bantama")
+        ]
+        self.cashier = User.objects.create(
+            email="cashier@example.com", name="Cashier", is_admin=True, facility=self.adum
+        )
+        self.items = [
+            InventoryItem.objects.create(
+                generic_name=f"Drug {n}", brand_name=f"Brand {n}", strength="500mg",
+                product_form="tablet", cost_price_pack=Decimal("10.00"),
+                selling_price_pack=Decimal("12.50"), pack_size=10,
+            )
+            for n in range(2)
+        ]
+        for item in self.items:
+            FacilityInventory.objects.create(facility=self.adum, inventory_item=item, quantity=50)
+
+    def lines(self, *quantities):
+        return [
+            {"product_id": item.product_id, "quantity": quantity}
+            for item, quantity in zip(self.items, quantities)
+        ]
+
+    def sale(self, key, days_ago, *quantities):
+        sold_at = timezone.now() - timedelta(days=days_ago)
+        return {"key": key, "sold_at": sold_at.isoformat(), "items": self.lines(*quantities)}
+
+    def rollups(self):
+        rollups = {}
+        for model in (DailySales, DailyStockMovement, DailyInbound):
+            fields = [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+            rollups[model.__name__] = sorted(model.objects.values_list(*fields))
+        return rollups
+
+    def assertRollupsRebuild(self):
+        recorded = self.rollups()
+        today = timezone.localdate()
+        rebuild_rollups(today - timedelta(days=30), today)
+        self.assertEqual(self.rollups(), recorded)
+
+    def test_recorded_rollups_match_a_rebuild(self):
+        expiry = (timezone.localdate() + timedelta(days=365)).isoformat()
+        receive_inbound("Ernest Chemists", "INV-1", timezone.localdate().isoformat(), [
+            {**line, "batch_no": "B1", "expiry_date": expiry} for line in self.lines(40, 40)
+        ])
+        supply_facility(self.warehouse, self.bantama, self.lines(10, 5))
+        transfer_stock(self.adum, self.bantama, self.lines(3))
+        transfer_stock(self.bantama, self.adum, self.lines(2, 1))
+        checkout(self.adum, self.cashier, self.lines(1, 2))
+        checkout(self.adum, self.cashier, self.lines(4, 1))
+        # Offline sales sold on earlier days, one of them on the same day
+        sync_sales(self.adum, self.cashier, [
+            self.sale("till-1", 3, 2, 2),
+            self.sale("till-2", 3, 1, 1),
+            self.sale("till-3", 10, 5, 3),
+        ])
+        self.assertEqual(
+            sorted(DailySales.objects.values_list("day", "inventory_item_id", "quantity")),
+            sorted([
+                (timezone.localdate(), self.items[0].id, 5),
+                (timezone.localdate(), self.items[1].id, 3),
+                (timezone.localdate() - timedelta(days=3), self.items[0].id, 3),
+                (timezone.localdate() - timedelta(days=3), self.items[1].id, 3),
+                (timezone.localdate() - timedelta(days=10), self.items[0].id, 5),
+                (timezone.localdate() - timedelta(days=10), self.items[1].id, 3),
+            ]),
+        )
+        self.assertEqual(DailyStockMovement.objects.count(), 6)
+        self.assertEqual(DailyInbound.objects.count(), 2)
+        self.assertRollupsRebuild()
+
+    def test_backdated_sales_add_to_rebuilt_days(self):
+        sync_sales(self.adum, self.cashier, [self.sale("till-1", 5, 2, 1)])
+        self.assertRollupsRebuild()
+        # Arrives after the day was rebuilt, from a till that was offline
+        sync_sales(self.adum, self.cashier, [self.sale("till-2", 5, 1, 4)])
+        self.assertEqual(
+            sorted(DailySales.objects.values_list("inventory_item_id", "quantity", "revenue")),
+            [(self.items[0].id, 3, Decimal("37.50")), (self.items[1].id, 5, Decimal("62.50"))],
+        )
+        self.assertRollupsRebuild()
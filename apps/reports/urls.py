@@ -0,0 +1,13 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import InboundReportViewSet, SalesReportViewSet, StockMovementReportViewSet
+
+router = DefaultRouter()
+router.register(r"sales", SalesReportViewSet, basename="sales")
+router.register(r"stock-movements", StockMovementReportViewSet, basename="stock-movements")
+router.register(r"inbound", InboundReportViewSet, basename="inbound")
+
+app_name = "reports"
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -0,0 +1,127 @@
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncYear
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.serializers import ValidationError
+from ..users.permissions import IsAdminUser, IsSuperUser, IsWarehouse
+from .models import DailyInbound, DailySales, DailyStockMovement
+
+
+class RollupReportViewSet(viewsets.ViewSet):
+    """
+    Totals of a daily rollup table between ?date_from= and ?date_to=
+    (inclusive days, the current month by default), grouped by
+    ?group_by=day, month, year, item or facility. Reads only rollup rows,
+    so a year costs at most 365 rows per facility and item.
+
+    Superusers see every facility and can narrow to one with ?facility=;
+    other users only see their own.
+    """
+    model = None
+    measures = ()
+    facility_scoped = True
+
+    GROUPINGS = {
+        "day": ["day"],
+        "month": ["month"],
+        "year": ["year"],
+        "item": ["inventory_item__product_id", "inventory_item__product_name"],
+        "facility": ["facility_id", "facility__name"],
+    }
+    TRUNCATIONS = {"month": TruncMonth, "year": TruncYear}
+
+    def get_groupings(self):
+        if self.facility_scoped:
+            return self.GROUPINGS
+        return {name: fields for name, fields in self.GROUPINGS.items() if name != "facility"}
+
+    def get_day(self, param, default):
+        value = self.request.query_params.get(param)
+        if value is None:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({param: ["Enter a valid date (YYYY-MM-DD)."]})
+        return day
+
+    def get_queryset(self):
+        user = self.request.user
+        today = timezone.localdate()
+        date_from = self.get_day("date_from", today.replace(day=1))
+        date_to = self.get_day("date_to", today)
+        if date_from > date_to:
+            raise ValidationError({"date_to": ["Must not be before date_from."]})
+
+        queryset = self.model.objects.filter(day__gte=date_from, day__lte=date_to)
+        if not self.facility_scoped:
+            return queryset, date_from, date_to
+        if user.is_superuser:
+            facility_id = self.request.query_params.get("facility")
+            if facility_id:
+                if not facility_id.isdigit():
+                    raise ValidationError({"facility": ["A valid facility id is required."]})
+                queryset = queryset.filter(facility_id=facility_id)
+        else:
+            queryset = queryset.filter(facility=user.facility)
+        return queryset, date_from, date_to
+
+    def summarize(self, row):
+        return {name: row[f"total_{name}"] or 0 for name in self.measures}
+
+    def list(self, request):
+        group_by = request.query_params.get("group_by", "day")
+        groupings = self.get_groupings()
+        if group_by not in groupings:
+            raise ValidationError({"group_by": [f"Choose one of {', '.join(groupings)}."]})
+        queryset, date_from, date_to = self.get_queryset()
+
+        totals = {f"total_{name}": Sum(name) for name in self.measures}
+        fields = groupings[group_by]
+        grouped = queryset
+        if group_by in self.TRUNCATIONS:
+            grouped = grouped.annotate(**{group_by: self.TRUNCATIONS[group_by]("day")})
+        grouped = grouped.values(*fields).annotate(**totals).order_by(*fields)
+
+        results = []
+        for row in grouped:
+            result = {field.replace("inventory_item__", "").replace("__", "_"): row[field]
+                      for field in fields}
+            result.update(self.summarize(row))
+            results.append(result)
+        return Response({
+            "date_from": date_from,
+            "date_to": date_to,
+            "group_by": group_by,
+            "totals": self.summarize(queryset.aggregate(**totals)),
+            "results": results,
+        })
+
+
+class SalesReportViewSet(RollupReportViewSet):
+    model = DailySales
+    measures = ("quantity", "revenue", "cost_of_goods")
+    permission_classes = [IsAuthenticated, IsSuperUser | IsAdminUser]
+
+    def summarize(self, row):
+        summary = super().summarize(row)
+        summary["gross_margin"] = summary["revenue"] - summary["cost_of_goods"]
+        return summary
+
+
+class StockMovementReportViewSet(RollupReportViewSet):
+    model = DailyStockMovement
+    measures = ("transferred_in", "transferred_out")
+    permission_classes = [IsAuthenticated, IsSuperUser | IsAdminUser | IsWarehouse]
+
+
+class InboundReportViewSet(RollupReportViewSet):
+    model = DailyInbound
+    measures = ("quantity", "cost_value")
+    facility_scoped = False
+    permission_classes = [IsAuthenticated, IsSuperUser | IsWarehouse]
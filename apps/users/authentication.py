@@ -0,0 +1,143 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from ..facilities.models import Facility
+from .models import User
+
+# Claims signed into every token, read back by ClaimsUser
+CLAIMS = ("facility_id", "is_admin", "is_superuser", "is_warehouse")
+
+
+def user_claims(user):
+    return {claim: getattr(user, claim) for claim in CLAIMS}
+
+
+def _state_key(user_id):
+    return f"users:auth:{user_id}"
+
+
+def auth_state(user_id):
+    """
+    The user's active flag and current claims, or None if the user no
+    longer exists. Cached for AUTH_STATE_TTL seconds and dropped whenever
+    the user is saved or deleted, so a deactivated user or a changed role
+    stops authenticating within that time at most.
+    """
+    key = _state_key(user_id)
+    state = cache.get(key)
+    if state is None:
+        row = User.objects.filter(pk=user_id).values("is_active", *CLAIMS).first()
+        state = row or {}
+        cache.set(key, state, settings.AUTH_STATE_TTL)
+    return state or None
+
+
+async def aauth_state(user_id):
+    """auth_state() for async views"""
+    key = _state_key(user_id)
+    state = await cache.aget(key)
+    if state is None:
+        row = await User.objects.filter(pk=user_id).values("is_active", *CLAIMS).afirst()
+        state = row or {}
+        await cache.aset(key, state, settings.AUTH_STATE_TTL)
+    return state or None
+
+
+def invalidate_auth_state(user_id):
+    transaction.on_commit(lambda: cache.delete(_state_key(user_id)))
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_auth_state(instance.pk)
+
+
+class ClaimsUser(TokenUser):
+    """
+    The authenticated user as described by the token's claims. Permission
+    checks and facility scoping read it without loading the users or
+    facilities rows. Views that need the model, to change a password for
+    instance, load it by ``pk``.
+    """
+
+    @cached_property
+    def email(self):
+        return self.id
+
+    @cached_property
+    def facility_id(self):
+        return self.token.get("facility_id")
+
+    @cached_property
+    def facility(self):
+        # Unsaved stand-in with only the primary key, enough to filter on
+        # and to assign to foreign keys
+        if self.facility_id is None:
+            return None
+        return Facility(pk=self.facility_id)
+
+    @cached_property
+    def is_admin(self):
+        return self.token.get("is_admin", False)
+
+    @cached_property
+    def is_warehouse(self):
+        return self.token.get("is_warehouse", False)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the signed role and facility claims
+    instead of loading the user on every request. Tokens are still checked
+    against the cached auth_state(), so they stop working when the user is
+    deactivated or deleted, and must be refreshed once the user's role or
+    facility changes. Tokens issued without the claims fall back to a
+    database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+        return self.claims_user(validated_token, auth_state(self.user_id(validated_token)))
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views. Only the auth state lookup, and
+        the database fallback for tokens without claims, wait on I/O.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if any(claim not in validated_token for claim in CLAIMS):
+            user = await sync_to_async(super().get_user)(validated_token)
+        else:
+            state = await aauth_state(self.user_id(validated_token))
+            user = self.claims_user(validated_token, state)
+        return user, validated_token
+
+    def user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def claims_user(self, validated_token, state):
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not state["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if any(state[claim] != validated_token[claim] for claim in CLAIMS):
+            raise InvalidToken("Token claims are out of date, refresh the token")
+        return ClaimsUser(validated_token)
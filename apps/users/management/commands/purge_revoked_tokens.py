@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from apps.users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete revoked refresh tokens that have expired, and expired rows "
+        "left in the token_blacklist tables, in batches so no long lock is "
+        "held. Meant to run daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def purge(self, model, key):
+        expired = model.objects.filter(expires_at__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.values_list(key, flat=True)[:self.batch_size])
+            if not keys:
+                return deleted
+            deleted += model.objects.filter(**{f"{key}__in": keys}).delete()[0]
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        revoked = self.purge(RevokedToken, "jti_hash")
+        self.stdout.write(f"Deleted {revoked} expired revoked tokens")
+        # Deleting outstanding tokens cascades to their blacklist entries
+        outstanding = self.purge(OutstandingToken, "id")
+        self.stdout.write(f"Deleted {outstanding} expired outstanding tokens")
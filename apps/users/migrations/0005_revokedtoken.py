@@ -0,0 +1,46 @@
+import hashlib
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def import_blacklist(apps, schema_editor):
+    # Carry over blacklisted refresh tokens that have not expired yet
+    BlacklistedToken = apps.get_model("token_blacklist", "BlacklistedToken")
+    RevokedToken = apps.get_model("users", "RevokedToken")
+    blacklisted = BlacklistedToken.objects.filter(
+        token__expires_at__gt=django.utils.timezone.now()
+    ).values_list("token__jti", "token__expires_at", "blacklisted_at")
+    batch = []
+    for jti, expires_at, blacklisted_at in blacklisted.iterator(chunk_size=10000):
+        batch.append(RevokedToken(
+            jti_hash=int.from_bytes(hashlib.sha256(jti.encode()).digest()[:8], "big", signed=True),
+            expires_at=expires_at,
+            revoked_at=blacklisted_at,
+        ))
+        if len(batch) == 10000:
+            RevokedToken.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    RevokedToken.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_is_warehouse'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('jti_hash', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('revoked_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'revoked_tokens',
+            },
+        ),
+        migrations.RunPython(import_blacklist, migrations.RunPython.noop),
+    ]
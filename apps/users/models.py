@@ -72,3 +72,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     class Meta:
         db_table = "users"
 
+
+
+class RevokedToken(models.Model):
+    """
+    A revoked refresh token, keyed by a 64-bit hash of its jti so lookups
+    stay on a narrow index however many tokens are revoked. Rows can be
+    purged once the token would have expired anyway.
+    """
+    jti_hash = models.BigIntegerField(primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = "revoked_tokens"
+
+    def __str__(self):
+        return f"{self.jti_hash} (expires {self.expires_at})"
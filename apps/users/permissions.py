@@ -23,5 +23,5 @@ class IsWarehouse(BasePermission):
     """
 
     def has_permission(self, request, view):
-        return request.user.is_warehouse and request.user.is_authenticated
+        return request.user.is_authenticated and request.user.is_warehouse
     
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Refresh token revocation.
+
+Revoked tokens are stored in revoked_tokens by a 64-bit hash of their jti.
+Each process keeps a Bloom filter of those hashes, so checking a token that
+was never revoked, which is nearly every check, costs no query. The filter
+is topped up every REVOCATION_SYNC_SECONDS from the revoked_at index and
+rebuilt daily to shed expired entries.
+
+A revocation made by another process can take that long to reach the
+filter, so revoking stays exact on its own: revoke() is a single
+INSERT ... ON CONFLICT DO NOTHING that reports whether this call revoked
+the token. Rotation and logout rely on it, so a refresh token can be
+rotated at most once.
+"""
+import hashlib
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from .models import RevokedToken
+
+# Revocations are re-read this far back on every sync, to catch rows whose
+# transactions committed after later ones
+SYNC_OVERLAP = timedelta(minutes=1)
+REBUILD_SECONDS = 24 * 60 * 60
+
+
+def jti_hash(jti):
+    return int.from_bytes(hashlib.sha256(jti.encode()).digest()[:8], "big", signed=True)
+
+
+class RevocationFilter:
+    """
+    Bloom filter of revoked jti hashes. might_contain() never misses a
+    revocation it has synced; a positive answer has to be confirmed
+    against the table.
+
+    Syncs read the table outside the lock, so checks keep being answered
+    from the current filter meanwhile. A rebuild fills a new filter and
+    swaps it in, replaying the revocations added while it was built.
+    """
+
+    def __init__(self, bits=None, hashes=7, sync_seconds=None):
+        self.size = bits or getattr(settings, "REVOCATION_FILTER_BITS", 1 << 26)
+        self.hashes = hashes
+        self.sync_seconds = (
+            sync_seconds if sync_seconds is not None
+            else getattr(settings, "REVOCATION_SYNC_SECONDS", 5)
+        )
+        self._lock = threading.Lock()
+        self._bits = None
+        self._built_at = self._synced_at = 0.0
+        self._since = None
+        # Set while one thread syncs; other threads skip the sync
+        self._syncing = False
+        # Values added during a rebuild, for the filter that replaces _bits
+        self._pending = None
+        # Bumped by clear(), so a sync started before it is discarded
+        self._generation = 0
+
+    def _positions(self, value):
+        value &= (1 << 64) - 1
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def _add(self, bits, value):
+        for position in self._positions(value):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def add(self, value):
+        with self._lock:
+            if self._bits is not None:
+                self._add(self._bits, value)
+            if self._pending is not None:
+                self._pending.append(value)
+
+    def sync(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            rebuild = self._bits is None or now - self._built_at > REBUILD_SECONDS
+            if self._syncing or not (
+                rebuild or force or now - self._synced_at >= self.sync_seconds
+            ):
+                return
+            self._syncing = True
+            generation, since = self._generation, self._since
+            if rebuild:
+                self._pending = []
+
+        try:
+            if rebuild:
+                bits = bytearray(self.size // 8 + 1)
+                revoked = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+            else:
+                values = []
+                revoked = RevokedToken.objects.filter(revoked_at__gte=since - SYNC_OVERLAP)
+            for value, revoked_at in revoked.values_list("jti_hash", "revoked_at").iterator(
+                chunk_size=10000
+            ):
+                if rebuild:
+                    self._add(bits, value)
+                else:
+                    values.append(value)
+                if since is None or revoked_at > since:
+                    since = revoked_at
+        except BaseException:
+            with self._lock:
+                self._syncing = False
+                self._pending = None
+            raise
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._syncing = False
+            if generation != self._generation:
+                return
+            if rebuild:
+                for value in pending:
+                    self._add(bits, value)
+                self._bits = bits
+                self._built_at = now
+            elif self._bits is not None:
+                for value in values:
+                    self._add(self._bits, value)
+            self._since = since or timezone.now()
+            self._synced_at = now
+
+    def might_contain(self, value):
+        self.sync()
+        bits = self._bits
+        if bits is None:
+            # Being built by another thread, so only the table can tell
+            return True
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def clear(self):
+        with self._lock:
+            self._bits = None
+            self._since = None
+            self._generation += 1
+
+
+revocation_filter = RevocationFilter()
+
+
+def revoke(jti, expires_at):
+    """
+    Revoke the token with ``jti``. Returns False if it was already revoked.
+    """
+    value = jti_hash(jti)
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {qn(RevokedToken._meta.db_table)} "
+            f"({qn('jti_hash')}, {qn('expires_at')}, {qn('revoked_at')}) "
+            f"VALUES (%s, %s, %s) ON CONFLICT ({qn('jti_hash')}) DO NOTHING "
+            f"RETURNING {qn('jti_hash')}",
+            [value, expires_at, timezone.now()],
+        )
+        revoked = cursor.fetchone() is not None
+    revocation_filter.add(value)
+    return revoked
+
+
+def is_revoked(jti):
+    value = jti_hash(jti)
+    if not revocation_filter.might_contain(value):
+        return False
+    return RevokedToken.objects.filter(jti_hash=value).exists()
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    Refresh token checked against revoked_tokens instead of the
+    token_blacklist tables. Issued tokens are not recorded; only revoked
+    ones are.
+    """
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        Token.verify(self, *args, **kwargs)
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        """
+        Revoke this token. Returns False if it was already revoked.
+        """
+        return revoke(
+            self.payload[api_settings.JTI_CLAIM], datetime_from_epoch(self.payload["exp"])
+        )
+
+    def outstand(self):
+        return None
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which records every issued token
+        return Token.for_user.__func__(cls, user)
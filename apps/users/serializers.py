@@ -1,6 +1,14 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth import authenticate
+from .authentication import user_claims
 from .models import User
+from .revocation import RevocableRefreshToken
 from django.utils import timezone
 
 
@@ -17,3 +25,52 @@ class UserSerializer(serializers.ModelSerializer):
         user.set_password(password)
         user.save()
         return user
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Login serializer that signs the user's facility and role claims into
+    the tokens
+    """
+    token_class = RevocableRefreshToken
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, value in user_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that re-reads the user, so refreshed tokens carry
+    their current facility and role claims. With rotation, the old token
+    is revoked before new ones are issued, so concurrent refreshes of one
+    token cannot both succeed.
+    """
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(
+            pk=refresh.payload.get(api_settings.USER_ID_CLAIM)
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        for claim, value in user_claims(user).items():
+            refresh[claim] = value
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            if not refresh.blacklist():
+                raise InvalidToken("Token is blacklisted")
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+        return data
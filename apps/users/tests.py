@@ -1,3 +1,190 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from apps.core.testing import QueryBudgetMixin
+from apps.facilities.models import Facility
+from apps.inventory.models import FacilityInventory, InventoryItem
+from .authentication import ClaimsJWTAuthentication, ClaimsUser
+from . import revocation
+from .models import RevokedToken, User
+from .permissions import IsAdminUser, IsSuperUser, IsWarehouse
+from .revocation import REBUILD_SECONDS, RevocationFilter, is_revoked, jti_hash, revoke
+from .serializers import ClaimsTokenObtainPairSerializer
 
-# Create your tests here.
+
+class ClaimsAuthenticationTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.facilities = [
+            Facility.objects.create(name=name, city="Accra", region="Greater Accra", country="Ghana")
+            for name in ("Adum", "Bantama")
+        ]
+        self.user = User.objects.create(
+            email="admin@example.com", name="Admin", is_admin=True, facility=self.facilities[0]
+        )
+
+    def request(self):
+        """A request carrying a freshly issued access token for the user"""
+        token = ClaimsTokenObtainPairSerializer.get_token(self.user).access_token
+        return APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def authenticate(self, request=None):
+        return ClaimsJWTAuthentication().authenticate(request or self.request())[0]
+
+    def save(self, **fields):
+        """Change the user the way a view would, committing the cache invalidation"""
+        for name, value in fields.items():
+            setattr(self.user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+    def test_authorizes_from_the_claims(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user = self.authenticate()
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.facility_id, self.facilities[0].id)
+        self.assertTrue(user.is_admin)
+        self.assertFalse(user.is_superuser)
+        self.assertFalse(user.is_warehouse)
+
+    def test_role_change_rejects_the_old_token(self):
+        request = self.request()
+        self.authenticate(request)
+        # Within AUTH_STATE_TTL of the cached state
+        self.save(is_admin=False)
+        with self.assertRaises(InvalidToken):
+            self.authenticate(request)
+        self.assertFalse(self.authenticate().is_admin)
+
+    def test_facility_change_rejects_the_old_token(self):
+        request = self.request()
+        self.authenticate(request)
+        self.save(facility=self.facilities[1])
+        with self.assertRaises(InvalidToken):
+            self.authenticate(request)
+        self.assertEqual(self.authenticate().facility_id, self.facilities[1].id)
+
+    def test_deactivated_user_is_rejected(self):
+        request = self.request()
+        self.authenticate(request)
+        self.save(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(request)
+
+    def test_deleted_user_is_rejected(self):
+        request = self.request()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(request)
+
+    def test_permission_checks_read_the_claims(self):
+        request = APIRequestFactory().get("/")
+        request.user = self.authenticate()
+        self.assertTrue(IsAdminUser().has_permission(request, None))
+        self.assertFalse(IsSuperUser().has_permission(request, None))
+        self.assertFalse(IsWarehouse().has_permission(request, None))
+
+    def test_facility_stand_in_scopes_querysets(self):
+        item = InventoryItem.objects.create(
+            generic_name="Paracetamol", brand_name="Panadol", strength="500mg",
+            product_form="tablet", cost_price_pack=Decimal("10.00"),
+            selling_price_pack=Decimal("12.00"), pack_size=10,
+        )
+        for facility, quantity in zip(self.facilities, (5, 7)):
+            FacilityInventory.objects.create(facility=facility, inventory_item=item, quantity=quantity)
+        user = self.authenticate()
+        self.assertEqual(user.facility.pk, self.facilities[0].id)
+        self.assertEqual(
+            list(FacilityInventory.objects.filter(facility=user.facility).values_list("quantity", flat=True)),
+            [5],
+        )
+
+        response = self.client_for(self.user).get("/inventory/facility-inventory/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["quantity"] for row in response.data["results"]], [5])
+
+
+class RevocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(email="admin@example.com", name="Admin", is_admin=True)
+        self.client = APIClient()
+        # The filter is per process, so start each test from the table
+        revocation.revocation_filter.clear()
+        self.addCleanup(revocation.revocation_filter.clear)
+
+    def refresh_token(self):
+        return str(ClaimsTokenObtainPairSerializer.get_token(self.user))
+
+    def refresh(self, token):
+        return self.client.post("/token/refresh/", {"refresh": token}, format="json")
+
+    def test_rotation_revokes_the_old_token(self):
+        token = self.refresh_token()
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], token)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data["refresh"]).status_code, 200)
+
+    def test_logout_revokes_the_token(self):
+        token = self.refresh_token()
+        response = self.client.post("/logout/", {"refresh": token}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(self.refresh_token()).status_code, 200)
+
+    def test_false_positive_is_checked_against_the_table(self):
+        # Every value sets the one bit a filter this small has
+        tiny = RevocationFilter(bits=1, hashes=1)
+        with mock.patch.object(revocation, "revocation_filter", tiny):
+            revoke("revoked", timezone.now() + timedelta(days=1))
+            self.assertTrue(tiny.might_contain(jti_hash("never revoked")))
+            with self.assertNumQueries(1):
+                self.assertFalse(is_revoked("never revoked"))
+            self.assertTrue(is_revoked("revoked"))
+
+    def test_unrevoked_tokens_are_checked_without_a_query(self):
+        revoke("revoked", timezone.now() + timedelta(days=1))
+        is_revoked("revoked")
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked("never revoked"))
+
+    def test_rebuild_drops_expired_revocations(self):
+        bloom = RevocationFilter(bits=1 << 16, sync_seconds=0)
+        RevokedToken.objects.create(
+            jti_hash=jti_hash("expired"), expires_at=timezone.now() - timedelta(days=1)
+        )
+        RevokedToken.objects.create(
+            jti_hash=jti_hash("current"), expires_at=timezone.now() + timedelta(days=1)
+        )
+        self.assertFalse(bloom.might_contain(jti_hash("expired")))
+        self.assertTrue(bloom.might_contain(jti_hash("current")))
+
+        # Synced incrementally, by revoked_at, until the next rebuild
+        RevokedToken.objects.filter(jti_hash=jti_hash("current")).update(
+            expires_at=timezone.now() - timedelta(days=1)
+        )
+        bloom.add(jti_hash("added"))
+        self.assertTrue(bloom.might_contain(jti_hash("current")))
+        bloom._built_at -= REBUILD_SECONDS + 1
+        self.assertFalse(bloom.might_contain(jti_hash("current")))
+        self.assertFalse(bloom.might_contain(jti_hash("added")))
+
+    def test_revocations_during_a_rebuild_reach_the_new_filter(self):
+        bloom = RevocationFilter(bits=1 << 16)
+        query = RevokedToken.objects.filter
+
+        def revoke_during_rebuild(*args, **kwargs):
+            bloom.add(jti_hash("during"))
+            return query(*args, **kwargs)
+
+        with mock.patch.object(RevokedToken.objects, "filter", revoke_during_rebuild):
+            bloom.sync()
+        self.assertTrue(bloom.might_contain(jti_hash("during")))
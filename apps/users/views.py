@@ -5,12 +5,14 @@ from rest_framework.serializers import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenBlacklistView
-from rest_framework_simplejwt.tokens import OutstandingToken, BlacklistedToken
+from rest_framework_simplejwt.exceptions import TokenError
 from django.core.exceptions import PermissionDenied
 from django.db.models import F
 from django.db import transaction
 from .models import User
+from .revocation import RevocableRefreshToken
 from .serializers import UserSerializer
+from ..core.idempotency import idempotent
 from ..facilities.models import Facility
 from .permissions import IsAdminUser, IsSuperUser
 
@@ -22,6 +24,9 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.select_related("facility")
     serializer_class = UserSerializer
     permission_classes = [IsSuperUser]
+    keyset_ordering = ("email",)
+    # Users are looked up by email, which contains dots
+    lookup_value_regex = "[^/]+"
 
     filterset_fields = ["facility"]
     search_fields = ["name"]
@@ -35,6 +40,10 @@ class UserViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
 
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     @transaction.atomic
     def perform_create(self, serializer):
         # Increment the staff_number of the facility the user is being added to
@@ -71,7 +80,8 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["POST"], permission_classes=[IsAuthenticated])
     def change_password(self, request):
 
-        user = request.user
+        # request.user only carries the token claims
+        user = User.objects.get(pk=request.user.pk)
         old_password = request.data.get("old password")
         new_password1 = request.data.get("new password")
         new_password2 = request.data.get("confirm password")
@@ -95,18 +105,18 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class LogoutView(TokenBlacklistView):
     def post(self, request: Request, *args, **kwargs) -> Response:
-        auth_token = request.headers.get("Authorization")
-        if not auth_token:
+        # The refresh token comes in the body, or as the bearer token for
+        # older clients
+        refresh_token = request.data.get("refresh")
+        auth_token = request.headers.get("Authorization", "")
+        if not refresh_token and auth_token.startswith("Bearer "):
+            refresh_token = auth_token.split(" ", 1)[1]
+        if not refresh_token:
             return Response("Token not provided", status=400)
-        refresh_token = (
-            auth_token.split(" ")[1] if auth_token.startswith("Bearer ") else None
-        )
-        if refresh_token:
-            try:
-                token = OutstandingToken.objects.get(token=refresh_token)
-                BlacklistedToken.objects.create(token=token)
-                return Response("Log out successful", status=200)
-            except OutstandingToken.DoesNotExist:
-                return Response("Invalid token", status=404)
-
-        return Response("Not Authorised", status=401)
+
+        try:
+            token = RevocableRefreshToken(refresh_token)
+        except TokenError:
+            return Response("Invalid token", status=401)
+        token.blacklist()
+        return Response("Log out successful", status=200)
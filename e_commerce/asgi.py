@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'e_commerce.settings')
 
 application = get_asgi_application()
+
+# Load the product catalog before the first request needs it
+from apps.inventory.catalog import warm_on_start  # noqa: E402
+
+warm_on_start()
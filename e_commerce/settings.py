@@ -44,18 +44,21 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
+    "apps.core",
     "apps.users",
     "apps.facilities",
     "apps.inventory",
     "apps.clients",
     "apps.pos",
+    "apps.reports",
     "rest_framework",
     "rest_framework_simplejwt.token_blacklist",
     "django_filters",
-    "debug_toolbar"
 ]
 
 MIDDLEWARE = [
+    'apps.core.instrumentation.SQLInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,7 +66,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware'
 ]
 
 ROOT_URLCONF = 'e_commerce.urls'
@@ -99,6 +101,39 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared between workers when REDIS_URL is set; the catalog cache and other
+# version counters rely on it to see each other's invalidations. Without it
+# the cache is local to each process, so the catalog is read from the
+# database on every lookup (the stock endpoints' query budgets allow for
+# it) and list and retrieve responses carry no ETags.
+
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+CATALOG_CACHE_SIZE = int(os.environ.get("CATALOG_CACHE_SIZE", 50000))
+# Load the catalog when wsgi.py or asgi.py is imported by a server, rather
+# than on the first lookups. On by default wherever the cache is shared, as
+# it is in production; CATALOG_WARM_ON_START=0 turns it off.
+CATALOG_WARM_ON_START = os.environ.get(
+    "CATALOG_WARM_ON_START", "1" if os.environ.get("REDIS_URL") else "0"
+) == "1"
+
+# Hours a stored Idempotency-Key response is kept for replay
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -147,12 +182,12 @@ AUTH_USER_MODEL = "users.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "apps.core.pagination.HybridPagination",
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
@@ -169,21 +204,58 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
+    "USER_ID_FIELD": "email",
+    "TOKEN_OBTAIN_SERIALIZER": "apps.users.serializers.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.ClaimsTokenRefreshSerializer",
 }
 
-# Debug Toolbar
-# https://django-debug-toolbar.readthedocs.io/en/latest/configuration.html
-INTERNAL_IPS = [
-    "127.0.0.1",
-]
-
-def show_toolbar(request):
-    return True
-
-DEBUG_TOOLBAR_CONFIG = {
-    "SHOW_TOOLBAR_CALLBACK": show_toolbar,
+# Seconds a user's active flag and claims are cached before tokens are
+# checked against the database again
+AUTH_STATE_TTL = int(os.environ.get("AUTH_STATE_TTL", 60))
+
+# Revoked refresh tokens: seconds between syncs of each process's filter
+# with revoked_tokens, and the filter's size in bits (8 MiB by default)
+REVOCATION_SYNC_SECONDS = int(os.environ.get("REVOCATION_SYNC_SECONDS", 5))
+REVOCATION_FILTER_BITS = int(os.environ.get("REVOCATION_FILTER_BITS", 1 << 26))
+
+# Per-request SQL instrumentation (apps.core.instrumentation). Budgets
+# override the views' query_budgets, e.g. {"TransferViewSet.retrieve": 4}.
+# TEST_RUNNER enforces them; set SQL_BUDGET_ENFORCE=1 under other runners.
+SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "1") == "1"
+SQL_QUERY_BUDGETS = {}
+SQL_BUDGET_ENFORCE = os.environ.get("SQL_BUDGET_ENFORCE") == "1"
+TEST_RUNNER = "apps.core.testing.TestRunner"
+
+# Plan shapes stored by check_query_plans --update
+QUERY_PLAN_BASELINE = os.environ.get("QUERY_PLAN_BASELINE", str(BASE_DIR / "query_plans.json"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request, warnings for repeated statements and
+        # requests over budget
+        "apps.core.sql": {
+            "handlers": ["console"],
+            "level": os.environ.get("SQL_LOG_LEVEL", "WARNING"),
+            "propagate": False,
+        },
+    },
 }
 
+# Debug Toolbar, opt in with DEBUG_TOOLBAR=1 for local profiling
+# https://django-debug-toolbar.readthedocs.io/en/latest/configuration.html
+DEBUG_TOOLBAR = DEBUG and os.environ.get("DEBUG_TOOLBAR") == "1"
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.append("debug_toolbar.middleware.DebugToolbarMiddleware")
+    INTERNAL_IPS = [
+        "127.0.0.1",
+    ]
+
 if DEBUG:
     import mimetypes
     mimetypes.add_type("application/javascript", ".js", True)
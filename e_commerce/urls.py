@@ -14,14 +14,24 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-import debug_toolbar
 
 urlpatterns = [
-    path('__debug__/', include(debug_toolbar.urls)),
     path("admin/", admin.site.urls),
     path("", include("apps.users.urls")),
     path("facilities/", include("apps.facilities.urls")),
     path("inventory/", include("apps.inventory.urls")),
+    path("pos/", include("apps.pos.urls")),
+    path("clients/", include("apps.clients.urls")),
+    path("reports/", include("apps.reports.urls")),
+    # Async read path, served on the event loop under ASGI
+    path("async/inventory/", include("apps.inventory.async_urls")),
+    path("async/clients/", include("apps.clients.async_urls")),
 ]
+
+if settings.DEBUG_TOOLBAR:
+    import debug_toolbar
+
+    urlpatterns.append(path("__debug__/", include(debug_toolbar.urls)))
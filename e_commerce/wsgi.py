@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'e_commerce.settings')
 
 application = get_wsgi_application()
+
+# Load the product catalog before the first request needs it
+from apps.inventory.catalog import warm_on_start  # noqa: E402
+
+warm_on_start()